@@ -0,0 +1,59 @@
+"""
+compares the peak memory (max RSS) and time of loading a .csv file whole
+against the chunked reader with float64 and float32 columns, each load runs
+in a fresh process so its peak is not hidden by an earlier one
+
+usage: python bench/bench_chunked.py [rows ...] [--chunksize N]
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import write_csv
+
+def load(filepath, chunksize, dtype):
+	"""
+	loads filepath once with an SMA, prints the seconds taken and the peak RSS in MiB
+	"""
+	import numpy as np
+	from stock_data import StockData
+
+	start = time.perf_counter()
+	if chunksize: StockData(filepath, cache=False, chunksize=chunksize, dtype=getattr(np, dtype), windows=[50])
+	else: StockData(filepath, cache=False)._calculate_SMA(50)
+	elapsed = time.perf_counter() - start
+
+	# linux reports ru_maxrss in KiB, macOS in bytes
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	print(elapsed, peak / (1024 ** 2 if sys.platform == 'darwin' else 1024))
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('rows', nargs='*', type=int, default=[100_000, 1_000_000, 5_000_000])
+	parser.add_argument('--chunksize', type=int, default=100_000)
+	parser.add_argument('--load', nargs=3, help=argparse.SUPPRESS)
+	args = parser.parse_args()
+
+	if args.load:
+		(filepath, chunksize, dtype) = args.load
+		return load(filepath, int(chunksize), dtype)
+
+	print(f"{'rows':>12} {'file (MiB)':>11} {'mode':>16} {'time (s)':>9} {'peak (MiB)':>11}")
+	with tempfile.TemporaryDirectory() as folder:
+		for rows in args.rows:
+			filepath = write_csv(os.path.join(folder, f'{rows}.csv'), rows)
+			size = os.path.getsize(filepath) / 1024 ** 2
+			for (mode, chunksize, dtype) in (('whole', 0, 'float64'),
+			                                 ('chunked float64', args.chunksize, 'float64'),
+			                                 ('chunked float32', args.chunksize, 'float32')):
+				output = subprocess.run([sys.executable, __file__, '--load', filepath, str(chunksize), dtype],
+				                        check=True, capture_output=True, text=True).stdout
+				(elapsed, peak) = (float(value) for value in output.split()[-2:])
+				print(f"{rows:>12,} {size:>11.1f} {mode:>16} {elapsed:>9.2f} {peak:>11.1f}")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,115 @@
+"""
+load test of the feed server: serves synthetic instruments to many TCP clients,
+publishes new bars and reports how long the bars and Buy/Sell signals took from
+being published to being read by every client. the clients run in the same process
+and event loop as the server, so their reading is part of the measured latency
+
+usage: python bench/bench_feed.py [--clients N] [--tickers N] [--bars N] [--interval S]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from synthetic import make_ohlcv
+from feed_server import FeedServer
+from stock_data import StockData
+
+def raise_open_files_limit(needed):
+	"""
+	raises the soft limit of open files (every client takes two sockets) up to the hard limit
+	"""
+	try: import resource
+	except ImportError: return
+	(soft, hard) = resource.getrlimit(resource.RLIMIT_NOFILE)
+	if soft != resource.RLIM_INFINITY and soft < needed:
+		resource.setrlimit(resource.RLIMIT_NOFILE, (needed if hard == resource.RLIM_INFINITY else min(needed, hard), hard))
+
+async def client(port, tickers, subscribed, latencies, counts):
+	"""
+	subscribes to tickers and records the latency of every bar and signal until the server disconnects
+	"""
+	(reader, writer) = await asyncio.open_connection('127.0.0.1', port)
+	writer.write((json.dumps({'op': 'subscribe', 'tickers': tickers}) + '\n').encode())
+	await writer.drain()
+	waiting = len(tickers)
+	while True:
+		line = await reader.readline()
+		if not line: break
+		now = time.time()
+		message = json.loads(line)
+		counts[message['type']] = counts.get(message['type'], 0) + 1
+		if 'time' in message: latencies.append(now - message['time'])
+		elif message['type'] == 'subscribed':
+			waiting -= 1
+			if waiting == 0: subscribed.release()
+	writer.close()
+
+async def run(args, stocks, bars):
+	feed = FeedServer(stocks, args.SMA1, args.SMA2, args.max_queue)
+	server = await feed.start('127.0.0.1', 0)
+	port = server.sockets[0].getsockname()[1]
+
+	tickers = list(stocks)
+	latencies = []
+	counts = {}
+	subscribed = asyncio.Semaphore(0)
+	clients = [asyncio.ensure_future(client(port, [tickers[(i + j) % len(tickers)] for j in range(args.tickers_per_client)],
+	                                        subscribed, latencies, counts))
+	           for i in range(args.clients)]
+	for _ in range(args.clients): await subscribed.acquire()
+
+	published = 0
+	start = time.perf_counter()
+	for i in range(args.bars):
+		for ticker in tickers:
+			messages = feed.publish(ticker, bars[ticker].iloc[i:i+1])
+			published += messages * len(feed.subscribers[ticker])
+		await asyncio.sleep(args.interval)
+	feed.close()
+	await asyncio.gather(*clients)
+	seconds = time.perf_counter() - start
+	return (latencies, counts, published, seconds)
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--clients', type=int, default=1000)
+	parser.add_argument('--tickers', type=int, default=10, help="amount of instruments served")
+	parser.add_argument('--tickers-per-client', type=int, default=1)
+	parser.add_argument('--rows', type=int, default=1000, help="bars of history per instrument")
+	parser.add_argument('--bars', type=int, default=100, help="new bars published per instrument")
+	parser.add_argument('--interval', type=float, default=0.01, help="seconds between publishing a bar of every instrument")
+	parser.add_argument('--SMA1', type=int, default=5)
+	parser.add_argument('--SMA2', type=int, default=20)
+	parser.add_argument('--max-queue', type=int, default=10_000)
+	args = parser.parse_args()
+	raise_open_files_limit(2 * args.clients + 100)
+
+	with tempfile.TemporaryDirectory() as folder:
+		stocks = {}
+		bars = {}
+		for i in range(args.tickers):
+			# the history is written to a file and loaded, the bars after it are published
+			data = make_ohlcv(args.rows + args.bars, seed=i)
+			filepath = os.path.join(folder, f'T{i}.csv')
+			data.iloc[:args.rows].to_csv(filepath)
+			stocks[f'T{i}'] = StockData(filepath, cache=False)
+			bars[f'T{i}'] = data.iloc[args.rows:]
+		(latencies, counts, published, seconds) = asyncio.run(run(args, stocks, bars))
+
+	received = counts.get('bar', 0) + counts.get('signal', 0)
+	latencies = np.array(latencies) * 1000
+	print(f"{args.clients:,} clients, {args.tickers:,} tickers, {args.bars:,} bars per ticker every {args.interval * 1000:g} ms")
+	print(f"messages: {received:,} of {published:,} received ({counts.get('bar', 0):,} bars, {counts.get('signal', 0):,} signals)"
+	      f" in {seconds:.2f} s, {received / seconds:,.0f} per second")
+	print(f"slow clients disconnected: {counts.get('error', 0):,}")
+	if len(latencies):
+		(p50, p90, p99) = np.percentile(latencies, [50, 90, 99])
+		print(f"latency (ms): p50 {p50:.2f}  p90 {p90:.2f}  p99 {p99:.2f}  max {latencies.max():.2f}")
+
+if __name__ == "__main__":
+	main()
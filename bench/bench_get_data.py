@@ -0,0 +1,61 @@
+"""
+times repeated date range queries followed by the conversion of the selected
+dates to matplotlib date numbers, comparing the previous approach (string index,
+slicing by label, strptime + date2num per redraw) against StockData.get_data
+
+usage: python bench/bench_get_data.py [--rows N] [--queries N]
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import matplotlib.dates as mdates
+
+from synthetic import write_csv
+from stock_data import StockData
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--rows', type=int, default=1_000_000)
+	parser.add_argument('--queries', type=int, default=100)
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as folder:
+		stock_data = StockData(write_csv(os.path.join(folder, 'bench.csv'), args.rows))
+
+	# the previous layout: the index kept as the date strings of the .csv
+	old = stock_data.data.copy()
+	old.index = old.index.strftime(DATE_FORMAT)
+
+	rng = np.random.default_rng(0)
+	bounds = np.sort(rng.choice(stock_data.data.index.to_numpy(), size=(args.queries, 2)), axis=1)
+	ranges = [(str(start), str(end)) for (start, end) in bounds.astype('datetime64[s]')]
+	old_ranges = [(start.replace('T', ' '), end.replace('T', ' ')) for (start, end) in ranges]
+
+	start = time.perf_counter()
+	rows = 0
+	for (start_date, end_date) in old_ranges:
+		selected = old[start_date:end_date]
+		x_data = mdates.date2num([datetime.strptime(date, DATE_FORMAT) for date in selected.index.values])
+		rows += len(x_data)
+	old_time = time.perf_counter() - start
+
+	start = time.perf_counter()
+	new_rows = 0
+	for (start_date, end_date) in ranges:
+		stock_data.get_data(start_date, end_date)
+		new_rows += len(stock_data.selected_date_nums)
+	new_time = time.perf_counter() - start
+	assert rows == new_rows
+
+	print(f"{args.queries} queries on {args.rows:,} rows, {rows / args.queries:,.0f} rows selected on average")
+	print(f"{'string index + strptime':>25}: {old_time / args.queries * 1000:10.3f} ms/query")
+	print(f"{'get_data (searchsorted)':>25}: {new_time / args.queries * 1000:10.3f} ms/query")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,43 @@
+"""
+compares the time StockData takes to load a .csv file by parsing it
+against loading the same data from its binary sidecar cache
+
+usage: python bench/bench_load.py [rows ...] [--repeat N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from synthetic import write_csv
+from stock_data import StockData
+
+def best_of(repeat, function):
+	"""
+	returns the fastest wall time in seconds of calling function repeat times
+	"""
+	times = []
+	for _ in range(repeat):
+		start = time.perf_counter()
+		function()
+		times.append(time.perf_counter() - start)
+	return min(times)
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('rows', nargs='*', type=int, default=[10_000, 1_000_000, 10_000_000])
+	parser.add_argument('--repeat', type=int, default=3)
+	args = parser.parse_args()
+
+	print(f"{'rows':>12} {'csv (s)':>10} {'build (s)':>10} {'cache (s)':>10} {'speedup':>8}")
+	with tempfile.TemporaryDirectory() as folder:
+		for rows in args.rows:
+			filepath = write_csv(os.path.join(folder, f'{rows}.csv'), rows)
+
+			csv = best_of(args.repeat, lambda: StockData(filepath, cache=False))
+			build = best_of(1, lambda: StockData(filepath))
+			cache = best_of(args.repeat, lambda: StockData(filepath))
+			print(f"{rows:>12,} {csv:>10.3f} {build:>10.3f} {cache:>10.3f} {csv / cache:>7.1f}x")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,81 @@
+"""
+compares StockData backed by a DataFrame (backing='frame') against StockData
+backed by a PriceSeries of plain numpy arrays (backing='series'): the memory
+of the loaded data and the latency of loading it from the binary cache,
+check_data, get_data, get_column, the SMAs and their crossover
+
+usage: python bench/bench_price_series.py [rows ...] [--repeat N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from synthetic import write_csv
+from stock_data import StockData, IndicatorCache
+
+def best_of(repeat, function, setup=None):
+	"""
+	returns the fastest wall time in seconds of calling function repeat times,
+	calling setup (untimed) before each call
+	"""
+	times = []
+	for _ in range(repeat):
+		if setup is not None: setup()
+		start = time.perf_counter()
+		function()
+		times.append(time.perf_counter() - start)
+	return min(times)
+
+def measure(filepath, backing, repeat):
+	"""
+	returns {case: seconds} and the bytes of the loaded data of one backing
+	"""
+	stock_data = StockData(filepath, backing=backing)
+	nbytes = stock_data._series.nbytes if backing == 'series' else int(stock_data.data.memory_usage(deep=True).sum())
+
+	# queries of about a month, spread over the whole history
+	dates = stock_data._index()
+	rng = np.random.default_rng(0)
+	starts = rng.integers(0, max(len(dates) - 21, 1), 100)
+	ranges = [(dates[i], dates[min(i + 20, len(dates) - 1)]) for i in starts]
+
+	def queries():
+		for (start_date, end_date) in ranges: stock_data.get_data(start_date, end_date)
+	def columns():
+		for _ in range(100): stock_data.get_column('Close', selected=True)
+	def fresh_cache():
+		stock_data.indicators = IndicatorCache()
+		stock_data.drop_indicators()
+
+	times = {'load (cache)': best_of(repeat, lambda: StockData(filepath, backing=backing)),
+	         'check_data': best_of(repeat, stock_data.check_data),
+	         'get_data': best_of(repeat, queries) / len(ranges),
+	         'get_column': best_of(repeat, columns) / 100,
+	         'SMA15 + SMA50': best_of(repeat, lambda: stock_data._calculate_SMA(15)._calculate_SMA(50), fresh_cache)}
+	times['crossover'] = best_of(repeat, lambda: stock_data._calculate_crossover('SMA15', 'SMA50', 'SMA15'))
+	assert backing == 'frame' or stock_data._frame is None
+	return (times, nbytes)
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('rows', nargs='*', type=int, default=[1_000, 10_000, 100_000, 1_000_000])
+	parser.add_argument('--repeat', type=int, default=5)
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as folder:
+		for rows in args.rows:
+			filepath = write_csv(os.path.join(folder, f'{rows}.csv'), rows)
+			StockData(filepath)
+			(frame, frame_bytes) = measure(filepath, 'frame', args.repeat)
+			(series, series_bytes) = measure(filepath, 'series', args.repeat)
+
+			print(f"{rows:,} rows: {frame_bytes / 1024:,.0f} KiB as a DataFrame, {series_bytes / 1024:,.0f} KiB as a PriceSeries")
+			print(f"{'':>16} {'frame':>12} {'series':>12} {'speedup':>8}")
+			for case in frame:
+				print(f"{case:>16} {frame[case] * 1e6:>10.1f}us {series[case] * 1e6:>10.1f}us {frame[case] / series[case]:>7.1f}x")
+
+if __name__ == "__main__":
+	main()
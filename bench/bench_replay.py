@@ -0,0 +1,50 @@
+"""
+times replaying synthetic stock data through the SMA crossover bar by bar
+(Replay.bars) and in vectorized batches (Replay.events), and checks both give
+the same Buy/Sell as StockData._calculate_crossover
+
+usage: python bench/bench_replay.py [rows ...] [--SMA1 N] [--SMA2 N] [--batch N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from synthetic import write_csv
+from replay import Replay
+from stock_data import StockData
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('rows', nargs='*', type=int, default=[100_000, 1_000_000, 10_000_000])
+	parser.add_argument('--SMA1', type=int, default=15)
+	parser.add_argument('--SMA2', type=int, default=50)
+	parser.add_argument('--batch', type=int, default=65_536)
+	args = parser.parse_args()
+
+	print(f"{'rows':>12} {'events':>8} {'bars (M/s)':>11} {'events (M/s)':>13} {'same':>5}")
+	with tempfile.TemporaryDirectory() as folder:
+		for rows in args.rows:
+			stock_data = StockData(write_csv(os.path.join(folder, f'{rows}.csv'), rows), cache=False)
+			stock_data._calculate_SMA(args.SMA1)._calculate_SMA(args.SMA2)
+			stock_data._calculate_crossover(f'SMA{args.SMA1}', f'SMA{args.SMA2}', 'Close')
+			expected = {(int(i), side) for side in ('Buy', 'Sell')
+			            for i in np.flatnonzero(~np.isnan(stock_data.get_column(side).to_numpy()))}
+
+			replay = Replay(stock_data, args.SMA1, args.SMA2)
+			start = time.perf_counter()
+			bars = {(bar.position, bar.signal) for bar in replay.bars() if bar.signal}
+			bars_seconds = time.perf_counter() - start
+
+			replay.reset()
+			start = time.perf_counter()
+			events = {(event.position, event.side) for event in replay.events(batch=args.batch)}
+			events_seconds = time.perf_counter() - start
+
+			same = 'yes' if bars == events == expected else 'NO'
+			print(f"{rows:>12,} {len(events):>8,} {rows / bars_seconds / 1e6:>11.2f} {rows / events_seconds / 1e6:>13.2f} {same:>5}")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,51 @@
+"""
+times screening a universe of synthetic stock data .csv files for fresh SMA crossovers
+with Screener, which reads only the tail of every file, against loading every file as
+StockData and calculating its SMAs and crossover (timed on the first --naive files)
+
+usage: python bench/bench_screener.py [--files N] [--rows N] [--days N] [--naive N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from synthetic import make_ohlcv
+from screener import Screener
+from stock_data import StockData
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--files', type=int, default=5000)
+	parser.add_argument('--rows', type=int, default=2000, help="bars of every file")
+	parser.add_argument('--days', type=int, default=5)
+	parser.add_argument('--naive', type=int, default=100, help="amount of files to time the StockData way on")
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as folder:
+		data = make_ohlcv(args.rows * 2)
+		for i in range(args.files):
+			# every file is a different stretch of one random walk, so the crossovers differ
+			start = (i * 37) % args.rows
+			data.iloc[start:start + args.rows].to_csv(os.path.join(folder, f'T{i:05}.csv'))
+
+		start = time.perf_counter()
+		screener = Screener(folder, 15, 50, args.days)
+		load = time.perf_counter() - start
+		start = time.perf_counter()
+		crossovers = screener.crossovers()
+		screen = time.perf_counter() - start
+
+		filepaths = sorted(os.listdir(folder))[:args.naive]
+		start = time.perf_counter()
+		for filepath in filepaths:
+			stock_data = StockData(os.path.join(folder, filepath), cache=False)
+			stock_data._calculate_SMA(15)._calculate_SMA(50)._calculate_crossover('SMA15', 'SMA50', 'Close')
+		naive = (time.perf_counter() - start) / len(filepaths) * args.files
+
+	print(f"{args.files:,} files of {args.rows:,} rows, {len(crossovers):,} crossovers in the last {args.days} bars")
+	print(f"screener: {load:.2f} s reading tails, {screen * 1000:.1f} ms screening")
+	print(f"StockData: {naive:.2f} s (estimated from {len(filepaths):,} files), {naive / (load + screen):.0f}x slower")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,89 @@
+"""
+measures the startup of the GUI: the import time of app.py and stock_data.py
+as reported by python -X importtime (with the heaviest modules they pull in),
+and the wall time from launching python until the window is shown and until
+its matplotlib canvas is ready. every run starts a fresh python process
+
+usage: python bench/bench_startup.py [--repeat N] [--top N]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC = str(Path(__file__).resolve().parents[1] / 'src')
+
+# run in a fresh process: prints when the window is shown and when the canvas is ready
+LAUNCH = f"""
+import sys, time
+sys.path.insert(0, {SRC!r})
+from PyQt5 import QtWidgets as qtw
+application = qtw.QApplication([])
+import app
+main = app.Main()
+main.show()
+print('shown', time.time())
+while not hasattr(main, 'canvas'): application.processEvents()
+main.canvas.draw()
+print('canvas', time.time())
+"""
+
+def import_times(module):
+	"""
+	imports module in a fresh process with -X importtime
+
+	Returns
+	(total, modules) : (float, [(float, str), ...])
+		the cumulative import time of module in seconds, and the cumulative time
+		of every module it imports directly or indirectly
+	"""
+	output = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+	                        cwd=SRC, capture_output=True, text=True, check=True).stderr
+	modules = []
+	for line in output.splitlines():
+		if not line.startswith('import time:') or 'cumulative' in line: continue
+		(_, cumulative, name) = line[len('import time:'):].split('|')
+		modules.append((int(cumulative) / 1e6, name.rstrip()))
+	total = next(seconds for (seconds, name) in reversed(modules) if name.strip() == module)
+	return (total, modules)
+
+def launch_times(env):
+	"""
+	launches the GUI in a fresh process
+
+	Returns
+	(shown, canvas) : (float, float)
+		seconds from launching python until the window is shown and until the canvas is drawn
+	"""
+	start = time.time()
+	output = subprocess.run([sys.executable, '-c', LAUNCH], cwd=SRC, env=env,
+	                        capture_output=True, text=True, check=True).stdout
+	events = dict(line.split() for line in output.splitlines() if line.startswith(('shown', 'canvas')))
+	return (float(events['shown']) - start, float(events['canvas']) - start)
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--repeat', type=int, default=5)
+	parser.add_argument('--top', type=int, default=8)
+	args = parser.parse_args()
+
+	# without a display the window is shown on Qt's offscreen platform
+	env = dict(os.environ)
+	if sys.platform.startswith('linux') and not env.get('DISPLAY') and not env.get('WAYLAND_DISPLAY'):
+		env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+	for module in ('app', 'stock_data'):
+		runs = [import_times(module) for _ in range(args.repeat)]
+		(total, modules) = min(runs, key=lambda run: run[0])
+		print(f"import {module}: {total * 1000:.0f} ms, heaviest imports:")
+		for (seconds, name) in sorted(modules, reverse=True)[1:args.top + 1]:
+			print(f"    {seconds * 1000:8.1f} ms {name.strip()}")
+
+	runs = [launch_times(env) for _ in range(args.repeat)]
+	print(f"window shown after {min(shown for (shown, canvas) in runs) * 1000:.0f} ms, "
+	      f"canvas ready after {min(canvas for (shown, canvas) in runs) * 1000:.0f} ms (best of {args.repeat})")
+
+if __name__ == "__main__":
+	main()
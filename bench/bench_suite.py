@@ -0,0 +1,189 @@
+"""
+times the hot paths of StockData on seeded synthetic data of every size and writes
+the results to a JSON report. given the report of an earlier run (e.g. of the main
+branch) with --compare, every case that got slower by more than --threshold is
+listed and the exit status is 1, so a regression is caught before it is merged
+
+cases:
+    init           StockData(filepath) parsing the .csv, including check_data
+    init_cached    StockData(filepath) from the binary cache, including check_data
+    check_data     check_data on data with 1% of the values missing
+    get_data       get_data of a random date range, with its matplotlib date numbers
+    _calculate_SMA     SMA15 and SMA50 as the GUI calculates them
+    calculate_SMA      SMA15 and SMA50 with the public method
+    _calculate_SMA_cached  the same SMAs again, answered by the IndicatorCache
+    _calculate_crossover   Buy/Sell of SMA15 and SMA50 as the GUI calculates them
+    calculate_crossover    Buy/Sell of SMA15 and SMA50 with the public method
+    plot_graph     plot_graph of Close, both SMAs and Buy/Sell, drawn on the Agg backend
+
+usage: python bench/bench_suite.py [--rows N ...] [--repeat N] [--output report.json]
+                                   [--compare baseline.json] [--threshold 1.25]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from synthetic import write_csv
+from stock_data import StockData, IndicatorCache
+
+def measure(function, setup=None, repeat=5):
+	"""
+	times function repeat times, calling setup (untimed) before each call
+
+	Returns
+	times : [float, ...]
+		wall times in seconds
+	"""
+	times = []
+	for _ in range(repeat):
+		if setup is not None: setup()
+		start = time.perf_counter()
+		function()
+		times.append(time.perf_counter() - start)
+	return times
+
+def cases(filepath, rows, seed):
+	"""
+	yields (case, setup, function) of every case on the .csv file of rows rows, see __doc__
+	"""
+	stock_data = StockData(filepath)
+	yield ('init', None, lambda: StockData(filepath, cache=False))
+	yield ('init_cached', None, lambda: StockData(filepath))
+
+	# 1% of the values of every price column missing
+	clean = stock_data.data
+	rng = np.random.default_rng(seed)
+	holes = clean.copy()
+	for col in ('Open', 'High', 'Low', 'Close', 'Adj Close'):
+		holes[col] = holes[col].to_numpy().copy()
+		holes.iloc[rng.choice(rows, rows // 100, replace=False), holes.columns.get_loc(col)] = np.nan
+
+	def reset(data):
+		def setup(): stock_data.data = data.copy()
+		return setup
+	yield ('check_data', reset(holes), stock_data.check_data)
+
+	dates = clean.index.to_numpy()
+	bounds = np.sort(rng.choice(dates, size=2))
+	yield ('get_data', reset(clean), lambda: stock_data.get_data(bounds[0], bounds[1]))
+
+	def fresh_cache():
+		reset(clean)()
+		stock_data.indicators = IndicatorCache()
+	def both_SMAs(calculate):
+		return lambda: (calculate(15), calculate(50))
+	yield ('_calculate_SMA', fresh_cache, both_SMAs(stock_data._calculate_SMA))
+	yield ('calculate_SMA', fresh_cache, both_SMAs(stock_data.calculate_SMA))
+
+	def dropped_SMAs():
+		reset(clean)()
+		stock_data._calculate_SMA(15)._calculate_SMA(50)
+		stock_data.drop_indicators()
+	yield ('_calculate_SMA_cached', dropped_SMAs, both_SMAs(stock_data._calculate_SMA))
+
+	def with_SMAs():
+		reset(clean)()
+		stock_data._calculate_SMA(15)._calculate_SMA(50)
+	yield ('_calculate_crossover', with_SMAs, lambda: stock_data._calculate_crossover('SMA15', 'SMA50', 'SMA15'))
+	yield ('calculate_crossover', with_SMAs, lambda: stock_data.calculate_crossover('SMA15', 'SMA50'))
+
+	(figure, ax) = plt.subplots(figsize=(10, 5), dpi=100)
+	def cleared_axes():
+		with_SMAs()
+		stock_data._calculate_crossover('SMA15', 'SMA50', 'SMA15')
+		ax.cla()
+	def plot():
+		stock_data.plot_graph(['Close', 'SMA15', 'SMA50', 'Sell', 'Buy'], ['k-', 'b-', 'm-', 'rv', 'g^'], ax, show=False)
+		figure.canvas.draw()
+	yield ('plot_graph', cleared_axes, plot)
+	plt.close(figure)
+
+def environment():
+	"""
+	returns what the results depend on besides the code: versions, machine and commit
+	"""
+	try:
+		commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+		                        cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+	except OSError:
+		commit = None
+	return {'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+	        'commit': commit,
+	        'python': platform.python_version(),
+	        'numpy': np.__version__,
+	        'pandas': pd.__version__,
+	        'matplotlib': matplotlib.__version__,
+	        'machine': platform.machine(),
+	        'system': platform.system(),
+	        'cpus': os.cpu_count()}
+
+def compare(results, baseline, threshold):
+	"""
+	prints the ratio of every case to the same case of the baseline report
+
+	Returns
+	regressions : [str, ...]
+		the cases whose best time exceeds the baseline's by more than threshold times
+	"""
+	previous = {(result['case'], result['rows']): result['min'] for result in baseline['results']}
+	regressions = []
+	print(f"\n{'case':>22} {'rows':>12} {'baseline':>10} {'now':>10} {'ratio':>7}")
+	for result in results:
+		key = (result['case'], result['rows'])
+		if key not in previous: continue
+		ratio = result['min'] / previous[key]
+		flag = ' REGRESSION' if ratio > threshold else ''
+		if flag: regressions.append(f"{key[0]} @ {key[1]:,} rows")
+		print(f"{key[0]:>22} {key[1]:>12,} {previous[key] * 1000:>9.2f}ms {result['min'] * 1000:>9.2f}ms {ratio:>6.2f}x{flag}")
+	return regressions
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--rows', nargs='+', type=int, default=[1_000, 100_000, 1_000_000, 10_000_000])
+	parser.add_argument('--repeat', type=int, default=5)
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--output', default='bench_report.json')
+	parser.add_argument('--compare', default=None)
+	parser.add_argument('--threshold', type=float, default=1.25)
+	args = parser.parse_args()
+
+	results = []
+	print(f"{'case':>22} {'rows':>12} {'min':>10} {'median':>10}")
+	with tempfile.TemporaryDirectory() as folder:
+		for rows in args.rows:
+			filepath = write_csv(os.path.join(folder, f'{rows}.csv'), rows, seed=args.seed)
+			# 10M rows take long enough per call that two repeats are enough
+			repeat = args.repeat if rows < 10_000_000 else min(args.repeat, 2)
+			for (case, setup, function) in cases(filepath, rows, args.seed):
+				times = measure(function, setup, repeat)
+				results.append({'case': case, 'rows': rows, 'repeat': repeat,
+				                'min': min(times), 'median': statistics.median(times)})
+				print(f"{case:>22} {rows:>12,} {min(times) * 1000:>9.2f}ms {statistics.median(times) * 1000:>9.2f}ms")
+			os.remove(filepath)
+
+	with open(args.output, 'w') as file:
+		json.dump({'environment': environment(), 'results': results}, file, indent=1)
+	print(f"report written to {args.output}")
+
+	if args.compare is not None:
+		with open(args.compare) as file: baseline = json.load(file)
+		regressions = compare(results, baseline, args.threshold)
+		if regressions:
+			print(f"{len(regressions)} regression(s) over {args.threshold:.2f}x: {', '.join(regressions)}")
+			sys.exit(1)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,42 @@
+"""
+measures how many stock data .csv files per second StockUniverse loads
+one after another, with a thread pool and with a process pool,
+both parsing the .csv files and reading their binary caches
+
+usage: python bench/bench_universe.py [--files N] [--rows N] [--workers N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from synthetic import write_csv
+from stock_universe import StockUniverse
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument('--files', type=int, default=1000)
+	parser.add_argument('--rows', type=int, default=2500)
+	parser.add_argument('--workers', type=int, default=None)
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as folder:
+		for i in range(args.files):
+			write_csv(os.path.join(folder, f'T{i:05d}.csv'), args.rows, seed=i)
+
+		print(f"{args.files:,} files of {args.rows:,} rows")
+		for cache in (False, True):
+			# builds the binary caches first so only reading them is measured
+			if cache: StockUniverse(folder)
+			for (name, workers, processes) in (('sequential', 1, False),
+			                                   ('threads', args.workers, False),
+			                                   ('processes', args.workers, True)):
+				start = time.perf_counter()
+				universe = StockUniverse(folder, max_workers=workers, processes=processes, cache=cache)
+				elapsed = time.perf_counter() - start
+				assert len(universe) == args.files, universe.failures
+				source = 'cache' if cache else 'csv'
+				print(f"{source:>6} {name:>11}: {args.files / elapsed:10,.0f} files/s")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,58 @@
+"""
+seeded synthetic stock data in the same layout as the yahoo stock data (.csv),
+shared by the benchmark scripts so every run measures the same data
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# lets the benchmark scripts import the application modules from src/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+def make_ohlcv(rows, seed=0, start='2000-01-03', freq=None):
+	"""
+	generates a random walk of daily (or minute) bars
+
+	Parameters
+	rows : int
+		the amount of bars to generate
+	seed : int (0)
+		seed of the random generator, the same seed always gives the same data
+	start : str ('2000-01-03')
+		date of the first bar
+	freq : str (None)
+		pandas frequency of the bars, defaults to business days for up to 50,000 rows
+		and minutes above that (business days would run past the year 2262)
+
+	Returns
+	data : DataFrame
+		indexed by 'Date' with columns Open, High, Low, Close, Adj Close and Volume
+	"""
+	if freq is None: freq = 'B' if rows <= 50_000 else 'min'
+	rng = np.random.default_rng(seed)
+
+	close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+	open_ = close * np.exp(rng.normal(0, 0.002, rows))
+	high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, rows))
+	low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, rows))
+	volume = rng.integers(100_000, 5_000_000, rows)
+
+	index = pd.date_range(start, periods=rows, freq=freq, name='Date')
+	return pd.DataFrame({'Open': open_,
+	                     'High': high,
+	                     'Low': low,
+	                     'Close': close,
+	                     'Adj Close': close,
+	                     'Volume': volume}, index=index)
+
+def write_csv(filepath, rows, seed=0, **kwargs):
+	"""
+	writes synthetic stock data to a .csv file with yahoo's 6 decimal places
+
+	Returns
+	filepath : str
+	"""
+	make_ohlcv(rows, seed, **kwargs).to_csv(filepath, float_format='%.6f')
+	return filepath
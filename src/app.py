@@ -1,17 +1,194 @@
+import argparse
 import sys
 from pathlib import Path
 from datetime import datetime
 
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
-
 from PyQt5 import QtCore as qtc
+from PyQt5 import QtGui as qtg
 from PyQt5 import QtWidgets as qtw
 
 from main_window import Ui_Form
-from stock_data import StockData
+from profiler import PROFILER
+
+# numpy, pandas and matplotlib (and the modules using them) are imported where they are
+# first needed instead of here, so the window shows before they are loaded, see setup_canvas
+
+# the choices of the chart type and timeframe combo boxes, and the StockData timeframe of each
+CHARTS = ['Line', 'Candlestick']
+TIMEFRAMES = {'Daily': 'D', 'Weekly': 'W', 'Monthly': 'M'}
+
+class Cancelled(Exception):
+	"""
+	raised inside a Worker's function when the worker has been cancelled
+	"""
+
+class WorkerSignals(qtc.QObject):
+	"""
+	signals a Worker uses to hand its progress and result back to the GUI thread
+	(QRunnable is not a QObject, so it cannot have signals itself)
+	"""
+	progress = qtc.pyqtSignal(int)
+	result = qtc.pyqtSignal(object)
+	error = qtc.pyqtSignal(object)
+	finished = qtc.pyqtSignal()
+
+class Worker(qtc.QRunnable):
+	"""
+	runs a function on a QThreadPool thread so the GUI stays responsive,
+	the function receives the worker as its first argument to report progress
+	and to stop early once the worker is cancelled
+
+	Attributes
+	.signals : WorkerSignals
+		emits progress (0-100), the result or the raised exception, then finished
+	.cancelled : bool
+		True once cancel() has been called, the result of a cancelled worker is never emitted
+	"""
+	def __init__(self, function, *args):
+		super().__init__()
+		self.function = function
+		self.args = args
+		self.signals = WorkerSignals()
+		self.cancelled = False
+
+	def cancel(self):
+		"""
+		asks the worker to stop at its next check()
+		"""
+		self.cancelled = True
+
+	def check(self, percent):
+		"""
+		reports progress, called by the function between its stages
+
+		Parameters
+		percent : int
+			how much of the work is done, from 0 to 100
+
+		Raises
+		Cancelled :
+			the worker has been cancelled
+		"""
+		if self.cancelled: raise Cancelled()
+		self.signals.progress.emit(percent)
+
+	@qtc.pyqtSlot()
+	def run(self):
+		try:
+			self.check(0)
+			result = self.function(self, *self.args)
+			self.check(100)
+		except Cancelled:
+			pass
+		except Exception as e:
+			self.signals.error.emit(e)
+		else:
+			self.signals.result.emit(result)
+		finally:
+			self.signals.finished.emit()
+
+def load_stock_data(worker, filepath):
+	"""
+	runs in a Worker: loads the stock data .csv file
+
+	Returns
+	(stock_data, start_date, end_date) : (StockData, str, str)
+	"""
+	from stock_data import StockData
+
+	stock_data = StockData(filepath)
+	worker.check(90)
+	start_date, end_date = stock_data.get_period()
+	return (stock_data, start_date, end_date)
+
+def indicator_name(text):
+	"""
+	returns the column head title of the indicator typed into an SMA box:
+	a bare window (e.g. 15) is an SMA, anything else the name of a registered
+	indicator (e.g. EMA20, WMA10, BB20, RSI14 or MACD12-26-9, see indicators.py)
+
+	Raises
+	UnknownIndicator (ValueError) :
+		text is not a window nor a registered indicator
+	"""
+	import indicators
+
+	text = text.strip()
+	return f"SMA{int(text)}" if text.isdigit() else indicators.canonical(text)
+
+def calculate_plot_data(worker, stock_data, start_date, end_date, SMA1, SMA2, chart='Line', timeframe='D'):
+	"""
+	runs in a Worker: calculates the checked indicators and their crossover (dropping the
+	columns of unticked ones), then selects the data to plot. the selected values are
+	copied into a level-of-detail series each (see decimate.py), so the GUI thread
+	can plot them while the next worker is already changing stock_data.
+	oscillators (e.g. RSI, MACD) are not plotted over the prices, only their
+	crossovers are, on the Close line
+
+	Parameters
+	SMA1 : str
+		indicator of the SMA1 box (e.g. 'SMA15' or 'EMA20'), None if its checkbox is not ticked
+	SMA2 : str
+		indicator of the SMA2 box (e.g. 'SMA50' or 'MACD12-26-9.signal'), None if its checkbox is not ticked
+	chart : str ('Line')
+		'Line' plots Close as a line, 'Candlestick' plots the OHLC bars and their volume instead
+	timeframe : str ('D')
+		the timeframe of the Close line or the bars, see StockData.resample,
+		the SMAs and their crossover stay daily
+
+	Returns
+	(column_headers, formats, series, bars) : ([str, ...], [str, ...], {str: LODPyramid or ExactPoints}, tuple)
+		series only contains the column headers whose data exists, bars is
+		(x, open, high, low, close, volume) to draw as candlesticks (volume is None
+		if the data has none) or None for a line chart
+	"""
+	from decimate import make_series
+	import indicators
+
+	# drops the indicators that are no longer ticked, they come back from stock_data.indicators
+	keep = [name for name in (SMA1, SMA2) if name is not None]
+	stock_data.drop_indicators(keep + ['Buy', 'Sell'] if len(keep) == 2 else keep)
+
+	# builds a list of graphs to plot by checking the tickboxes
+	column_headers = [] if chart == 'Candlestick' else ['Close']
+	formats = [] if chart == 'Candlestick' else ['k-']
+
+	for (name, fmt, progress) in ((SMA1, 'b-', 30), (SMA2, 'm-', 60)):
+		if name is not None:
+			stock_data.calculate_indicator(name)
+			if indicators.is_overlay(name):
+				# the other outputs, e.g. the Bollinger bands, are dotted
+				for col_head in indicators.outputs(name):
+					column_headers.append(col_head)
+					formats.append(fmt if col_head == name else fmt[0] + ':')
+		worker.check(progress)
+	if SMA1 is not None and SMA2 is not None:
+		stock_data._calculate_crossover(SMA1, SMA2, SMA1 if indicators.is_overlay(SMA1) else 'Close')
+		column_headers.append('Sell')
+		formats.append('rv')
+		column_headers.append('Buy')
+		formats.append('g^')
+	worker.check(80)
+
+	selected_stock_data = stock_data.get_data(start_date, end_date)
+	assert not selected_stock_data.empty
+	x_data = stock_data.selected_date_nums
+	with PROFILER.stage('make_series') as stage:
+		series = {col: make_series(x_data, stock_data.get_column(col, selected=True).to_numpy(copy=True), fmt)
+		          for (col, fmt) in zip(column_headers, formats) if stock_data.has_column(col)}
+		stage.rows = len(x_data) * len(series)
+	worker.check(90)
+
+	# the resampled bars are cached by stock_data, switching timeframe back and forth is cheap
+	bars = None
+	if chart == 'Candlestick' or timeframe != 'D':
+		(selected_bars, x_bars) = stock_data.get_bars(start_date, end_date, timeframe)
+		assert not selected_bars.empty
+		if chart == 'Candlestick':
+			bars = (x_bars,) + tuple(selected_bars[col].to_numpy(dtype=float, copy=True) for col in ('Open', 'High', 'Low', 'Close'))
+			bars += (selected_bars['Volume'].to_numpy(dtype=float, copy=True) if 'Volume' in selected_bars else None,)
+		else: series['Close'] = make_series(x_bars, selected_bars['Close'].to_numpy(copy=True), 'k-')
+	return (column_headers, formats, series, bars)
 
 class Main(qtw.QWidget, Ui_Form):
 	"""
@@ -26,6 +203,18 @@ class Main(qtw.QWidget, Ui_Form):
 		matplotlib FigureCanvas is the area onto which the figure is drawn
 	.toolbar : NavigationToolbar
 		matplotlib NavigationToolbar is the UI that users can use to interact with the drawn plot
+	.lines : {str: (str, Line2D)}
+		the format and the matplotlib Line2D of every plotted column, reused by every redraw
+	.series : {str: LODPyramid or ExactPoints}
+		the data of every plotted column, decimated to the visible range whenever it changes
+	.volume_ax : Axes
+		matplotlib Axes object sharing the x axis of .ax, on which the volume bars are drawn
+	.bars : [Collection, ...]
+		the matplotlib collections of the candlesticks and volume bars, replaced by every redraw
+	.legend : Legend
+		matplotlib Legend of the plotted lines, replaced whenever the lines change
+	.background : BufferRegion
+		the canvas without the animated lines and legend, captured after every full draw
 	.canvasLayout : QVBoxLayout
 		PyQt5's object used to demark the location and contain the FigureCanvas and NavigationToolbar
 	.loadCSVButton : QPushButton
@@ -50,10 +239,26 @@ class Main(qtw.QWidget, Ui_Form):
 		PyQt5's object used to create a box into which user can input end date (YYYY-MM-DD)
 	.SMA1Edit : QLineEdit
 		PyQt5's object used to create a box into which user can input SMA1 window value (e.g. 15)
+		or the name of another indicator (e.g. EMA20), see indicator_name
 	.SMA2Edit : QLineEdit
 		PyQt5's object used to create a box into which user can input SMA2 window value (e.g. 50)
+		or the name of another indicator (e.g. MACD12-26-9.signal), see indicator_name
 	.periodEdit : QLineEdit
 		PyQt5's object used to create a box which user can use to see the period used for the graph
+	.progressBar : QProgressBar
+		PyQt5's object showing the progress of loading or calculating in the background
+	.threadpool : QThreadPool
+		PyQt5's object running the Workers, one at a time so they never change StockData together
+	.workers : {str: Worker}
+		the latest 'load' and 'update' Worker, results of older workers are dropped
+	.updateTimer : QTimer
+		PyQt5's object coalescing quick checkbox changes into a single update
+	.chartCombo : QComboBox
+		PyQt5's object that user can use to choose between a line and a candlestick chart
+	.timeframeCombo : QComboBox
+		PyQt5's object that user can use to choose between daily, weekly and monthly bars
+	.profiled : int
+		the amount of profiled stages already reported, see report_profile
 	"""
 	def __init__(self):
 		"""
@@ -63,14 +268,36 @@ class Main(qtw.QWidget, Ui_Form):
 		self.setupUi(self)
 		self.setWindowTitle("Stock Chart & Moving Average Application")
 
-		# sets up figure to plot on, instantiates canvas and toolbar
-		self.figure, self.ax = plt.subplots()
-		self.canvas = FigureCanvas(self.figure)
-		self.toolbar = NavigationToolbar(self.canvas, self)
+		self.date_format = '%Y-%m-%d'
 
-		# attaches the toolbar and canvas to the canvas layout
-		self.canvasLayout.addWidget(self.toolbar)
-		self.canvasLayout.addWidget(self.canvas)
+		# chart type and timeframe choices above the toolbar
+		self.chartCombo = qtw.QComboBox()
+		self.chartCombo.addItems(CHARTS)
+		self.timeframeCombo = qtw.QComboBox()
+		self.timeframeCombo.addItems(list(TIMEFRAMES))
+		chartLayout = qtw.QHBoxLayout()
+		chartLayout.addWidget(self.chartCombo)
+		chartLayout.addWidget(self.timeframeCombo)
+		chartLayout.addStretch()
+		self.canvasLayout.addLayout(chartLayout)
+
+		# shows the progress of the background work under the canvas
+		self.progressBar = qtw.QProgressBar()
+		self.progressBar.setMaximumHeight(15)
+		self.progressBar.setTextVisible(False)
+		self.canvasLayout.addWidget(self.progressBar)
+
+		# loading and calculating run in the background, one worker at a time
+		self.threadpool = qtc.QThreadPool()
+		self.threadpool.setMaxThreadCount(1)
+		self.workers = {'load': None, 'update': None}
+		self.profiled = 0
+
+		# checkbox changes within this interval only trigger one update
+		self.updateTimer = qtc.QTimer(self)
+		self.updateTimer.setSingleShot(True)
+		self.updateTimer.setInterval(150)
+		self.updateTimer.timeout.connect(self.update_canvas)
 
 		# sets up a scroll area to display GUI statuses
 		self.scrollWidget = qtw.QWidget()
@@ -81,56 +308,101 @@ class Main(qtw.QWidget, Ui_Form):
 		# button & checkbox connections
 		self.loadCSVButton.clicked.connect(self.load_data)
 		self.updateWindowButton.clicked.connect(self.update_canvas)
-		self.SMA1Checkbox.stateChanged.connect(self.update_canvas)
-		self.SMA2Checkbox.stateChanged.connect(self.update_canvas)
+		self.SMA1Checkbox.stateChanged.connect(self.updateTimer.start)
+		self.SMA2Checkbox.stateChanged.connect(self.updateTimer.start)
+		self.chartCombo.currentIndexChanged.connect(self.updateTimer.start)
+		self.timeframeCombo.currentIndexChanged.connect(self.updateTimer.start)
+
+		# escape cancels whatever is running in the background
+		qtw.QShortcut(qtg.QKeySequence(qtc.Qt.Key_Escape), self, self.cancel_work)
 
 		# auto-complete feauture
 		self.filePathEdit.setText("../data/GOOG.csv")
 
+		# the figure is set up once the window shows, by the event loop
+		qtc.QTimer.singleShot(0, self.setup_canvas)
+
+	def setup_canvas(self):
+		"""
+		sets up the figure to plot on, instantiates the canvas and toolbar and attaches
+		them between the chart choices and the progress bar. matplotlib is imported here,
+		after the window is shown, because importing it takes longer than the rest of the startup
+		"""
+		from matplotlib.figure import Figure
+		from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+		from toolbar import Toolbar
+
+		self.figure = Figure()
+		self.ax = self.figure.subplots()
+		self.canvas = FigureCanvas(self.figure)
+		self.toolbar = Toolbar(self.canvas, self)
+		self.setup_axes()
+
+		index = self.canvasLayout.indexOf(self.progressBar)
+		self.canvasLayout.insertWidget(index, self.toolbar)
+		self.canvasLayout.insertWidget(index + 1, self.canvas)
+
 	def load_data(self):
 		"""
 		loads stock data .csv from inputted filepath string on the GUI
-		as StockData object, also autocompletes all inputs
+		as StockData object in the background, pending updates of the
+		previous data are cancelled. see on_data_loaded
+		"""
+		filepath = Path(self.filePathEdit.text())
+		self.updateTimer.stop()
+		if self.workers['update'] is not None: self.workers['update'].cancel()
+		self.start_worker('load', self.on_data_loaded, self.on_load_error, load_stock_data, filepath)
+		self.report(f"Loading data from {filepath}...")
+
+	def on_data_loaded(self, result):
+		"""
+		keeps the StockData loaded by load_data and autocompletes all inputs
 		using information provided by the csv.
 
+		Parameters
+		result : (StockData, str, str)
+			the loaded stock data and its first and last date
+		"""
+		self.stock_data, start_date, end_date = result
+		period = f"{start_date} to {end_date}"
+
+		# auto-complete feauture
+		self.startDateEdit.setText(start_date)
+		self.endDateEdit.setText(end_date)
+		self.periodEdit.setText(period)
+		self.SMA1Edit.setText("15")
+		self.SMA2Edit.setText("50")
+		self.SMA1Checkbox.setChecked(False)
+		self.SMA2Checkbox.setChecked(False)
+
+		self.report(f"Data loaded from {self.stock_data.filepath}; period auto-selected: {start_date} to {end_date}.")
+		self.report_profile()
+
+	def on_load_error(self, e):
+		"""
+		reports why load_data failed
+
 		Error handling
 			invalid filepath :
 				empty filepath or file could not be found.
 			invalid .csv :
 				.csv file is empty, missing date column, etc.
 		"""
-		filepath = Path(self.filePathEdit.text())
-
-		try:
-			self.stock_data = StockData(filepath)
-			start_date, end_date = self.stock_data.get_period()
-			period = f"{start_date} to {end_date}"
-
-			# auto-complete feauture
-			self.startDateEdit.setText(start_date)
-			self.endDateEdit.setText(end_date)
-			self.periodEdit.setText(period)
-			self.SMA1Edit.setText("15")
-			self.SMA2Edit.setText("50")
-			self.SMA1Checkbox.setChecked(False)
-			self.SMA2Checkbox.setChecked(False)
-
-			self.report(f"Data loaded from {filepath}; period auto-selected: {start_date} to {end_date}.")
-			print(self.stock_data.data)
-
-		except IOError as e:
+		if isinstance(e, IOError):
 			self.report(f"Filepath provided is invalid or fail to open .csv file. {e}")
-
-		except TypeError as e:
+		elif isinstance(e, (TypeError, IndexError)):
 			self.report(f"The return tuple is probably (nan, nan) because .csv is empty")
+		else:
+			self.report(f"Exception encountered: {e}")
 
 	def update_canvas(self):
 		"""
 		creates a datetime object from the inputted date string
-		of format YYYY-MM-DD. uses it to slice a copy of loaded
-		stock_data to be used to update graphics. checks
-		checkboxes first to see if SMA1, SMA2, Buy and Sell plots
-		need to be drawn. finally, updates graphic accordingly.
+		of format YYYY-MM-DD. checks checkboxes to see if SMA1, SMA2,
+		Buy and Sell plots need to be drawn. the plots are calculated
+		and sliced from the loaded stock_data in the background,
+		replacing any update that has not finished yet, then
+		on_update_ready updates graphic accordingly.
 
 		Error handling
 		invalid date format:
@@ -141,11 +413,13 @@ class Main(qtw.QWidget, Ui_Form):
 		non-existent data point :
 			data of that date does not exist,
 			or maybe because it is Out-Of-Bound
+		unknown indicator :
+			an SMA box holds neither a window nor a registered indicator
 		raised exceptions :
 			SMA1 and SMA2 values are the same,
 			or other exceptions raised
 		"""
-		self.date_format = '%Y-%m-%d'
+		self.updateTimer.stop()
 
 		try:
 			start_date = str(datetime.strptime(self.startDateEdit.text(), self.date_format).date())
@@ -153,44 +427,123 @@ class Main(qtw.QWidget, Ui_Form):
 			period = f"{start_date} to {end_date}"
 			self.periodEdit.setText(period)
 
-			# builds a list of graphs to plot by checking the tickboxes
-			column_headers = ['Close']
-			formats = ['k-']
-
-			if self.SMA1Checkbox.isChecked():
-				self.stock_data._calculate_SMA(int(self.SMA1Edit.text()))
-				column_headers.append(f"SMA{self.SMA1Edit.text()}")
-				formats.append('b-')
-			if self.SMA2Checkbox.isChecked():
-				self.stock_data._calculate_SMA(int(self.SMA2Edit.text()))
-				column_headers.append(f"SMA{self.SMA2Edit.text()}")
-				formats.append('m-')
-			if len(column_headers) == 3:
-				self.stock_data._calculate_crossover(column_headers[1], column_headers[2], column_headers[1])
-				column_headers.append('Sell')
-				formats.append('rv')
-				column_headers.append('Buy')
-				formats.append('g^')
-
-			self.selected_stock_data = self.stock_data.get_data(start_date, end_date)
-			self.plot_graph(column_headers, formats)
-
-			self.report(f"Plotting {column_headers} data from period: {start_date} to {end_date}.")
-			print(self.selected_stock_data)
-
-		except ValueError as e:
-			self.report(f"Time period has not been specified or does not match YYYY-MM-DD format, {e}.")
+			SMA1 = indicator_name(self.SMA1Edit.text()) if self.SMA1Checkbox.isChecked() else None
+			SMA2 = indicator_name(self.SMA2Edit.text()) if self.SMA2Checkbox.isChecked() else None
+			chart = self.chartCombo.currentText()
+			timeframe = TIMEFRAMES[self.timeframeCombo.currentText()]
+			self.start_worker('update', self.on_update_ready, self.on_update_error,
+			                  calculate_plot_data, self.stock_data, start_date, end_date, SMA1, SMA2, chart, timeframe)
+			self.plotted_period = (start_date, end_date)
 
-		except AssertionError as e:
-			self.report(f"Selected range is empty, {e}")
+		except Exception as e:
+			self.on_update_error(e)
 
-		except KeyError as e:
-			self.report(f"Data for this date does not exist: {e}")
+	def on_update_ready(self, result):
+		"""
+		plots the data calculated by update_canvas
 
-		except Exception as e:
+		Parameters
+		result : ([str, ...], [str, ...], {str: LODPyramid or ExactPoints}, tuple)
+			the column headers, their formats, the data to plot and the bars, see calculate_plot_data
+		"""
+		column_headers, formats, series, bars = result
+		start_date, end_date = self.plotted_period
+		with PROFILER.stage('plot_graph'):
+			self.plot_graph(column_headers, formats, series, bars)
+		self.report(f"Plotting {column_headers} data from period: {start_date} to {end_date}.")
+		self.report_profile()
+
+	def on_update_error(self, e):
+		"""
+		reports why update_canvas failed
+
+		Error handling
+		invalid date format:
+			date format inside the .csv file is not YYYY-MM-DD
+		non-existent stock_data :
+			the selected range results in an empty dataframe
+			or end date < start date
+		non-existent data point :
+			data of that date does not exist,
+			or maybe because it is Out-Of-Bound
+		unknown indicator :
+			an SMA box holds neither a window nor a registered indicator
+		raised exceptions :
+			SMA1 and SMA2 values are the same,
+			or other exceptions raised
+		"""
+		from indicators import UnknownIndicator
+
+		if isinstance(e, UnknownIndicator):
+			self.report(f"{e}")
+		elif isinstance(e, ValueError):
+			self.report(f"Time period has not been specified or does not match YYYY-MM-DD format, {e}.")
+		elif isinstance(e, AssertionError):
+			self.report(f"Selected range is empty, {e}")
+		elif isinstance(e, KeyError):
+			self.report(f"Data for this date does not exist: {e}")
+		else:
 			self.report(f"Exception encountered: {e}")
 
-	def plot_graph(self, column_headers, formats):
+	def start_worker(self, kind, on_result, on_error, function, *args):
+		"""
+		runs function(worker, *args) in the background, cancelling the previous
+		worker of the same kind, whose result (or error) is then never delivered
+
+		Parameters
+		kind : str
+			'load' or 'update'
+		on_result : function
+			called in the GUI thread with the value returned by function
+		on_error : function
+			called in the GUI thread with the exception raised by function
+		function : function
+			the work to run, see Worker
+		"""
+		if self.workers[kind] is not None: self.workers[kind].cancel()
+
+		worker = Worker(function, *args)
+		worker.signals.result.connect(lambda result: self.deliver(kind, worker, on_result, result))
+		worker.signals.error.connect(lambda e: self.deliver(kind, worker, on_error, e))
+		worker.signals.progress.connect(lambda percent: self.deliver(kind, worker, self.progressBar.setValue, percent))
+		worker.signals.finished.connect(lambda: self.finish_worker(kind, worker))
+		self.workers[kind] = worker
+		self.threadpool.start(worker)
+
+	def deliver(self, kind, worker, function, value):
+		"""
+		calls function(value) only if worker is still the latest worker of its kind
+		"""
+		if self.workers[kind] is worker: function(value)
+
+	def finish_worker(self, kind, worker):
+		"""
+		forgets a finished worker and resets the progress bar once nothing is running
+		"""
+		if self.workers[kind] is worker: self.workers[kind] = None
+		if all(worker is None for worker in self.workers.values()): self.progressBar.reset()
+
+	def cancel_work(self):
+		"""
+		cancels the running and pending workers and any checkbox update not yet started
+		"""
+		self.updateTimer.stop()
+		for (kind, worker) in self.workers.items():
+			if worker is not None:
+				worker.cancel()
+				self.workers[kind] = None
+				self.report(f"Cancelled {kind}.")
+		self.progressBar.reset()
+
+	def closeEvent(self, event):
+		"""
+		cancels the background work and waits for the running worker before closing
+		"""
+		self.cancel_work()
+		self.threadpool.waitForDone()
+		super().closeEvent(event)
+
+	def plot_graph(self, column_headers, formats, series, bars=None):
 		"""
 		plots graphs specified under column_headers using the formats
 
@@ -202,29 +555,82 @@ class Main(qtw.QWidget, Ui_Form):
 			whether to plot line or scatterplot and the colours
 			corresponding to each value in col_headers
 			(hence, must be same length)
-
-		Error handling
-		empty dataframe :
-			selected dataframe is empty
+		series : {str: LODPyramid or ExactPoints}
+			the data to plot of every column header whose data exists,
+			x values are dates as matplotlib's date numbers
+		bars : (ndarray, ndarray, ndarray, ndarray, ndarray, ndarray) (None)
+			x, open, high, low, close and volume of the candlesticks to plot, see calculate_plot_data
 		"""
-		self.ax.clear()
-		assert not self.selected_stock_data.empty
-
-		# matplotlib has its own internal representation of datetime
-		# date2num converts datetime.datetime to this internal representation
-		x_data = list(mdates.date2num(
-		                              [datetime.strptime(dates, self.date_format).date()
-		                              for dates in self.selected_stock_data.index.values]
-		                              ))
-
+		self.series = series
+		self.plot_bars(bars)
 		for i in range(len(column_headers)):
-			if column_headers[i] in self.selected_stock_data.columns:
-				y_data = list(self.selected_stock_data[column_headers[i]])
-				self.ax.plot(x_data, y_data, formats[i], label=column_headers[i])
+			if column_headers[i] in series:
+				(fmt, line) = self.lines.get(column_headers[i], (None, None))
+				if fmt != formats[i]:
+					if line is not None: line.remove()
+					(line,) = self.ax.plot([], [], formats[i], label=column_headers[i], animated=True)
+					self.lines[column_headers[i]] = (formats[i], line)
 				self.report(f"{column_headers[i]} data is being plotted.")
 			else: self.report(f"{column_headers[i]} data does not exist.")
 
-		# formatting
+		# lines that are no longer plotted are dropped instead of hidden
+		for column_header in list(self.lines):
+			if column_header not in series: self.lines.pop(column_header)[1].remove()
+
+		if self.legend is not None: self.legend.remove()
+		handles = [self.lines[col][1] for col in column_headers if col in self.lines]
+		self.legend = self.ax.legend(handles=handles, loc='upper left')
+		self.legend.set_animated(True)
+
+		# only a change of the axes limits needs a full draw (ticks, labels, grid),
+		# otherwise the lines and legend are blitted onto the saved background
+		limits = _data_limits(series, bars)
+		volume_limits = _volume_limits(bars)
+		if limits is not None and (limits, volume_limits) != ((self.ax.get_xlim(), self.ax.get_ylim()), self.volume_ax.get_ylim()):
+			self.ax.set_xlim(limits[0])
+			self.ax.set_ylim(limits[1])
+			self.volume_ax.set_ylim(volume_limits)
+			self.update_lines(self.ax)
+			with PROFILER.stage('draw'):
+				self.figure.tight_layout()
+				self.canvas.draw()
+			self.toolbar.update()
+		else:
+			self.update_lines(self.ax)
+			with PROFILER.stage('blit'): self.blit()
+
+	def plot_bars(self, bars):
+		"""
+		replaces the candlesticks and volume bars with bars, None removes them,
+		each is drawn as a few collections instead of a patch per bar (see candlestick.py)
+		"""
+		import candlestick
+
+		for collection in self.bars: collection.remove()
+		self.bars = []
+		if bars is None: return
+
+		(x, open_, high, low, close, volume) = bars
+		width = candlestick.bar_width(x)
+		self.bars.extend(candlestick.candlestick(self.ax, x, open_, high, low, close, width, animated=True))
+		if volume is not None:
+			self.bars.append(candlestick.volume(self.volume_ax, x, volume, close >= open_, width, animated=True))
+
+	def update_lines(self, ax):
+		"""
+		sets every line to the decimated view of its series that fits the x limits,
+		also called by matplotlib whenever the x limits change (e.g. zoom and pan)
+		"""
+		(xmin, xmax) = self.ax.get_xlim()
+		for (column_header, (fmt, line)) in self.lines.items():
+			line.set_data(*self.series[column_header].view(xmin, xmax, self.ax.bbox.width))
+
+	def setup_axes(self):
+		"""
+		formats the axes once, plot_graph then only updates the lines on it
+		"""
+		import matplotlib.dates as mdates
+
 		months_locator = mdates.MonthLocator()
 		months_format = mdates.DateFormatter('%b %Y')
 		self.ax.xaxis.set_major_locator(months_locator)
@@ -233,9 +639,46 @@ class Main(qtw.QWidget, Ui_Form):
 		self.ax.format_ydata = lambda y: '$%1.2f' % y
 		self.ax.grid(True)
 		self.figure.autofmt_xdate()
-		self.figure.legend()
-		self.figure.tight_layout()
-		self.canvas.draw()
+
+		# the volume bars fill the bottom of the plot, on their own scale without ticks
+		self.volume_ax = self.ax.twinx()
+		self.volume_ax.set_navigate(False)
+		self.volume_ax.yaxis.set_visible(False)
+		self.volume_ax.set_ylim(_volume_limits(None))
+		self.ax.set_zorder(self.volume_ax.get_zorder() + 1)
+		self.ax.patch.set_visible(False)
+
+		self.lines = {}
+		self.bars = []
+		self.series = {}
+		self.legend = None
+		self.background = None
+		self.canvas.mpl_connect('draw_event', self.on_draw)
+		self.ax.callbacks.connect('xlim_changed', self.update_lines)
+
+	def animated_artists(self):
+		"""
+		returns the artists Main draws itself: the volume bars, candlesticks, plotted lines and the legend
+		"""
+		artists = self.bars + [line for (fmt, line) in self.lines.values()]
+		return artists + [self.legend] if self.legend is not None else artists
+
+	def on_draw(self, event):
+		"""
+		after every full draw (e.g. zoom, pan, resize), saves the background
+		and draws the animated artists on top of it
+		"""
+		self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+		for artist in self.animated_artists(): self.figure.draw_artist(artist)
+
+	def blit(self):
+		"""
+		redraws only the animated artists on the saved background
+		"""
+		if self.background is None: return self.canvas.draw()
+		self.canvas.restore_region(self.background)
+		for artist in self.animated_artists(): self.figure.draw_artist(artist)
+		self.canvas.blit(self.figure.bbox)
 
 	def report(self, string):
 		"""
@@ -249,6 +692,16 @@ class Main(qtw.QWidget, Ui_Form):
 		self.scrollLayout.addWidget(report_text)
 		print(string)
 
+	def report_profile(self):
+		"""
+		when profiling is enabled (see profiler.py), reports the wall time, rows and bytes
+		of every stage recorded since the last time, e.g. read_csv, check_data and plot_graph
+		"""
+		if not PROFILER.enabled: return
+		until = len(PROFILER.events)
+		for line in PROFILER.report(self.profiled, until): self.report(f"Profile {line}")
+		self.profiled = until
+
 	def center(self):
 		"""
 		centers the fixed main window size according to user screen size
@@ -262,7 +715,50 @@ class Main(qtw.QWidget, Ui_Form):
 		self.setFixedSize(main_window.width(), main_window.height())
 		self.move(x, y)
 
+def _data_limits(series, bars=None, margin=0.05):
+	"""
+	returns the axes limits that fit every plotted series and the high and low
+	of every candlestick with matplotlib's default margin
+
+	Returns
+	limits : ((float, float), (float, float))
+		(xlim, ylim), None if there is nothing to plot
+	"""
+	import numpy as np
+	import candlestick
+
+	limits = [data.limits() for data in series.values() if data.limits() is not None]
+	if bars is not None:
+		(x, open_, high, low, close, volume) = bars
+		width = candlestick.bar_width(x)
+		limits.append(((float(x[0]) - width, float(x[-1]) + width), (float(np.nanmin(low)), float(np.nanmax(high)))))
+	if not limits: return None
+
+	def padded(low, high):
+		if low == high: return (low - 1, high + 1)
+		return (low - (high - low) * margin, high + (high - low) * margin)
+
+	return (padded(min(x[0] for (x, y) in limits), max(x[1] for (x, y) in limits)),
+	        padded(min(y[0] for (x, y) in limits), max(y[1] for (x, y) in limits)))
+
+def _volume_limits(bars, height=0.2):
+	"""
+	returns the y limits of the volume axes that keep the highest volume bar
+	within the bottom height (fraction) of the plot
+	"""
+	import numpy as np
+
+	if bars is None or bars[5] is None or not np.nanmax(bars[5]) > 0: return (0.0, 1.0)
+	return (0.0, float(np.nanmax(bars[5])) / height)
+
 if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="plots stock data .csv files with their SMAs and crossovers")
+	parser.add_argument('--profile', nargs='?', const='', default=None, metavar='FILE',
+	                    help="time every stage in the status area and write them to FILE on exit, "
+	                         "as a Chrome trace if FILE ends in .trace.json (also set by STOCKCHART_PROFILE)")
+	args = parser.parse_args()
+	if args.profile is not None: PROFILER.enable(args.profile)
+
 	app = qtw.QApplication([])
 	main = Main()
 	main.center()
@@ -0,0 +1,87 @@
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+
+UP_COLOR = 'g'
+DOWN_COLOR = 'r'
+
+def bar_width(x, fraction=0.6):
+	"""
+	returns the width of a candle or volume bar: a fraction of the smallest gap
+	between bars, so bars never overlap (1 day wide if there is only one bar)
+	"""
+	gaps = np.diff(x)
+	gaps = gaps[gaps > 0]
+	return fraction * (gaps.min() if len(gaps) > 0 else 1.0)
+
+def candlestick(ax, x, open_, high, low, close, width=None, **kwargs):
+	"""
+	draws OHLC candlesticks as two collections, one LineCollection for every wick and
+	one PolyCollection for every body, instead of a patch per bar. bars that
+	closed at or above their open are UP_COLOR, the others DOWN_COLOR
+
+	Parameters
+	ax : Axes
+		matplotlib axes object on which the candlesticks will be drawn
+	x : ndarray
+		the dates of the bars as matplotlib date numbers
+	open_, high, low, close : ndarray
+		the prices of the bars
+	width : float (None)
+		width of a body in date numbers, defaults to bar_width(x)
+	**kwargs :
+		passed on to both collections, e.g. animated=True
+
+	Returns
+	(wicks, bodies) : (LineCollection, PolyCollection)
+	"""
+	(x, open_, high, low, close) = (np.asarray(values, dtype=np.float64) for values in (x, open_, high, low, close))
+	if width is None: width = bar_width(x)
+	colors = np.where(close >= open_, UP_COLOR, DOWN_COLOR)
+
+	wicks = LineCollection(np.stack((np.column_stack((x, low)), np.column_stack((x, high))), axis=1),
+	                       colors=colors, linewidths=1, **kwargs)
+	bodies = PolyCollection(_rectangles(x, width, open_, close),
+	                        facecolors=colors, edgecolors=colors, linewidths=0.5, **kwargs)
+	ax.add_collection(wicks)
+	ax.add_collection(bodies)
+	return (wicks, bodies)
+
+def volume(ax, x, volume_, up, width=None, **kwargs):
+	"""
+	draws volume bars as a single PolyCollection, coloured like their candlesticks
+
+	Parameters
+	ax : Axes
+		matplotlib axes object on which the bars will be drawn
+	x : ndarray
+		the dates of the bars as matplotlib date numbers
+	volume_ : ndarray
+		the volume of the bars
+	up : ndarray
+		bool array, True for bars that closed at or above their open
+	width : float (None)
+		width of a bar in date numbers, defaults to bar_width(x)
+	**kwargs :
+		passed on to the collection, e.g. animated=True
+
+	Returns
+	bars : PolyCollection
+	"""
+	(x, volume_) = (np.asarray(x, dtype=np.float64), np.asarray(volume_, dtype=np.float64))
+	if width is None: width = bar_width(x)
+	colors = np.where(up, UP_COLOR, DOWN_COLOR)
+
+	bars = PolyCollection(_rectangles(x, width, np.zeros_like(volume_), volume_),
+	                      facecolors=colors, edgecolors='none', alpha=0.4, **kwargs)
+	ax.add_collection(bars)
+	return bars
+
+def _rectangles(x, width, bottom, top):
+	"""
+	returns the vertices of one rectangle per bar as an array of shape (len(x), 4, 2)
+	"""
+	(left, right) = (x - width / 2, x + width / 2)
+	return np.stack((np.column_stack((left, bottom)),
+	                 np.column_stack((left, top)),
+	                 np.column_stack((right, top)),
+	                 np.column_stack((right, bottom))), axis=1)
@@ -0,0 +1,153 @@
+import numpy as np
+
+class LODPyramid():
+	"""
+	level-of-detail pyramid of a long line series: every level keeps only the lowest
+	and highest point of each bucket of the level below, so plotting a view only needs
+	about two points per pixel while every spike in the data still shows
+
+	Attributes
+	.levels : [(ndarray, ndarray), ...]
+		the (x, y) points of every level, level 0 being the data itself
+	"""
+	def __init__(self, x, y, factor=4, min_buckets=1024):
+		"""
+		precomputes every level of the pyramid, each level has factor times fewer
+		buckets than the one below until it has less than min_buckets
+
+		Parameters
+		x : ndarray
+			sorted x values, e.g. matplotlib date numbers
+		y : ndarray
+			the values of the series, nan leaves a gap
+		factor : int (4)
+			the amount of buckets of a level merged into one bucket of the next level
+		min_buckets : int (1024)
+			the pyramid stops before a level would have less buckets than this
+		"""
+		x = np.asarray(x, dtype=np.float64)
+		y = np.asarray(y, dtype=np.float64)
+		self.levels = [(x, y)]
+		self._limits = _limits(x, y)
+
+		(x_low, y_low, x_high, y_high) = (x, y, x, y)
+		while len(y_low) // factor >= min_buckets:
+			(x_low, y_low, x_high, y_high) = _merge(x_low, y_low, x_high, y_high, factor)
+			self.levels.append(_interleave(x_low, y_low, x_high, y_high))
+
+	def view(self, xmin, xmax, pixels, points_per_pixel=4):
+		"""
+		returns the points of the finest level that fits the view within the budget
+		of points, plus one point beyond each edge so the line reaches the border
+
+		Parameters
+		xmin : float
+			left limit of the view
+		xmax : float
+			right limit of the view
+		pixels : float
+			width of the view in pixels
+		points_per_pixel : int (4)
+			the budget of points per pixel
+
+		Returns
+		(x, y) : (ndarray, ndarray)
+		"""
+		budget = max(int(pixels), 1) * points_per_pixel
+		for (x, y) in self.levels:
+			start = max(np.searchsorted(x, xmin, side='left') - 1, 0)
+			end = np.searchsorted(x, xmax, side='right') + 1
+			if end - start <= budget: break
+		return (x[start:end], y[start:end])
+
+	def limits(self):
+		"""
+		returns ((xmin, xmax), (ymin, ymax)) of the data, None if it has no values
+		"""
+		return self._limits
+
+class ExactPoints():
+	"""
+	a series drawn as markers (e.g. Buy and Sell) that is never decimated,
+	only its rows without values are dropped
+	"""
+	def __init__(self, x, y):
+		x = np.asarray(x, dtype=np.float64)
+		y = np.asarray(y, dtype=np.float64)
+		keep = np.isfinite(y)
+		(self.x, self.y) = (x[keep], y[keep])
+		self._limits = _limits(self.x, self.y)
+
+	def view(self, xmin, xmax, pixels=None):
+		"""
+		returns every point from xmin to xmax, see LODPyramid.view
+		"""
+		start = np.searchsorted(self.x, xmin, side='left')
+		end = np.searchsorted(self.x, xmax, side='right')
+		return (self.x[start:end], self.y[start:end])
+
+	def limits(self):
+		"""
+		returns ((xmin, xmax), (ymin, ymax)) of the data, None if it has no values
+		"""
+		return self._limits
+
+def make_series(x, y, fmt):
+	"""
+	returns a LODPyramid for a series drawn as a line and ExactPoints for a series
+	drawn only as markers, as told by its matplotlib format string (e.g. 'k-' or 'g^')
+	"""
+	if any(style in fmt for style in ('-', ':')): return LODPyramid(x, y)
+	return ExactPoints(x, y)
+
+def follow_xlim(ax, line, series):
+	"""
+	updates line with the view of series that fits ax whenever its x limits change
+	(e.g. zoom and pan with the NavigationToolbar), also sets it right away
+
+	Returns
+	cid : int
+		the callback id, to disconnect with ax.callbacks.disconnect(cid)
+	"""
+	def update(ax):
+		(xmin, xmax) = ax.get_xlim()
+		line.set_data(*series.view(xmin, xmax, ax.bbox.width))
+	update(ax)
+	return ax.callbacks.connect('xlim_changed', update)
+
+def _limits(x, y):
+	"""
+	returns ((xmin, xmax), (ymin, ymax)) of the finite points, None if there are none
+	"""
+	finite = np.isfinite(y)
+	if not finite.any(): return None
+	return ((float(x[0]), float(x[-1])), (float(y[finite].min()), float(y[finite].max())))
+
+def _merge(x_low, y_low, x_high, y_high, factor):
+	"""
+	merges every factor consecutive buckets into one, keeping the lowest
+	and the highest point of the merged buckets (buckets without values stay nan)
+	"""
+	pad = -len(y_low) % factor
+
+	def buckets(values):
+		return np.concatenate((values, np.full(pad, np.nan))).reshape(-1, factor)
+
+	(low, high) = (buckets(y_low), buckets(y_high))
+	rows = np.arange(len(low))
+	lowest = np.argmin(np.where(np.isnan(low), np.inf, low), axis=1)
+	highest = np.argmax(np.where(np.isnan(high), -np.inf, high), axis=1)
+	return (buckets(x_low)[rows, lowest], low[rows, lowest],
+	        buckets(x_high)[rows, highest], high[rows, highest])
+
+def _interleave(x_low, y_low, x_high, y_high):
+	"""
+	returns the lowest and highest point of every bucket as one series sorted by x
+	"""
+	low_first = x_low <= x_high
+	(x, y) = (np.empty(2 * len(x_low)), np.empty(2 * len(y_low)))
+	x[0::2] = np.where(low_first, x_low, x_high)
+	x[1::2] = np.where(low_first, x_high, x_low)
+	y[0::2] = np.where(low_first, y_low, y_high)
+	y[1::2] = np.where(low_first, y_high, y_low)
+	return (x, y)
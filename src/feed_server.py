@@ -0,0 +1,326 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+from stock_universe import StockUniverse
+
+# the columns of every bar message besides the SMAs
+BAR_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+# the longest request line read from a client (16 MiB), a publish of many bars is one line
+MAX_LINE = 1 << 24
+
+class Subscriber():
+	"""
+	a connected client and the messages waiting to be written to it. publishing only
+	queues the messages, a task per client writes them and waits while the client's
+	socket is full, so a slow client never holds up the publisher or the other clients
+
+	Attributes
+	.tickers : {str, ...}
+		the tickers the client subscribed to
+	.queue : deque
+		encoded messages waiting to be written, in order
+	.max_queue : int
+		the amount of waiting messages at which the client is disconnected as too slow
+	.sent : int
+		the amount of messages written to the client
+	.closed : bool
+		True once the client is disconnected
+	"""
+	def __init__(self, writer, max_queue=10_000):
+		self.writer = writer
+		self.tickers = set()
+		self.queue = deque()
+		self.max_queue = max_queue
+		self.sent = 0
+		self.closed = False
+		self._ready = asyncio.Event()
+
+	def push(self, messages):
+		"""
+		queues encoded messages (bytes) to be written, a client that has fallen
+		more than max_queue messages behind is told so and disconnected
+		"""
+		if self.closed: return
+		self.queue.extend(messages)
+		if len(self.queue) > self.max_queue:
+			self.queue.clear()
+			self.queue.append(_encode({'type': 'error', 'error': 'slow consumer, disconnected'}))
+			self.closed = True
+		self._ready.set()
+
+	async def run(self):
+		"""
+		writes the queued messages until the client is disconnected, every message
+		queued while waiting for the socket is written together with the next ones
+		"""
+		try:
+			while True:
+				await self._ready.wait()
+				self._ready.clear()
+				if self.queue:
+					messages = list(self.queue)
+					self.queue.clear()
+					self.writer.write(b''.join(messages))
+					self.sent += len(messages)
+					await self.writer.drain()
+				if self.closed: break
+		except ConnectionError:
+			self.closed = True
+		finally:
+			self.writer.close()
+
+	def close(self):
+		"""
+		disconnects the client once the queued messages are written
+		"""
+		self.closed = True
+		self._ready.set()
+
+class FeedServer():
+	"""
+	serves the new bars and Buy/Sell crossovers of many instruments to many TCP clients.
+	every instrument is loaded once and its SMAs and crossover are brought up to date
+	incrementally as bars are published (see StockData.append_bars), every message
+	is encoded once however many clients it is written to
+
+	the protocol is one JSON object per line in both directions (a stand-in for a WebSocket):
+	    {"op": "subscribe", "tickers": ["GOOG"]}       -> {"type": "subscribed", "ticker": "GOOG", "last": "2020-09-22"} (date of the last bar)
+	    {"op": "unsubscribe", "tickers": ["GOOG"]}     -> {"type": "unsubscribed", "ticker": "GOOG"}
+	    {"op": "publish", "ticker": "GOOG", "bars": [{"Date": "2020-09-23", "Open": ..., ...}]}
+	every subscriber of a ticker is then sent each new bar and each crossover:
+	    {"type": "bar", "ticker": "GOOG", "date": "2020-09-23", "Open": ..., "Close": ..., "SMA15": ..., "SMA50": ..., "time": ...}
+	    {"type": "signal", "ticker": "GOOG", "date": "2020-09-23", "side": "Buy", "price": ..., "time": ...}
+	"time" is when the server published the message, in seconds since epoch. a request
+	longer than MAX_LINE bytes is answered with an error and dropped
+
+	Attributes
+	.stocks : {str: StockData}
+		the instruments by ticker
+	.subscribers : {str: {Subscriber, ...}}
+		the clients subscribed to every ticker
+	.SMA1 : int
+		window of the faster SMA, Buy/Sell happen where it crosses the slower one
+	.SMA2 : int
+		window of the slower SMA
+	.max_queue : int
+		see Subscriber
+	"""
+	def __init__(self, stocks, SMA1=15, SMA2=50, max_queue=10_000):
+		"""
+		Parameters
+		stocks : {str: StockData}
+			the instruments to serve by ticker, e.g. StockUniverse(...).stocks
+		"""
+		self.stocks = dict(stocks)
+		self.subscribers = {ticker: set() for ticker in self.stocks}
+		(self.SMA1, self.SMA2) = (SMA1, SMA2)
+		self.max_queue = max_queue
+		self.server = None
+		for stock_data in self.stocks.values():
+			stock_data._calculate_SMA(SMA1)._calculate_SMA(SMA2)
+			stock_data._calculate_crossover(f'SMA{SMA1}', f'SMA{SMA2}', 'Close')
+
+	@classmethod
+	def from_source(cls, source, SMA1=15, SMA2=50, max_queue=10_000):
+		"""
+		loads every .csv file of source (see StockUniverse) once and serves them
+
+		Raises
+		ValueError :
+			no file could be loaded
+		"""
+		universe = StockUniverse(source)
+		if not universe.stocks: raise ValueError(f"No stock data could be loaded from {source}: {universe.failures}")
+		return cls(universe.stocks, SMA1, SMA2, max_queue)
+
+	async def start(self, host='127.0.0.1', port=8765):
+		"""
+		starts accepting clients, port 0 picks a free port
+
+		Returns
+		server : asyncio.Server
+		"""
+		self.server = await asyncio.start_server(self.handle, host, port, limit=MAX_LINE)
+		return self.server
+
+	async def handle(self, reader, writer):
+		"""
+		serves one client: reads its requests until it disconnects, see FeedServer
+		"""
+		subscriber = Subscriber(writer, self.max_queue)
+		task = asyncio.ensure_future(subscriber.run())
+		try:
+			while not subscriber.closed:
+				try: line = await _readline(reader)
+				except asyncio.LimitOverrunError:
+					subscriber.push([_encode({'type': 'error', 'error': f"request longer than {MAX_LINE:,} bytes"})])
+					await _skip_line(reader)
+					continue
+				if not line: break
+				try: request = json.loads(line)
+				except ValueError as e:
+					subscriber.push([_encode({'type': 'error', 'error': f"invalid JSON: {e}"})])
+					continue
+				self.dispatch(subscriber, request)
+		except ConnectionError:
+			pass
+		finally:
+			for ticker in subscriber.tickers: self.subscribers[ticker].discard(subscriber)
+			subscriber.close()
+			await task
+
+	def dispatch(self, subscriber, request):
+		"""
+		answers one request of a client, see FeedServer
+		"""
+		op = request.get('op') if isinstance(request, dict) else None
+		try:
+			if op in ('subscribe', 'unsubscribe'):
+				tickers = request.get('tickers', [])
+				if not isinstance(tickers, list) or not all(isinstance(ticker, str) for ticker in tickers):
+					raise TypeError("tickers must be a list of tickers")
+				for ticker in tickers:
+					if ticker not in self.stocks: raise KeyError(ticker)
+				replies = []
+				for ticker in tickers:
+					if op == 'subscribe':
+						self.subscribers[ticker].add(subscriber)
+						subscriber.tickers.add(ticker)
+						index = self.stocks[ticker].data.index
+						replies.append({'type': 'subscribed', 'ticker': ticker, 'last': _date(index[-1]) if len(index) else None})
+					else:
+						self.subscribers[ticker].discard(subscriber)
+						subscriber.tickers.discard(ticker)
+						replies.append({'type': 'unsubscribed', 'ticker': ticker})
+				subscriber.push([_encode(reply) for reply in replies])
+			elif op == 'publish':
+				if not isinstance(request.get('ticker'), str): raise TypeError("ticker must be a ticker")
+				if not isinstance(request.get('bars'), list): raise TypeError("bars must be a list of bars")
+				self.publish(request['ticker'], request['bars'])
+			else: raise ValueError(f"unknown op {op}")
+		except KeyError as e:
+			subscriber.push([_encode({'type': 'error', 'error': f"unknown ticker or missing field {e}"})])
+		except (TypeError, ValueError) as e:
+			subscriber.push([_encode({'type': 'error', 'error': str(e)})])
+		except Exception as e:
+			# e.g. bars append_bars cannot parse, the client is told and stays connected
+			subscriber.push([_encode({'type': 'error', 'error': f"{type(e).__name__}: {e}"})])
+
+	def publish(self, ticker, rows):
+		"""
+		appends new bars to an instrument, bringing its SMAs and crossover up to date from
+		the new bars on, and queues the new bars and their crossovers for its subscribers
+
+		Parameters
+		ticker : str
+		rows : DataFrame or [dict, dict, ...]
+			the new bars, see StockData.append_bars
+
+		Returns
+		messages : int
+			the amount of messages queued for every subscriber
+
+		Raises
+		KeyError :
+			ticker is not served
+		ValueError :
+			the new bars are not sorted or not newer than the last bar
+		"""
+		stock_data = self.stocks[ticker]
+		start = len(stock_data.data)
+		stock_data.append_bars(rows)
+		new = stock_data.data.iloc[start:]
+
+		now = time.time()
+		smas = [f'SMA{self.SMA1}', f'SMA{self.SMA2}']
+		columns = [col for col in BAR_COLUMNS if col in new.columns] + smas
+		values = {col: new[col].to_numpy(dtype=np.float64) for col in columns + ['Buy', 'Sell']}
+		messages = []
+		for (i, date) in enumerate(new.index):
+			bar = {'type': 'bar', 'ticker': ticker, 'date': _date(date)}
+			bar.update((col, _number(values[col][i])) for col in columns)
+			bar['time'] = now
+			messages.append(_encode(bar))
+			for side in ('Buy', 'Sell'):
+				if not np.isnan(values[side][i]):
+					messages.append(_encode({'type': 'signal', 'ticker': ticker, 'date': _date(date), 'side': side,
+					                         'price': _number(values[side][i]), 'time': now}))
+
+		for subscriber in self.subscribers[ticker]: subscriber.push(messages)
+		return len(messages)
+
+	def close(self):
+		"""
+		stops accepting clients and disconnects every client
+		"""
+		if self.server is not None: self.server.close()
+		for subscribers in self.subscribers.values():
+			for subscriber in subscribers: subscriber.close()
+
+async def _readline(reader):
+	"""
+	reads one line, or what is left at the end of the stream
+
+	Raises
+	LimitOverrunError :
+		the line is longer than the limit of reader, nothing of it is read
+	"""
+	try: return await reader.readuntil(b'\n')
+	except asyncio.IncompleteReadError as e: return e.partial
+
+async def _skip_line(reader):
+	"""
+	reads and drops the rest of a line that is longer than the limit of reader
+	"""
+	while True:
+		try:
+			await reader.readuntil(b'\n')
+			return
+		except asyncio.IncompleteReadError:
+			return
+		except asyncio.LimitOverrunError as e:
+			await reader.readexactly(e.consumed)
+
+def _encode(message):
+	"""
+	encodes a message as one line of JSON
+	"""
+	return (json.dumps(message, separators=(',', ':')) + '\n').encode()
+
+def _date(timestamp):
+	"""
+	formats a date as YYYY-MM-DD, or in ISO format if it has a time of day
+	"""
+	return f'{timestamp:%Y-%m-%d}' if timestamp == timestamp.normalize() else timestamp.isoformat()
+
+def _number(value):
+	"""
+	returns a float JSON can hold, nan (e.g. an SMA still warming up) becomes null
+	"""
+	return None if np.isnan(value) else float(value)
+
+async def _serve(args):
+	feed = FeedServer.from_source(args.source, args.SMA1, args.SMA2, args.max_queue)
+	server = await feed.start(args.host, args.port)
+	print(f"serving {', '.join(feed.stocks)} on {args.host}:{server.sockets[0].getsockname()[1]}")
+	async with server: await server.serve_forever()
+
+def main():
+	parser = argparse.ArgumentParser(description="serves the new bars and SMA crossovers of stock data .csv files over TCP")
+	parser.add_argument('source', help="folder, glob pattern (e.g. '../data/*.csv') or .csv file")
+	parser.add_argument('--host', default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=8765)
+	parser.add_argument('--SMA1', type=int, default=15)
+	parser.add_argument('--SMA2', type=int, default=50)
+	parser.add_argument('--max-queue', type=int, default=10_000, help="messages a client may fall behind before it is disconnected")
+	asyncio.run(_serve(parser.parse_args()))
+
+if __name__ == "__main__":
+	# usage: python feed_server.py ../data --port 8765
+	main()
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+from utils import DAY, to_ns_array
+
+# the methods fill_gaps fills missing values with
+METHODS = ('linear', 'time', 'ffill')
+
+def has_gaps(values):
+	"""
+	returns True if the array values has a missing value, without making a mask of it:
+	only float arrays can and the minimum of an array with a nan is nan
+	"""
+	return values.dtype.kind == 'f' and len(values) > 0 and bool(np.isnan(np.min(values)))
+
+def find_gaps(values):
+	"""
+	finds the runs of consecutive missing values of a float array
+
+	Returns
+	(starts, ends) : (ndarray, ndarray)
+		positions of the first missing value of every run and of the value after it,
+		so values[starts[i]:ends[i]] is the i-th run
+	"""
+	edges = np.diff(np.isnan(values).view(np.int8), prepend=0, append=0)
+	return (np.flatnonzero(edges == 1), np.flatnonzero(edges == -1))
+
+def trailing_gap(values):
+	"""
+	returns the position of the first value of the run of missing values at the end
+	of a float array, which fill_gaps fills by repeating the value before it.
+	None if the last value is not missing or every value is
+	"""
+	if not has_gaps(values) or not np.isnan(values[-1]): return None
+	valid = np.flatnonzero(~np.isnan(values))
+	return int(valid[-1]) + 1 if len(valid) else None
+
+def fill_gaps(values, dates=None, method='linear'):
+	"""
+	fills the runs of missing values of a float array (see find_gaps) from the values
+	around each run, only the missing positions are calculated. a run at the end
+	repeats the last value and a run at the start is left missing, as DataFrame.interpolate does
+
+	Parameters
+	values : ndarray
+		the values to fill, left unchanged
+	dates : ndarray (None)
+		int64 timestamps (nanoseconds since epoch) of the values, needed by 'time'
+	method : str ('linear')
+		'linear' interpolates by position, 'time' by date (weighing unevenly spaced
+		rows by the time between them) and 'ffill' repeats the value before the run
+
+	Returns
+	filled : ndarray
+		a filled copy of values, None if there was nothing to fill
+
+	Raises
+	ValueError :
+		method is unknown, or 'time' without dates
+	"""
+	if method not in METHODS: raise ValueError(f"Unknown fill method {method}, expected one of {', '.join(METHODS)}.")
+	if method == 'time' and dates is None: raise ValueError("The 'time' fill method needs the dates of the values.")
+	if not has_gaps(values): return None
+
+	(starts, ends) = find_gaps(values)
+	if starts[0] == 0: (starts, ends) = (starts[1:], ends[1:])
+	if len(starts) == 0: return None
+
+	# every missing position with the positions of the values before and after its run,
+	# a run at the end has no value after it and takes the value before it
+	lengths = ends - starts
+	positions = np.repeat(starts - lengths.cumsum() + lengths, lengths) + np.arange(lengths.sum())
+	before = np.repeat(starts - 1, lengths)
+	after = np.repeat(np.where(ends < len(values), ends, starts - 1), lengths)
+
+	filled = values.copy()
+	if method == 'ffill': filled[positions] = values[before]
+	else:
+		x = dates.astype(np.float64) if method == 'time' else np.arange(len(values), dtype=np.float64)
+		span = x[after] - x[before]
+		with np.errstate(divide='ignore', invalid='ignore'):
+			weight = np.where(span > 0, (x[positions] - x[before]) / span, 0.0)
+		filled[positions] = values[before] + (values[after] - values[before]) * weight
+	return filled
+
+def missing_sessions(dates, calendar):
+	"""
+	finds the sessions of an exchange calendar from the first to the last date without a row
+
+	Parameters
+	dates : ndarray
+		sorted int64 timestamps (nanoseconds since epoch) of the rows
+	calendar : str or DateOffset
+		the pandas frequency of the sessions, e.g. 'B' (every weekday) or
+		pd.offsets.CustomBusinessDay(holidays=[...]) for an exchange's holidays
+
+	Returns
+	sessions : ndarray
+		int64 timestamps of the missing sessions at midnight
+	"""
+	if len(dates) == 0: return np.array([], dtype=np.int64)
+	days = dates // DAY * DAY
+	sessions = to_ns_array(pd.date_range(pd.Timestamp(int(days[0])), pd.Timestamp(int(days[-1])), freq=calendar))
+	found = np.minimum(np.searchsorted(days, sessions), len(days) - 1)
+	return sessions[days[found] != sessions]
+
+def insert_sessions(dates, columns, sessions):
+	"""
+	inserts a row of missing values at every session, keeping the rows sorted
+
+	Parameters
+	dates : ndarray
+		sorted int64 timestamps (nanoseconds since epoch) of the rows
+	columns : {str: ndarray}
+		values of every column, integer columns become float64 to hold the missing values
+	sessions : ndarray
+		int64 timestamps of the rows to insert, see missing_sessions
+
+	Returns
+	(dates, columns) : (ndarray, {str: ndarray})
+	"""
+	positions = np.searchsorted(dates, sessions)
+	columns = {col: np.insert(values if values.dtype.kind == 'f' else values.astype(np.float64), positions, np.nan)
+	           for (col, values) in columns.items()}
+	return (np.insert(dates, positions, sessions), columns)
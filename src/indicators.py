@@ -0,0 +1,322 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+class Indicator():
+	"""
+	a registered indicator: a vectorized kernel calculating every value of one or more
+	output series from an array of values (e.g. closing prices) in one call
+
+	Attributes
+	.kind : str
+		the name the indicator is registered under, e.g. 'EMA'
+	.kernel : function
+		kernel(values, *params) returns an ndarray as long as values for every output,
+		the rows of its warm-up are nan
+	.defaults : (int or float, ...)
+		the parameters used when a name gives none, empty if they must be given
+	.outputs : (str, ...)
+		the suffix of every output series, '' is the main one, e.g. ('', 'signal', 'hist')
+	.warmup : function
+		warmup(*params) returns the amount of rows every output needs before its first value
+	.overlay : bool
+		True if the values are prices that can be plotted over the close price,
+		False for oscillators like RSI and MACD
+	.windows : int
+		the amount of leading parameters that are windows, which must be whole numbers
+	"""
+	def __init__(self, kind, kernel, defaults, outputs, warmup, overlay, windows=1):
+		self.kind = kind
+		self.kernel = kernel
+		self.defaults = tuple(defaults)
+		self.outputs = tuple(outputs)
+		self.warmup = warmup
+		self.overlay = overlay
+		self.windows = windows
+
+class UnknownIndicator(ValueError):
+	"""
+	the name of an indicator is not registered or its parameters do not fit it
+	"""
+
+# every indicator by its kind, see register
+REGISTRY = {}
+
+# KIND, optionally followed by parameters separated by '-' and an output suffix after '.', e.g. 'MACD12-26-9.signal'
+NAME = re.compile(r'([A-Za-z]+)(\d+(?:\.\d+)?(?:-\d+(?:\.\d+)?)*)?(?:\.([a-z]+))?')
+
+def register(kind, defaults=(), outputs=('',), warmup=lambda n: n - 1, overlay=True, windows=1):
+	"""
+	decorator registering a kernel as the indicator kind, see Indicator
+
+	Parameters
+	kind : str
+		upper case name of the indicator, e.g. 'EMA'
+	defaults : (int or float, ...) (())
+		the parameters used when a name gives none
+	outputs : (str, ...) (('',))
+		the suffix of every output series the kernel returns, in order
+	warmup : function (lambda n: n - 1)
+		returns the warm-up of every output from the parameters, an int or one int per output
+	overlay : bool (True)
+		whether the values can be plotted over the close price
+	windows : int (1)
+		the amount of leading parameters that are windows
+	"""
+	def decorator(kernel):
+		REGISTRY[kind] = Indicator(kind, kernel, defaults, outputs, warmup, overlay, windows)
+		return kernel
+	return decorator
+
+def parse(name):
+	"""
+	parses the name of an indicator series, e.g. 'EMA20', 'RSI' or 'MACD12-26-9.signal'
+
+	Returns
+	(indicator, params, output) : (Indicator, (int or float, ...), str)
+
+	Raises
+	UnknownIndicator :
+		the kind is not registered, the parameters do not fit it or the output does not exist
+	"""
+	match = NAME.fullmatch(str(name).strip())
+	if match is None: raise UnknownIndicator(f"Unknown indicator {name}, expected e.g. SMA15, EMA20 or MACD12-26-9.")
+	(kind, params, output) = match.groups()
+	indicator = REGISTRY.get(kind.upper())
+	if indicator is None: raise UnknownIndicator(f"Unknown indicator {kind}, expected one of {', '.join(REGISTRY)}.")
+
+	params = tuple(float(p) if '.' in p else int(p) for p in params.split('-')) if params else indicator.defaults
+	if not params or len(params) > max(len(indicator.defaults), 1):
+		raise UnknownIndicator(f"{indicator.kind} takes {max(len(indicator.defaults), 1)} parameter(s), got {name}.")
+	# omitted trailing parameters fall back on the defaults, e.g. BB20 is BB20-2
+	params += indicator.defaults[len(params):]
+	if any(p <= 0 for p in params): raise UnknownIndicator(f"Parameters of {name} must be positive.")
+	if any(int(p) != p for p in params[:indicator.windows]): raise UnknownIndicator(f"Windows of {name} must be whole numbers.")
+	params = tuple(int(p) for p in params[:indicator.windows]) + params[indicator.windows:]
+	if output is None: output = ''
+	if output not in indicator.outputs:
+		raise UnknownIndicator(f"{indicator.kind} has no output {output}, expected one of {', '.join(indicator.outputs[1:])}.")
+	return (indicator, params, output)
+
+def column_name(indicator, params, output=''):
+	"""
+	returns the canonical column head title of an output series, e.g. 'MACD12-26-9.signal'
+	"""
+	name = indicator.kind + '-'.join(f'{p:g}' if isinstance(p, float) else str(p) for p in params)
+	return f'{name}.{output}' if output else name
+
+def canonical(name):
+	"""
+	returns the canonical column head title of an indicator series,
+	e.g. 'ema20' is 'EMA20' and 'RSI' is 'RSI14'
+
+	Raises
+	UnknownIndicator :
+		name is not a registered indicator, see parse
+	"""
+	return column_name(*parse(name))
+
+def outputs(name):
+	"""
+	returns the column head titles of every output of the indicator name,
+	e.g. ['BB20-2', 'BB20-2.upper', 'BB20-2.lower'] for 'BB20'
+
+	Raises
+	UnknownIndicator :
+		name is not a registered indicator, see parse
+	"""
+	(indicator, params, output) = parse(name)
+	return [column_name(indicator, params, suffix) for suffix in indicator.outputs]
+
+def is_overlay(name):
+	"""
+	returns True if the indicator name can be plotted over the close price (e.g. 'EMA20'),
+	False for oscillators (e.g. 'RSI14') and for anything that is not an indicator
+	"""
+	try: return parse(name)[0].overlay
+	except UnknownIndicator: return False
+
+def is_indicator(name):
+	"""
+	returns True if name is a registered indicator series
+	"""
+	try: parse(name)
+	except UnknownIndicator: return False
+	return True
+
+def warmup(name):
+	"""
+	returns the amount of rows the indicator series name needs before its first value,
+	0 for anything that is not an indicator (e.g. 'Close')
+	"""
+	try: (indicator, params, output) = parse(name)
+	except UnknownIndicator: return 0
+	warmups = indicator.warmup(*params)
+	return warmups[indicator.outputs.index(output)] if isinstance(warmups, tuple) else warmups
+
+def compute(name, values):
+	"""
+	calculates every output of the indicator name from values in one kernel call
+
+	Parameters
+	name : str
+		the indicator, e.g. 'EMA20' or 'MACD' (an output suffix is ignored)
+	values : array_like
+		values to calculate it from, e.g. closing prices
+
+	Returns
+	columns : {str: ndarray}
+		float64 values of every output by its column head title, e.g.
+		{'BB20-2': middle, 'BB20-2.upper': upper, 'BB20-2.lower': lower}
+
+	Raises
+	UnknownIndicator :
+		name is not a registered indicator, see parse
+	"""
+	(indicator, params, output) = parse(name)
+	results = indicator.kernel(np.asarray(values, dtype=np.float64), *params)
+	if not isinstance(results, tuple): results = (results,)
+	return {column_name(indicator, params, suffix): result for (suffix, result) in zip(indicator.outputs, results)}
+
+def _check_window(n):
+	"""
+	returns the SMA window n as an int
+
+	Raises
+	ValueError :
+		n is not a positive integer
+	"""
+	if int(n) != n or n < 1: raise ValueError(f"SMA window must be a positive integer, got {n}.")
+	return int(n)
+
+def _rolling_mean(values, n):
+	"""
+	calculates the trailing mean of every n consecutive values using a single
+	cumulative sum, windows that contain nan are nan and so are the first n - 1 values
+
+	Parameters
+	values : array_like
+		values to average, e.g. closing prices
+	n : int
+		the amount of values in each window
+
+	Returns
+	mean : ndarray
+		float64 array of the same length as values
+
+	Raises
+	ValueError :
+		n is not a positive integer
+	"""
+	return _rolling_means(values, [n])[0]
+
+def _rolling_means(values, windows):
+	"""
+	calculates the trailing mean of values for many windows from one cumulative sum,
+	see _rolling_mean
+
+	Parameters
+	values : array_like
+		values to average, e.g. closing prices
+	windows : [int, int, ...]
+		the amount of values in each window
+
+	Returns
+	means : ndarray
+		float64 array of shape (len(windows), len(values))
+
+	Raises
+	ValueError :
+		a window is not a positive integer
+	"""
+	windows = [_check_window(n) for n in windows]
+	values = np.asarray(values, dtype=np.float64)
+	means = np.full((len(windows), len(values)), np.nan)
+
+	# offsetting by the first value keeps the running sum small,
+	# so long histories do not lose precision to the cumulative sum
+	missing = np.isnan(values)
+	offset = values[~missing][0] if not missing.all() else 0.0
+	csum = np.concatenate(([0.0], np.cumsum(np.where(missing, 0.0, values - offset))))
+	count = np.concatenate(([0], np.cumsum(missing))) if missing.any() else None
+
+	for (i, n) in enumerate(windows):
+		if len(values) < n: continue
+		mean = means[i, n-1:]
+		mean[:] = (csum[n:] - csum[:-n]) / n + offset
+		if count is not None: mean[(count[n:] - count[:-n]) > 0] = np.nan
+	return means
+
+def _ewm(values, alpha, warmup):
+	"""
+	calculates the exponentially weighted mean of values, seeded with the first value
+	that is not nan. the warmup values from there on are left as nan
+	"""
+	mean = pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy(copy=True)
+	valid = np.flatnonzero(~np.isnan(values))
+	mean[:(valid[0] if len(valid) else len(values)) + warmup] = np.nan
+	return mean
+
+@register('SMA')
+def sma(values, n):
+	"""
+	simple moving average of the last n values
+	"""
+	return _rolling_mean(values, _check_window(n))
+
+@register('EMA')
+def ema(values, n):
+	"""
+	exponential moving average with a smoothing of 2 / (n + 1)
+	"""
+	return _ewm(values, 2 / (_check_window(n) + 1), n - 1)
+
+@register('WMA')
+def wma(values, n):
+	"""
+	linearly weighted moving average, the latest of the last n values weighs n times the oldest
+	"""
+	n = _check_window(n)
+	wma = np.full(len(values), np.nan)
+	if len(values) >= n:
+		# the kernel is reversed by the convolution, so its first weight is applied to the latest value
+		weights = np.arange(n, 0, -1) / (n * (n + 1) / 2)
+		wma[n-1:] = np.convolve(values, weights, mode='valid')
+	return wma
+
+@register('BB', defaults=(20, 2), outputs=('', 'upper', 'lower'), warmup=lambda n, k: n - 1)
+def bollinger(values, n, k):
+	"""
+	Bollinger bands: SMA(n) and the bands k standard deviations of the last n values above and below it
+	"""
+	n = _check_window(n)
+	middle = _rolling_mean(values, n)
+	deviation = pd.Series(values).rolling(n).std(ddof=0).to_numpy()
+	return (middle, middle + k * deviation, middle - k * deviation)
+
+@register('RSI', defaults=(14,), warmup=lambda n: n, overlay=False)
+def rsi(values, n):
+	"""
+	relative strength index from 0 to 100 of Wilder's smoothed gains and losses over n values
+	"""
+	change = np.diff(values, prepend=np.nan)
+	gain = _ewm(np.where(change > 0, change, np.where(np.isnan(change), np.nan, 0.0)), 1 / _check_window(n), n - 1)
+	loss = _ewm(np.where(change < 0, -change, np.where(np.isnan(change), np.nan, 0.0)), 1 / n, n - 1)
+	with np.errstate(divide='ignore', invalid='ignore'):
+		rsi = 100 - 100 / (1 + gain / loss)
+	# without losses the RSI is 100 (and 50 without any change at all)
+	rsi[(loss == 0) & (gain > 0)] = 100.0
+	rsi[(loss == 0) & (gain == 0)] = 50.0
+	return rsi
+
+@register('MACD', defaults=(12, 26, 9), outputs=('', 'signal', 'hist'),
+          warmup=lambda fast, slow, signal: (slow - 1, slow + signal - 2, slow + signal - 2), overlay=False, windows=3)
+def macd(values, fast, slow, signal):
+	"""
+	moving average convergence divergence: EMA(fast) - EMA(slow), its EMA(signal)
+	and the histogram of their difference
+	"""
+	line = ema(values, fast) - ema(values, slow)
+	signal = ema(line, signal)
+	return (line, signal, line - signal)
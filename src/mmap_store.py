@@ -0,0 +1,226 @@
+import json
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils import DAY, to_ns, to_ns_array
+
+# bump whenever the layout of the store changes
+STORE_VERSION = 1
+
+class MmapStore():
+	"""
+	stores stock data on disk as one memory-mapped array per column plus a sorted
+	int64 index of timestamps (nanoseconds since epoch), so histories that do not
+	fit in memory can still be sliced, only the pages that are touched are read
+
+	Attributes
+	.folder : Path
+		folder containing the store, one .bin file per column and a meta.json
+	.index : memmap
+		sorted int64 timestamps (nanoseconds since epoch) of every row
+	.columns : [str, str, ...]
+		column head titles of the stored columns, e.g. ['Open', 'High', ...]
+	"""
+	def __init__(self, folder):
+		"""
+		opens an existing store read-only
+
+		Parameters
+		folder : str
+			folder the store was built in
+
+		Raises
+		IOError :
+			failed I/O operation, e.g: folder is not a store
+		ValueError :
+			store was built by an incompatible version
+		"""
+		self.folder = Path(folder)
+		with open(self.folder / 'meta.json') as file:
+			meta = json.load(file)
+		if meta['version'] != STORE_VERSION:
+			raise ValueError(f"{folder} was built with store version {meta['version']}, expected {STORE_VERSION}.")
+
+		length = meta['length']
+		self.index = _open_array(self.folder / 'index.bin', np.int64, length)
+		self.columns = [column['name'] for column in meta['columns']]
+		self._arrays = {column['name']: _open_array(self.folder / column['file'], column['dtype'], length)
+		                for column in meta['columns']}
+
+	def __len__(self):
+		return len(self.index)
+
+	def __getitem__(self, col):
+		"""
+		returns the whole memory-mapped column, e.g. store['Close']
+		"""
+		return self._arrays[col]
+
+	@classmethod
+	def from_frame(cls, folder, data):
+		"""
+		builds a store from a dataframe indexed by datetime, e.g. StockData.data
+
+		Parameters
+		folder : str
+			folder to build the store in, created if it does not exist
+		data : DataFrame
+
+		Returns
+		store : MmapStore
+		"""
+		return cls._build(folder, [data])
+
+	@classmethod
+	def from_csv(cls, folder, filepath, chunksize=1_000_000):
+		"""
+		builds a store from a stock data .csv file, parsing it chunk by chunk
+		so the whole file never has to be in memory at once
+
+		Parameters
+		folder : str
+			folder to build the store in, created if it does not exist
+		filepath : str
+			filepath to the stock data .csv file (assumes 'Date' column exists)
+		chunksize : int (1,000,000)
+			the amount of rows parsed at once
+
+		Returns
+		store : MmapStore
+
+		Raises
+		IOError :
+			failed I/O operation, e.g: invalid filepath, fail to open .csv
+		ValueError :
+			the dates in the .csv file are not sorted, or a column is not numeric
+		"""
+		chunks = pd.read_csv(filepath, index_col='Date', parse_dates=True, chunksize=chunksize)
+		return cls._build(folder, chunks)
+
+	@classmethod
+	def _build(cls, folder, chunks):
+		"""
+		appends the chunks of data to one raw binary file per column,
+		then records the columns, their dtypes and the row count in meta.json.
+		a column is stored in the dtype that holds the values of every chunk
+
+		Raises
+		ValueError :
+			the dates are not sorted, or a column is not numeric
+		"""
+		folder = Path(folder)
+		folder.mkdir(parents=True, exist_ok=True)
+
+		(files, meta, last) = ({}, None, None)
+		try:
+			for chunk in chunks:
+				index = to_ns_array(chunk.index)
+				if len(index) == 0: continue
+				if np.any(np.diff(index) < 0) or (last is not None and index[0] < last):
+					raise ValueError("Dates must be sorted in ascending order.")
+				last = index[-1]
+				for col in chunk.columns:
+					if chunk[col].dtype.kind not in 'biuf': raise ValueError(f"Column {col} must be numeric, got {chunk[col].dtype}.")
+
+				if meta is None:
+					meta = {'version': STORE_VERSION, 'length': 0,
+					        'columns': [{'name': col, 'file': f'column{i}.bin', 'dtype': chunk[col].dtype.str}
+					                    for (i, col) in enumerate(chunk.columns)]}
+					files['index'] = open(folder / 'index.bin', 'wb')
+					for column in meta['columns']: files[column['name']] = open(folder / column['file'], 'wb')
+
+				files['index'].write(index.tobytes())
+				for column in meta['columns']:
+					values = chunk[column['name']].to_numpy()
+					# a column of integers gets float once a later chunk has a missing value in it
+					dtype = np.result_type(column['dtype'], values.dtype)
+					if dtype != np.dtype(column['dtype']): _promote(folder, column, files, dtype)
+					files[column['name']].write(values.astype(column['dtype'], copy=False).tobytes())
+				meta['length'] += len(index)
+		finally:
+			for file in files.values(): file.close()
+
+		if meta is None:
+			meta = {'version': STORE_VERSION, 'length': 0, 'columns': []}
+			open(folder / 'index.bin', 'wb').close()
+		with open(folder / 'meta.json', 'w') as file:
+			json.dump(meta, file, indent=1)
+		return cls(folder)
+
+	def get_data(self, start_date, end_date):
+		"""
+		returns the rows from start_date to end_date inclusive as zero-copy views
+		of the memory-mapped columns, found by binary search on the index. a date
+		without a time (e.g. YYYY-MM-DD) includes every row on that day
+
+		Parameters
+		start_date : str or datetime
+			start of the range, e.g. YYYY-MM-DD
+		end_date : str or datetime
+			end of the range, e.g. YYYY-MM-DD
+
+		Returns
+		selected_data : {str: ndarray}
+			the int64 timestamps under 'Date' and every column under its head title
+		"""
+		start = np.searchsorted(self.index, to_ns(start_date), side='left')
+		if _is_day(end_date): end = np.searchsorted(self.index, to_ns(end_date) + DAY, side='left')
+		else: end = np.searchsorted(self.index, to_ns(end_date), side='right')
+
+		selected_data = {'Date': self.index[start:end]}
+		for col in self.columns: selected_data[col] = self._arrays[col][start:end]
+		return selected_data
+
+	def get_period(self):
+		"""
+		returns a string tuple of the first and last date in the store
+
+		Returns
+		period : (str, str)
+			dates of format YYYY-MM-DD
+
+		Raises
+		IndexError :
+			the store is empty
+		"""
+		(first, last) = (pd.Timestamp(self.index[0]), pd.Timestamp(self.index[-1]))
+		return (f'{first:%Y-%m-%d}', f'{last:%Y-%m-%d}')
+
+	def to_frame(self, start_date, end_date):
+		"""
+		copies the rows from start_date to end_date inclusive into a dataframe
+		laid out like StockData.data
+
+		Returns
+		data : DataFrame
+		"""
+		selected_data = self.get_data(start_date, end_date)
+		index = pd.DatetimeIndex(selected_data.pop('Date').astype('datetime64[ns]'), name='Date')
+		return pd.DataFrame({col: np.array(values) for (col, values) in selected_data.items()}, index=index)
+
+def _open_array(filepath, dtype, length):
+	"""
+	memory-maps a raw binary column read-only (numpy cannot map empty files)
+	"""
+	if length == 0: return np.empty(0, dtype=dtype)
+	return np.memmap(filepath, dtype=dtype, mode='r', shape=(length,))
+
+def _promote(folder, column, files, dtype):
+	"""
+	rewrites the values written so far of a column in a wider dtype and keeps appending to it
+	"""
+	filepath = folder / column['file']
+	files[column['name']].close()
+	np.fromfile(filepath, dtype=column['dtype']).astype(dtype).tofile(filepath)
+	files[column['name']] = open(filepath, 'ab')
+	column['dtype'] = np.dtype(dtype).str
+
+def _is_day(value):
+	"""
+	returns True if value names a whole day instead of a point in time
+	"""
+	if isinstance(value, str): return len(value.strip()) <= 10
+	return isinstance(value, date) and not isinstance(value, datetime)
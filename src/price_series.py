@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+
+from utils import DAY, to_ns, to_ns_array
+
+class PriceSeries():
+	"""
+	compact in-memory stock data: a sorted int64 array of dates (nanoseconds since epoch)
+	and one contiguous numpy array per column, without the indexing overhead of a
+	DataFrame. slicing returns views, nothing is copied until to_frame
+
+	Attributes
+	.dates : ndarray
+		int64 timestamps (nanoseconds since epoch) of every row
+	.columns : {str: ndarray}
+		the values of every column by its head title, e.g. 'Close'
+	"""
+	__slots__ = ('dates', 'columns', '_index')
+
+	def __init__(self, dates, columns):
+		"""
+		Parameters
+		dates : ndarray
+			int64 timestamps (nanoseconds since epoch) or datetime64 values of every row
+		columns : {str: ndarray}
+			numeric values of every column, as long as dates
+
+		Raises
+		ValueError :
+			a column is not numeric or not as long as dates
+		"""
+		dates = np.asarray(dates)
+		if dates.dtype.kind == 'M': dates = dates.astype('datetime64[ns]').view(np.int64)
+		self.dates = np.ascontiguousarray(dates, dtype=np.int64)
+		self.columns = {}
+		self._index = None
+		for (col, values) in columns.items():
+			values = np.ascontiguousarray(values)
+			if values.dtype.kind not in 'biuf': raise ValueError(f"Column {col} is not numeric ({values.dtype}).")
+			if len(values) != len(self.dates): raise ValueError(f"Column {col} has {len(values)} rows, expected {len(self.dates)}.")
+			self.columns[str(col)] = values
+
+	@classmethod
+	def from_frame(cls, data):
+		"""
+		copies a dataframe laid out like StockData.data (indexed by datetime)
+
+		Raises
+		ValueError :
+			a column is not numeric
+		"""
+		return cls(to_ns_array(data.index), {col: data[col].to_numpy(copy=True) for col in data.columns})
+
+	def __len__(self):
+		return len(self.dates)
+
+	def __contains__(self, col):
+		return col in self.columns
+
+	def __getitem__(self, col):
+		"""
+		returns the array of a column, e.g. series['Close']
+		"""
+		return self.columns[col]
+
+	def __setitem__(self, col, values):
+		values = np.ascontiguousarray(values)
+		if len(values) != len(self.dates): raise ValueError(f"Column {col} has {len(values)} rows, expected {len(self.dates)}.")
+		self.columns[col] = values
+
+	def __delitem__(self, col):
+		del self.columns[col]
+
+	@property
+	def empty(self):
+		"""
+		True if there are no rows, like DataFrame.empty
+		"""
+		return len(self.dates) == 0
+
+	@property
+	def nbytes(self):
+		"""
+		the memory used by the dates and every column
+		"""
+		return self.dates.nbytes + sum(values.nbytes for values in self.columns.values())
+
+	def index(self):
+		"""
+		returns the dates as a DatetimeIndex named 'Date', made once and reused
+		"""
+		if self._index is None: self._index = pd.DatetimeIndex(self.dates.view('datetime64[ns]'), name='Date')
+		return self._index
+
+	def is_sorted(self):
+		"""
+		returns True if the dates never decrease
+		"""
+		return bool(np.all(self.dates[1:] >= self.dates[:-1]))
+
+	def sort(self):
+		"""
+		sorts the rows by date in place, rows of the same date keep their order
+		"""
+		order = np.argsort(self.dates, kind='stable')
+		self.dates = self.dates[order]
+		self.columns = {col: values[order] for (col, values) in self.columns.items()}
+		self._index = None
+
+	def find(self, start_date, end_date):
+		"""
+		returns the positions of the rows from start_date to end_date inclusive, found by
+		binary search, as StockData.get_data: an end_date at midnight includes the whole day
+
+		Returns
+		(start, end) : (int, int)
+		"""
+		start = int(np.searchsorted(self.dates, to_ns(start_date), side='left'))
+		end_date = to_ns(end_date)
+		if end_date % DAY == 0: end = int(np.searchsorted(self.dates, end_date + DAY, side='left'))
+		else: end = int(np.searchsorted(self.dates, end_date, side='right'))
+		return (start, max(start, end))
+
+	def slice(self, start, end):
+		"""
+		returns the rows start to end as a PriceSeries viewing the same arrays
+		"""
+		return PriceSeries(self.dates[start:end], {col: values[start:end] for (col, values) in self.columns.items()})
+
+	def to_frame(self):
+		"""
+		copies the series into a dataframe laid out like StockData.data
+
+		Returns
+		data : DataFrame
+		"""
+		return pd.DataFrame({col: values.copy() for (col, values) in self.columns.items()},
+		                    index=pd.DatetimeIndex(self.dates.copy().view('datetime64[ns]'), name='Date'))
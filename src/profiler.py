@@ -0,0 +1,174 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+# set to 1 to time every stage, or to a filepath to also write the recorded stages there on exit, see Profiler.enable
+ENVIRONMENT_VARIABLE = 'STOCKCHART_PROFILE'
+
+class Profiler():
+	"""
+	records the wall time, the rows processed and the bytes written of every stage
+	of loading, calculating and plotting stock data (e.g. 'read_csv', 'check_data',
+	'to_csv', 'calculate SMA15', 'get_data', 'plot_graph'). disabled, a stage costs
+	one attribute lookup and nothing is recorded
+
+	Attributes
+	.enabled : bool
+		whether stages are recorded
+	.events : [(str, float, float, int, int, int), ...]
+		(stage, start, seconds, thread, rows, bytes) of every recorded stage in the order they
+		finished, start in seconds since the profiler was made, rows and bytes None if not counted
+	"""
+	def __init__(self, enabled=False):
+		self.enabled = enabled
+		self.events = []
+		self._origin = time.perf_counter()
+		self._lock = threading.Lock()
+
+	def enable(self, filepath=None):
+		"""
+		starts recording stages
+
+		Parameters
+		filepath : str (None)
+			if given, every recorded stage is written to this filepath on exit: a Chrome trace
+			if it ends in .trace.json (see to_chrome_trace), else a JSON report (see to_json)
+		"""
+		self.enabled = True
+		if filepath: atexit.register(self.to_chrome_trace if str(filepath).endswith('.trace.json') else self.to_json, filepath)
+
+	def stage(self, name, rows=None, nbytes=None):
+		"""
+		returns a context manager timing the stage name, its .rows and .nbytes
+		can be set inside the with block once they are known
+
+		Parameters
+		name : str
+			the stage, stages of the same name are added up by summary
+		rows : int (None)
+			the amount of rows the stage processes
+		nbytes : int (None)
+			the amount of bytes the stage writes
+		"""
+		if not self.enabled: return _NULL_STAGE
+		return _Stage(self, name, rows, nbytes)
+
+	def record(self, name, start, seconds, rows=None, nbytes=None):
+		"""
+		records a stage that was timed elsewhere, start being a time.perf_counter() value
+		"""
+		# counts are often numpy integers, which JSON cannot write
+		event = (name, start - self._origin, seconds, threading.get_ident(),
+		         None if rows is None else int(rows), None if nbytes is None else int(nbytes))
+		with self._lock: self.events.append(event)
+
+	def summary(self, since=0, until=None):
+		"""
+		adds up the recorded stages by name
+
+		Parameters
+		since : int (0)
+			the amount of earlier events to leave out, e.g. len(.events) at some point
+		until : int (None)
+			the amount of events to add up to, defaults to all of them
+
+		Returns
+		stages : {str: {str: int or float}}
+			'calls', 'seconds' (total), 'max' (seconds), 'rows' and 'bytes' of every stage
+			in the order they first finished
+		"""
+		stages = {}
+		with self._lock: events = self.events[since:until]
+		for (name, start, seconds, thread, rows, nbytes) in events:
+			stage = stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'max': 0.0, 'rows': 0, 'bytes': 0})
+			stage['calls'] += 1
+			stage['seconds'] += seconds
+			stage['max'] = max(stage['max'], seconds)
+			stage['rows'] += rows or 0
+			stage['bytes'] += nbytes or 0
+		return stages
+
+	def report(self, since=0, until=None):
+		"""
+		returns one line per stage of summary, e.g.
+		'check_data: 12.3 ms (1 call), 1,000,000 rows'
+		"""
+		lines = []
+		for (name, stage) in self.summary(since, until).items():
+			line = f"{name}: {stage['seconds'] * 1000:,.1f} ms ({stage['calls']:,} call{'s' if stage['calls'] != 1 else ''})"
+			if stage['rows']: line += f", {stage['rows']:,} rows"
+			if stage['bytes']: line += f", {stage['bytes'] / 1024:,.0f} KiB written"
+			lines.append(line)
+		return lines
+
+	def clear(self):
+		"""
+		drops every recorded stage
+		"""
+		with self._lock: self.events.clear()
+
+	def to_json(self, filepath):
+		"""
+		writes every recorded stage and their summary to a JSON file
+		"""
+		with self._lock: events = list(self.events)
+		keys = ('stage', 'start', 'seconds', 'thread', 'rows', 'bytes')
+		with open(filepath, 'w') as file:
+			json.dump({'summary': self.summary(), 'events': [dict(zip(keys, event)) for event in events]}, file, indent=1)
+
+	def to_chrome_trace(self, filepath):
+		"""
+		writes every recorded stage to a JSON file in the Chrome trace event format,
+		which chrome://tracing and https://ui.perfetto.dev show as a timeline per thread
+		"""
+		with self._lock: events = list(self.events)
+		pid = os.getpid()
+		trace = [{'name': name, 'ph': 'X', 'ts': start * 1e6, 'dur': seconds * 1e6, 'pid': pid, 'tid': thread,
+		          'args': {key: value for (key, value) in (('rows', rows), ('bytes', nbytes)) if value is not None}}
+		         for (name, start, seconds, thread, rows, nbytes) in events]
+		with open(filepath, 'w') as file:
+			json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, file)
+
+class _Stage():
+	"""
+	times one stage for Profiler.stage
+	"""
+	__slots__ = ('profiler', 'name', 'rows', 'nbytes', 'start')
+
+	def __init__(self, profiler, name, rows, nbytes):
+		self.profiler = profiler
+		self.name = name
+		self.rows = rows
+		self.nbytes = nbytes
+
+	def __enter__(self):
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, *exc_info):
+		self.profiler.record(self.name, self.start, time.perf_counter() - self.start, self.rows, self.nbytes)
+		return False
+
+class _NullStage():
+	"""
+	the stage of a disabled Profiler: records nothing and ignores .rows and .nbytes
+	"""
+	__slots__ = ()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		return False
+
+	def __setattr__(self, name, value):
+		pass
+
+_NULL_STAGE = _NullStage()
+
+# the profiler every module records its stages on, enabled by STOCKCHART_PROFILE
+PROFILER = Profiler()
+if os.environ.get(ENVIRONMENT_VARIABLE, '0') not in ('', '0'):
+	PROFILER.enable(None if os.environ[ENVIRONMENT_VARIABLE] == '1' else os.environ[ENVIRONMENT_VARIABLE])
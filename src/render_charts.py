@@ -0,0 +1,141 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from stock_data import StockData
+from utils import find_csv
+
+# set in every worker process by _init_worker, one figure reused for every chart
+_figure = None
+_ax = None
+
+def render_charts(source, folder, SMA1=15, SMA2=50, image_format='png', processes=None,
+                  size=(10, 5), dpi=100, cache=True):
+	"""
+	renders a chart of Close, SMA1, SMA2 and the Buy/Sell crossovers of every stock data
+	.csv file into an image file each, without a GUI. the charts are spread over a pool
+	of worker processes, each drawing every chart it gets on one figure it keeps
+
+	Parameters
+	source : str or [str, str, ...]
+		a folder, a glob pattern or a list of filepaths, see StockUniverse
+	folder : str
+		the folder the images are written to as <ticker>.<image_format>, created if needed
+	SMA1 : int (15)
+		window of the first SMA, whose line the Buy/Sell markers are placed on
+	SMA2 : int (50)
+		window of the second SMA
+	image_format : str ('png')
+		any format matplotlib's Agg backend can save, e.g. 'png' or 'svg'
+	processes : int (None)
+		the amount of worker processes, defaults to the amount of CPUs,
+		1 renders everything in this process
+	size : (float, float) ((10, 5))
+		width and height of the charts in inches
+	dpi : int (100)
+		resolution of the charts in dots per inch
+	cache : bool (True)
+		passed on to StockData, whether to use the binary cache of each .csv file
+
+	Returns
+	(images, failures) : ({str: str}, {str: str})
+		the image filepath by .csv filepath, and the error message
+		of every .csv file whose chart could not be rendered
+
+	Raises
+	OSError :
+		folder cannot be created
+	"""
+	Path(folder).mkdir(parents=True, exist_ok=True)
+	processes = processes or os.cpu_count() or 1
+	tasks = [(str(filepath), str(Path(folder) / f'{Path(filepath).stem}.{image_format}'), SMA1, SMA2, cache)
+	         for filepath in find_csv(source)]
+
+	if processes == 1:
+		_init_worker(size, dpi)
+		results = [_render_task(task) for task in tasks]
+	else:
+		# hands out several charts at once so the workers rarely wait for the next task
+		chunksize = max(1, len(tasks) // (4 * processes))
+		with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(size, dpi)) as pool:
+			results = list(pool.map(_render_task, tasks, chunksize=chunksize))
+
+	images = {filepath: image for (filepath, image, error) in results if error is None}
+	failures = {filepath: error for (filepath, image, error) in results if error is not None}
+	return (images, failures)
+
+def render_chart(stock_data, ax, SMA1=15, SMA2=50, title=None):
+	"""
+	plots Close, SMA1, SMA2 and the Buy/Sell crossovers of the whole period of stock_data
+	on ax the way the GUI does
+
+	Parameters
+	stock_data : StockData
+	ax : Axes
+		matplotlib axes object on which the chart will be drawn, cleared first
+	title : str (None)
+		title of the chart, e.g. the ticker
+	"""
+	stock_data._calculate_SMA(SMA1)
+	stock_data._calculate_SMA(SMA2)
+	stock_data._calculate_crossover(f'SMA{SMA1}', f'SMA{SMA2}', f'SMA{SMA1}')
+	stock_data.get_data(*stock_data.get_period())
+
+	ax.cla()
+	stock_data.plot_graph(['Close', f'SMA{SMA1}', f'SMA{SMA2}', 'Sell', 'Buy'], ['k-', 'b-', 'm-', 'rv', 'g^'], ax, show=False)
+	if title is not None: ax.set_title(title)
+
+def _init_worker(size, dpi):
+	"""
+	creates the figure a (worker) process draws every chart on
+	"""
+	global _figure, _ax
+	(_figure, _ax) = plt.subplots(figsize=size, dpi=dpi)
+	# fixed margins instead of tight_layout, which costs as much as drawing the chart again
+	_figure.subplots_adjust(left=0.08, right=0.98, bottom=0.08, top=0.93)
+
+def _render_task(task):
+	"""
+	renders one .csv file into an image file, runs inside the process pool
+
+	Returns
+	(filepath, image, error) : (str, str, str)
+		error is None if the chart was rendered, image is None if not
+	"""
+	(filepath, image, SMA1, SMA2, cache) = task
+	try:
+		stock_data = StockData(filepath, cache=cache)
+		render_chart(stock_data, _ax, SMA1, SMA2, title=Path(filepath).stem)
+		_figure.savefig(image)
+	except Exception as e:
+		return (filepath, None, f"{type(e).__name__}: {e}")
+	return (filepath, image, None)
+
+def main():
+	parser = argparse.ArgumentParser(description="renders a Close, SMA and crossover chart of every stock data .csv file")
+	parser.add_argument('source', nargs='+', help="folder, glob pattern (e.g. '../data/*.csv') or .csv files")
+	parser.add_argument('--output', default='charts', help="folder to write the charts to (charts)")
+	parser.add_argument('--SMA1', type=int, default=15)
+	parser.add_argument('--SMA2', type=int, default=50)
+	parser.add_argument('--format', default='png', help="png, svg, pdf, ... (png)")
+	parser.add_argument('--processes', type=int, default=None, help="worker processes (amount of CPUs)")
+	parser.add_argument('--dpi', type=int, default=100)
+	args = parser.parse_args()
+
+	source = args.source[0] if len(args.source) == 1 else args.source
+	start = time.perf_counter()
+	(images, failures) = render_charts(source, args.output, args.SMA1, args.SMA2, args.format, args.processes, dpi=args.dpi)
+	elapsed = time.perf_counter() - start
+
+	for (filepath, error) in failures.items(): print(f"{filepath}: {error}")
+	print(f"{len(images):,} charts in {elapsed:.2f}s ({len(images) / elapsed:,.1f} charts/s), {len(failures):,} failed")
+
+if __name__ == "__main__":
+	# usage: python render_charts.py ../data --output ../charts --format svg
+	main()
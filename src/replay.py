@@ -0,0 +1,252 @@
+from collections import namedtuple
+
+import numpy as np
+
+from indicators import _check_window, _rolling_mean
+
+# a bar as it was seen live: its position in the stock data, date (datetime64), value, both SMAs
+# and 'Buy', 'Sell' or None if the SMAs did not cross on it
+Bar = namedtuple('Bar', ['position', 'date', 'price', 'fast', 'slow', 'signal'])
+
+# a crossover as it would have happened live, date is a datetime64
+Event = namedtuple('Event', ['position', 'date', 'side', 'price', 'fast', 'slow'])
+
+class SMAState():
+	"""
+	simple moving average (SMA) of a stream of values, updated in O(1) per value from
+	a ring buffer of the last n values and their running sum. like StockData._calculate_SMA,
+	the first n - 1 averages and the averages of windows holding a nan are nan
+
+	Attributes
+	.n : int
+		the amount of values in each window
+	.decimals : int
+		the averages are rounded to this many decimals, None to not round
+	.count : int
+		the amount of values seen
+	"""
+	__slots__ = ('n', 'decimals', 'count', '_scale', '_window', '_sum', '_missing', '_offset')
+
+	def __init__(self, n, decimals=4):
+		"""
+		Raises
+		ValueError :
+			n is not a positive integer
+		"""
+		self.n = _check_window(n)
+		self.decimals = decimals
+		self._scale = 10.0 ** decimals if decimals is not None else None
+		self.reset()
+
+	def reset(self):
+		"""
+		forgets every value seen
+		"""
+		self.count = 0
+		self._window = [0.0] * self.n
+		self._sum = 0.0
+		self._missing = 0
+		# summing the values less the first one keeps the running sum small and precise
+		self._offset = None
+
+	def update(self, value):
+		"""
+		adds the next value and returns the average of the last n values
+		"""
+		i = self.count % self.n
+		if self.count >= self.n:
+			old = self._window[i]
+			if old != old: self._missing -= 1
+			else: self._sum -= old - self._offset
+		self._window[i] = value
+		self.count += 1
+		if value != value: self._missing += 1
+		else:
+			if self._offset is None: self._offset = value
+			self._sum += value - self._offset
+		if self.count < self.n or self._missing: return np.nan
+		mean = self._sum / self.n + self._offset
+		# rounds as np.round does, to give the same averages as _calculate_SMA
+		return round(mean * self._scale) / self._scale if self._scale is not None else mean
+
+	def update_many(self, values):
+		"""
+		adds the next values and returns the average of the last n values at every one of
+		them, vectorized over the values but the same as calling update for each
+
+		Parameters
+		values : array_like
+
+		Returns
+		means : ndarray
+			float64 array as long as values
+		"""
+		values = np.asarray(values, dtype=np.float64)
+		if len(values) == 0: return np.empty(0)
+		tail = self._tail()
+		window = np.concatenate((tail, values))
+		means = _rolling_mean(window, self.n)[len(tail):]
+		if self._scale is not None: means = np.round(means, self.decimals)
+
+		# the ring buffer is rebuilt from the last n values, which also resets
+		# the running sum so it does not drift over long replays
+		last = window[-self.n:]
+		self.count += len(values)
+		positions = (self.count - len(last) + np.arange(len(last))) % self.n
+		buffer = np.zeros(self.n)
+		buffer[positions] = last
+		self._window = buffer.tolist()
+		missing = np.isnan(last)
+		self._missing = int(missing.sum())
+		if self._offset is None and not missing.all(): self._offset = float(last[~missing][0])
+		self._sum = float(np.sum(last[~missing] - self._offset)) if self._offset is not None else 0.0
+		return means
+
+	def _tail(self):
+		"""
+		returns the last n - 1 values seen (fewer if fewer were seen), oldest first
+		"""
+		m = min(self.count, self.n - 1)
+		return np.array([self._window[(self.count - m + k) % self.n] for k in range(m)], dtype=np.float64)
+
+class CrossoverState():
+	"""
+	crossover of a fast and a slow line, updated in O(1) per value. like
+	StockData._calculate_crossover, a Buy is where the fast line gets above the slow one
+	and a Sell where it gets below or equal, nothing happens next to a missing value
+
+	Attributes
+	.position : float
+		1.0 if the fast line was above the slow one at the last update, 0.0 if below
+		or equal and nan if either was missing
+	"""
+	__slots__ = ('position',)
+
+	def __init__(self):
+		self.position = np.nan
+
+	def update(self, fast, slow):
+		"""
+		returns 1 where the fast line crosses above the slow one (Buy), -1 where it crosses below (Sell), else 0
+		"""
+		position = 1.0 if fast > slow else 0.0 if fast <= slow else np.nan
+		(previous, self.position) = (self.position, position)
+		if previous != position and previous == previous and position == position: return 1 if position else -1
+		return 0
+
+	def update_many(self, fast, slow):
+		"""
+		returns the signal of update for every pair of values, vectorized over them
+
+		Returns
+		signal : ndarray
+			int8 array as long as fast
+		"""
+		difference = np.asarray(fast, dtype=np.float64) - np.asarray(slow, dtype=np.float64)
+		if len(difference) == 0: return np.empty(0, dtype=np.int8)
+		position = np.where(difference > 0, 1.0, np.where(difference <= 0, 0.0, np.nan))
+		change = np.diff(position, prepend=self.position)
+		self.position = float(position[-1])
+		return np.nan_to_num(change, nan=0.0).astype(np.int8)
+
+class Replay():
+	"""
+	replays the bars of stock data in order through the SMA crossover as it would have
+	run live: every average and crossover is calculated only from the bars up to it,
+	without lookahead, and gives the same Buy/Sell as StockData._calculate_crossover of
+	the same SMAs. a replay resumes where it stopped, e.g. to walk forward through a history
+
+	Attributes
+	.stock_data : StockData
+	.col : str
+		the column head title of the values replayed, e.g. 'Close'
+	.fast : SMAState
+		the SMA of the shorter window
+	.slow : SMAState
+		the SMA of the longer window
+	.crossover : CrossoverState
+	.position : int
+		position of the next bar to replay
+	"""
+	def __init__(self, stock_data, SMA1=15, SMA2=50, col='Close', decimals=4):
+		"""
+		Parameters
+		stock_data : StockData
+		SMA1 : int (15)
+			window of one SMA
+		SMA2 : int (50)
+			window of the other SMA, the shorter window is the fast line
+		col : str ('Close')
+			the column head title of the values to average, which is also the price of the signals
+		decimals : int (4)
+			the averages are rounded to this many decimals as _calculate_SMA does, None to not round
+
+		Raises
+		ValueError :
+			SMA1 and SMA2 are the same or not positive integers
+		"""
+		(SMA1, SMA2) = (_check_window(SMA1), _check_window(SMA2))
+		if SMA1 == SMA2: raise ValueError(f"Given SMA{SMA1} & SMA{SMA2} are the same. Must be different SMA.")
+		self.stock_data = stock_data
+		self.col = col
+		self.fast = SMAState(min(SMA1, SMA2), decimals)
+		self.slow = SMAState(max(SMA1, SMA2), decimals)
+		self.crossover = CrossoverState()
+		self.position = 0
+		self._values = np.asarray(stock_data._values(col), dtype=np.float64)
+		self._dates = stock_data._index().to_numpy()
+
+	def reset(self):
+		"""
+		starts the replay over from the first bar
+		"""
+		self.fast.reset()
+		self.slow.reset()
+		self.crossover = CrossoverState()
+		self.position = 0
+
+	def bars(self, end=None):
+		"""
+		replays the bars one by one, updating the SMAs and the crossover in O(1) per bar
+
+		Parameters
+		end : int (None)
+			position to stop before, defaults to the last bar
+
+		Yields
+		bar : Bar
+		"""
+		end = len(self._values) if end is None else min(end, len(self._values))
+		(fast, slow, crossover) = (self.fast.update, self.slow.update, self.crossover.update)
+		dates = self._dates[self.position:end]
+		for (i, price) in enumerate(self._values[self.position:end].tolist()):
+			(a, b) = (fast(price), slow(price))
+			signal = crossover(a, b)
+			self.position += 1
+			yield Bar(self.position - 1, dates[i], price, a, b, 'Buy' if signal == 1 else 'Sell' if signal == -1 else None)
+
+	def events(self, end=None, batch=65_536):
+		"""
+		replays the bars in batches, vectorized over every batch with the state carried
+		from one batch to the next, and yields only the crossovers. gives the same
+		events as bars, at millions of bars per second
+
+		Parameters
+		end : int (None)
+			position to stop before, defaults to the last bar
+		batch : int (65,536)
+			the amount of bars replayed at a time
+
+		Yields
+		event : Event
+		"""
+		end = len(self._values) if end is None else min(end, len(self._values))
+		while self.position < end:
+			start = self.position
+			values = self._values[start:min(start + batch, end)]
+			(fast, slow) = (self.fast.update_many(values), self.slow.update_many(values))
+			signal = self.crossover.update_many(fast, slow)
+			self.position += len(values)
+			for i in np.flatnonzero(signal).tolist():
+				yield Event(start + i, self._dates[start + i], 'Buy' if signal[i] == 1 else 'Sell', float(values[i]),
+				            float(fast[i]), float(slow[i]))
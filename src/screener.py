@@ -0,0 +1,227 @@
+import argparse
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from gaps import fill_gaps
+from indicators import _check_window
+from utils import find_csv
+
+# a fresh crossover of a stock: 'Buy' or 'Sell', the date and the price it happened at,
+# how many bars before the last bar it happened, and the SMAs and their spread
+# ((fast - slow) / slow) at the last bar
+Crossover = namedtuple('Crossover', ['ticker', 'side', 'date', 'bars_ago', 'price', 'fast', 'slow', 'spread'])
+
+class Screener():
+	"""
+	finds the stocks of a large universe whose SMAs crossed in the last few bars. only the
+	last rows every stock needs (the longer SMA plus the bars screened) are read from the end
+	of each .csv file, no file is written, and the crossovers of every stock are calculated
+	at once on a 2-D array of their prices. the crossovers are the same as
+	StockData._calculate_crossover finds: a Buy is where the faster SMA gets above the slower one
+
+	Attributes
+	.tickers : [str, ...]
+		the ticker (the .csv file name without extension) of every row of .prices
+	.prices : ndarray
+		array of shape (len(tickers), rows) holding the last rows values of every stock,
+		aligned on their last bar, stocks with fewer rows start with nan
+	.dates : [[str, ...], ...]
+		the dates of the values of every stock as written in its file, aligned like .prices
+	.failures : {str: str}
+		the error message of every file that failed to load by filepath
+	.SMA1 : int
+	.SMA2 : int
+	.days : int
+		the amount of last bars screened for crossovers
+	"""
+	def __init__(self, source, SMA1=15, SMA2=50, days=5, col='Close', max_workers=None):
+		"""
+		initializes Screener by reading the last SMA2 + days rows of every .csv file of source
+
+		Parameters
+		source : str or [str, str, ...]
+			a folder, a glob pattern (e.g. ../data/*.csv) or a list of filepaths, see StockUniverse
+		SMA1 : int (15)
+			window of one SMA
+		SMA2 : int (50)
+			window of the other SMA, the shorter window is the fast line
+		days : int (5)
+			the amount of last bars to look for crossovers in
+		col : str ('Close')
+			the column head title of the values to average, which is also the price of the crossovers
+		max_workers : int (None)
+			the amount of threads reading files at once, defaults to what concurrent.futures picks
+
+		Raises
+		ValueError :
+			SMA1 and SMA2 are the same, or a window or days is not a positive integer
+		"""
+		(SMA1, SMA2) = (_check_window(SMA1), _check_window(SMA2))
+		if SMA1 == SMA2: raise ValueError(f"Given SMA{SMA1} & SMA{SMA2} are the same. Must be different SMA.")
+		if int(days) != days or days < 1: raise ValueError(f"days must be a positive integer, got {days}.")
+		(self.SMA1, self.SMA2, self.days) = (SMA1, SMA2, int(days))
+		self.failures = {}
+
+		# the slower SMA needs SMA2 - 1 rows before the first bar screened, whose crossover needs the row before it
+		rows = max(SMA1, SMA2) + self.days
+		filepaths = find_csv(source)
+		tails = {}
+		with ThreadPoolExecutor(max_workers) as pool:
+			for (filepath, tail) in zip(filepaths, pool.map(lambda filepath: _try(read_tail, filepath, rows, col), filepaths)):
+				if isinstance(tail, Exception): self.failures[str(filepath)] = f"{type(tail).__name__}: {tail}"
+				else: tails[Path(filepath).stem] = tail
+		tails = dict(sorted(tails.items()))
+
+		self.tickers = list(tails)
+		self.prices = np.full((len(tails), rows), np.nan)
+		self.dates = []
+		for (i, (dates, values)) in enumerate(tails.values()):
+			if len(values): self.prices[i, rows - len(values):] = values
+			self.dates.append([None] * (rows - len(dates)) + list(dates))
+
+	def crossovers(self, days=None, side=None):
+		"""
+		finds the last crossover of every stock in its last days bars, in one pass over .prices
+
+		Parameters
+		days : int (None)
+			the amount of last bars to look in, at most .days, defaults to .days
+		side : str (None)
+			'Buy' or 'Sell' to find only those, defaults to both
+
+		Returns
+		crossovers : [Crossover, ...]
+			the freshest crossovers first, those of the same day by the size of their spread
+		"""
+		days = self.days if days is None else min(days, self.days)
+		(fast, slow) = (_rolling_mean_2d(self.prices, min(self.SMA1, self.SMA2)), _rolling_mean_2d(self.prices, max(self.SMA1, self.SMA2)))
+		difference = fast - slow
+		position = np.where(difference > 0, 1.0, np.where(difference <= 0, 0.0, np.nan))
+		signal = np.diff(position[:, -days-1:], axis=1)
+		signal[np.isnan(signal)] = 0
+		if side is not None: signal[signal != (1 if side == 'Buy' else -1)] = 0
+
+		# the last column with a signal of every stock that has one
+		found = np.flatnonzero(signal.any(axis=1))
+		last = days - 1 - np.argmax(signal[found, ::-1] != 0, axis=1)
+		columns = self.prices.shape[1] - days + last
+		with np.errstate(divide='ignore', invalid='ignore'):
+			spread = difference[found, -1] / slow[found, -1]
+
+		results = [Crossover(self.tickers[i], 'Buy' if signal[i, j] == 1 else 'Sell', self.dates[i][column], days - 1 - j,
+		                     float(self.prices[i, column]), float(fast[i, -1]), float(slow[i, -1]), float(s))
+		           for (i, j, column, s) in zip(found.tolist(), last.tolist(), columns.tolist(), spread.tolist())]
+		results.sort(key=lambda result: (result.bars_ago, -abs(result.spread) if result.spread == result.spread else 0))
+		return results
+
+def read_tail(filepath, rows, col='Close', block=1 << 13):
+	"""
+	reads the dates and the values of col of the last rows rows of a stock data .csv file,
+	seeking back from the end of the file instead of parsing all of it. missing values
+	are interpolated as StockData.check_data does, reading further back past missing
+	values at the start of the rows. a file whose rows are not sorted by date is read
+	whole and sorted
+
+	Parameters
+	filepath : str
+	rows : int
+		the amount of last rows to read
+	col : str ('Close')
+		the column head title of the values to read
+	block : int (8,192)
+		the amount of bytes read at a time from the end
+
+	Returns
+	(dates, values) : ([str, ...], ndarray)
+		the dates as written in the file and the float64 values, at most rows of them
+
+	Raises
+	ValueError :
+		the file has no Date or no col column
+	"""
+	with open(filepath, 'rb') as file:
+		header = file.readline().decode().strip().split(',')
+		if 'Date' not in header or col not in header: raise ValueError(f"{filepath} has no Date or {col} column.")
+		(i, k) = (header.index('Date'), header.index(col))
+		start = file.tell()
+		position = file.seek(0, 2)
+		(data, wanted) = (b'', rows)
+		while True:
+			# one more line than needed, the first line read can be cut off by the block
+			while position > start and data.count(b'\n') <= wanted + 1:
+				size = min(block, position - start)
+				position -= size
+				file.seek(position)
+				data = file.read(size) + data
+			lines = [line for line in data.split(b'\n')[1 if position > start else 0:] if line.strip()]
+			fields = [line.split(b',') for line in lines[-wanted:]]
+			values = np.array([_float(field[k]) for field in fields], dtype=np.float64)
+			# missing values at the start of the rows are interpolated from the value before them,
+			# so the rows are read further back until there is one
+			if position > start and len(values) >= rows and np.isnan(values[:len(values) - rows + 1]).all(): wanted *= 2
+			else: break
+
+	dates = [field[i].decode() for field in fields]
+	# ISO dates sort as text, files that are out of order are rare and read whole
+	if any(a >= b for (a, b) in zip(dates, dates[1:])):
+		data = pd.read_csv(filepath, usecols=['Date', col]).dropna(subset=['Date'])
+		data = data.iloc[np.argsort(pd.to_datetime(data['Date']).to_numpy(), kind='stable')]
+		(dates, values) = (data['Date'].astype(str).tolist(), pd.to_numeric(data[col], errors='coerce').to_numpy(dtype=np.float64))
+	filled = fill_gaps(values)
+	if filled is not None: values = filled
+	return (dates[-rows:], values[-rows:])
+
+def _float(text):
+	"""
+	returns the number written in a .csv field, nan if it is empty or not a number (e.g. 'null')
+	"""
+	try: return float(text)
+	except ValueError: return np.nan
+
+def _try(function, *args):
+	"""
+	returns function(*args), or the exception it raised
+	"""
+	try: return function(*args)
+	except Exception as e: return e
+
+def _rolling_mean_2d(values, n, decimals=4):
+	"""
+	calculates the trailing mean of every n consecutive values of every row of a 2-D array
+	from one cumulative sum, rounded as StockData._calculate_SMA does, see _rolling_means
+	"""
+	means = np.full(values.shape, np.nan)
+	if values.shape[1] < n: return means
+	missing = np.isnan(values)
+	# offsetting every row by its first value keeps the running sums small
+	offset = values[np.arange(len(values)), np.argmax(~missing, axis=1)]
+	offset[np.isnan(offset)] = 0.0
+	zeros = np.zeros((len(values), 1))
+	csum = np.concatenate((zeros, np.cumsum(np.where(missing, 0.0, values - offset[:, None]), axis=1)), axis=1)
+	count = np.concatenate((zeros, np.cumsum(missing, axis=1)), axis=1)
+	means[:, n-1:] = (csum[:, n:] - csum[:, :-n]) / n + offset[:, None]
+	means[:, n-1:][(count[:, n:] - count[:, :-n]) > 0] = np.nan
+	return np.round(means, decimals) if decimals is not None else means
+
+def main():
+	parser = argparse.ArgumentParser(description="lists the stocks whose SMAs crossed in their last bars, freshest first")
+	parser.add_argument('source', help="folder, glob pattern (e.g. '../data/*.csv') or .csv file")
+	parser.add_argument('--SMA1', type=int, default=15)
+	parser.add_argument('--SMA2', type=int, default=50)
+	parser.add_argument('--days', type=int, default=5, help="the amount of last bars to look for crossovers in")
+	parser.add_argument('--side', choices=['Buy', 'Sell'])
+	args = parser.parse_args()
+
+	screener = Screener(args.source, args.SMA1, args.SMA2, args.days)
+	for (filepath, error) in screener.failures.items(): print(f"failed {filepath}: {error}")
+	print(f"{'ticker':<12} {'side':<4} {'date':<12} {'bars ago':>8} {'price':>12} {'spread':>8}")
+	for result in screener.crossovers(side=args.side):
+		print(f"{result.ticker:<12} {result.side:<4} {result.date:<12} {result.bars_ago:>8} {result.price:>12.4f} {result.spread:>8.2%}")
+
+if __name__ == "__main__":
+	# usage: python screener.py ../data --SMA1 15 --SMA2 50 --days 5
+	main()
@@ -1,6 +1,38 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+
+import indicators as registry
+from gaps import METHODS, has_gaps, fill_gaps, trailing_gap, missing_sessions, insert_sessions
+from indicators import _check_window, _rolling_mean, _rolling_means
+from mmap_store import MmapStore
+from price_series import PriceSeries
+from profiler import PROFILER
+from utils import to_ns_array
+from decimate import make_series, follow_xlim
+
+# bump whenever the layout of the binary cache changes so stale caches get rebuilt
+CACHE_VERSION = 2
+
+# pandas offsets of the timeframes StockData.resample aggregates to,
+# weeks end on friday, the last trading day of the week
+TIMEFRAMES = {'W': pd.offsets.Week(weekday=4), 'M': pd.offsets.MonthEnd()}
+
+# how every OHLCV column is aggregated into a bar of a longer timeframe
+AGGREGATION = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Adj Close': 'last', 'Volume': 'sum'}
+
+# columns of counts that float32 cannot hold exactly past 2**24 (about 16.7M),
+# a chunked read keeps them in float64 whatever its dtype
+EXACT_COLUMNS = ('Volume',)
 
 class StockData():
 	"""
@@ -10,68 +42,389 @@ class StockData():
 	.filepath : str
 		filepath to the source stock data .csv file used to initialize StockData
 	.data : DataFrame
-		dataframe containing the stock data, indexed by datetime string of format YYYY=MM-DD
-	.selected_data : DataFrame
-		dataframe ontaining the selected stock data, indexed by datetime string of format YYYY=MM-DD
+		dataframe containing the stock data, indexed by datetime. with backing='series'
+		it is only made from the PriceSeries on first use, which then becomes the backing store
+	.selected_data : DataFrame or PriceSeries
+		dataframe ontaining the selected stock data, indexed by datetime
+		(a view of the PriceSeries with backing='series')
+	.selected_date_nums : ndarray
+		matplotlib date numbers of the index of .selected_data, ready to be plotted
+	.write_through : bool
+		if True, every change to .data is immediately saved to the source .csv file
+	.dirty : bool
+		True if .data has changed since it was last loaded or saved
+	.cache : bool
+		if True, a binary sidecar cache (<filepath>.npz) is used to skip parsing the .csv
+	.sma_matrix : SMAMatrix
+		SMAs of many windows calculated at once by calculate_SMAs, None until then
+	.indicators : IndicatorCache
+		memoizes calculated SMAs and other indicators by the content of the values they are calculated from
+	.fill : str
+		how check_data fills missing values, 'linear', 'time' or 'ffill' (see gaps.fill_gaps)
+	.calendar : str or DateOffset
+		the sessions check_data inserts a row for when the data has none, None to insert none
 	"""
-	def __init__(self, filepath):
+	def __init__(self, filepath, write_through=False, cache=True, chunksize=None, dtype=np.float64, windows=(),
+	             indicators=None, backing='frame', fill='linear', calendar=None):
 		"""
 		initializes StockData object by parsing stock data .csv file into a dataframe
 		(assumes 'Date' column exists and uses it for index),
-		also checks and handles missing data
+		also checks and handles missing data. changes are kept in memory
+		until save() or flush() is called, unless write_through is True.
+		the parsed data is cached next to the .csv so later loads skip parsing.
+		with chunksize, the .csv is parsed in chunks instead (see _read_csv_chunked)
+		so peak memory stays close to the size of the parsed data however long the file is
 
 		Parameters
 		filepath : str
 			filepath to the stock data .csv file, can be relative or absolute
+		write_through : bool (False)
+			if True, saves the source .csv file after every change to the data
+		cache : bool (True)
+			if True, reads from and keeps up to date the binary cache of the .csv file,
+			a chunked read always parses the .csv
+		chunksize : int (None)
+			if given, the amount of rows parsed at once, interpolating while parsing
+		dtype : numpy dtype (np.float64)
+			the dtype of every column of a chunked read, e.g. np.float32, except the
+			columns of EXACT_COLUMNS (e.g. 'Volume') which are at least float64
+		windows : [int, int, ...] (())
+			windows of the SMAs a chunked read calculates while parsing, as _calculate_SMA would
+		indicators : IndicatorCache (None)
+			where calculated indicators are memoized, defaults to the cache shared by every StockData (INDICATORS)
+		backing : str ('frame')
+			'frame' keeps the data in a DataFrame, 'series' in a PriceSeries of plain numpy arrays
+			that loading, check_data, get_data and the SMA and crossover calculations use
+			without any DataFrame overhead
+		fill : str ('linear')
+			how check_data fills missing values: 'linear' interpolates by position, 'time' by date
+			and 'ffill' repeats the last value, a chunked read only interpolates linearly
+		calendar : str or DateOffset (None)
+			the exchange sessions, e.g. 'B' (every weekday) or pd.offsets.CustomBusinessDay(holidays=[...]),
+			check_data then inserts a row for every session without one and fills it
 
 		Raises
 		IOError :
 			failed I/O operation, e.g: invalid filepath, fail to open .csv
+		ValueError :
+			a column of a chunked read or of a 'series' backing is not numeric,
+			a window is not a positive integer, or backing or fill is unknown
 		"""
+		if backing not in ('frame', 'series'): raise ValueError(f"Unknown backing {backing}, expected 'frame' or 'series'.")
+		if fill not in METHODS: raise ValueError(f"Unknown fill method {fill}, expected one of {', '.join(METHODS)}.")
+		if chunksize is not None and fill != 'linear': raise ValueError("A chunked read only interpolates linearly.")
 		self.filepath = filepath
-		self.data = pd.read_csv(filepath).set_index('Date')
-		self.check_data()
+		self.write_through = write_through
+		self.dirty = False
+		self.cache = cache
+		self.indicators = indicators if indicators is not None else INDICATORS
+		self.fill = fill
+		self.calendar = calendar
+		# content hashes of the columns indicators are calculated from, see _fingerprint
+		self._fingerprints = {}
+		# where the missing values at the end of every column start, they repeat
+		# the last value until append_bars has a newer value to interpolate them with
+		self._open_gaps = {}
+		(self._frame, self._series) = (None, None)
+		clean = False
+		if chunksize is not None: (self.data, self._open_gaps) = _read_csv_chunked(filepath, chunksize, dtype, windows)
+		elif backing == 'series': (self._series, clean) = _read_series(filepath, cache)
+		else: (self.data, clean) = _read_csv(filepath, cache)
+		if backing == 'series' and self._series is None: (self._frame, self._series) = (None, PriceSeries.from_frame(self._frame))
+		self._date_nums = (None, None)
+		self._bars = {}
+		# how every calculated SMA column and the Buy/Sell columns were made,
+		# so they can be extended when new bars are appended
+		self._smas = {}
+		# the column every other calculated indicator (see indicators.py) was calculated from, by its name
+		self._indicators = {}
+		self._crossover = None
+		self.sma_matrix = None
+		self._selection = slice(0, 0)
+		if chunksize is not None:
+			for n in windows: self._smas[f'SMA{n}'] = (int(n), 'Close', 4, n - 1)
+		# the binary cache records whether its rows were sorted without missing values,
+		# check_data would then have nothing to do unless sessions are missing
+		if not clean or self.calendar is not None: self.check_data()
+
+	def __getstate__(self):
+		# the shared indicator cache is not sent along when pickled (e.g. by a process pool),
+		# the unpickled StockData uses the shared cache of its own process instead
+		state = self.__dict__.copy()
+		if state['indicators'] is INDICATORS: state['indicators'] = None
+		return state
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		if self.indicators is None: self.indicators = INDICATORS
+
+	@property
+	def data(self):
+		"""
+		the stock data as a dataframe, see the class attributes
+		"""
+		if self._frame is None:
+			# the dataframe replaces the PriceSeries, so changes to it are never lost
+			(self._frame, self._series) = (self._series.to_frame(), None)
+		return self._frame
+
+	@data.setter
+	def data(self, data):
+		(self._frame, self._series) = (data, None)
+		# the new data can hold other values, their content hashes are calculated again
+		self._fingerprints.clear()
+
+	def check_data(self, overwrite=False):
+		"""
+		checks and handles missing data: sorts the rows by date, inserts a row for every
+		session of .calendar the data has none for, then fills every run of missing values
+		with .fill (see gaps.py). each column is scanned without copying it first,
+		so clean data costs a single pass and nothing is changed
+
+		Parameters
+		overwrite : bool (False)
+			if True, saves the source stock data .csv file even if write_through is off
+
+		Returns
+		self : StockData
+		"""
+		self._fingerprints.clear()
+
+		with PROFILER.stage('check_data', rows=len(self._series if self._series is not None else self._frame)):
+			# range selection relies on binary search, which needs sorted dates
+			if self._series is not None:
+				if not self._series.is_sorted():
+					self._series.sort()
+					self._changed()
+			elif not self._frame.index.is_monotonic_increasing:
+				self.data = self._frame.sort_index(kind='stable')
+				self._changed()
+
+			if self.calendar is not None:
+				sessions = missing_sessions(self._dates(), self.calendar)
+				if len(sessions):
+					self._insert_sessions(sessions)
+					self._changed()
 
-	def check_data(self, overwrite=True):
+			# only the columns with a missing value are filled, the others are not copied
+			filled = False
+			for col in [col for col in self._columns() if has_gaps(self._values(col))]:
+				gap = trailing_gap(self._values(col))
+				if gap is not None: self._open_gaps[col] = gap
+				values = fill_gaps(self._values(col), self._dates() if self.fill == 'time' else None, self.fill)
+				if values is not None:
+					self._set_column(col, values)
+					filled = True
+			if filled: self._changed()
+		if overwrite: self.save()
+		return self
+
+	def save(self, filepath=None):
 		"""
-		checks and handles missing data by filling in missing values by interpolation
+		writes the stock data to a .csv file atomically: the data is written to a
+		temporary file in the same folder which then replaces the target file,
+		so readers never see a half-written .csv
 
 		Parameters
-		overwrite : bool (True)
-			if True, overwrites original source stock data .csv file
+		filepath : str (None)
+			filepath to write to, defaults to the source .csv file
+
+		Returns
+		self : StockData
+
+		Raises
+		IOError :
+			failed I/O operation, e.g: folder does not exist or is read-only
+		"""
+		target = Path(filepath if filepath is not None else self.filepath)
+		data = self._series.to_frame() if self._series is not None else self.data
+		fd, temp = tempfile.mkstemp(dir=target.parent, prefix=f'.{target.name}.', suffix='.tmp')
+		try:
+			with PROFILER.stage('to_csv', rows=len(data)) as stage, os.fdopen(fd, 'w', newline='') as file:
+				data.to_csv(file, index=True)
+				stage.nbytes = file.tell()
+			if target.exists(): shutil.copymode(target, temp)
+			os.replace(temp, target)
+		except BaseException:
+			if os.path.exists(temp): os.remove(temp)
+			raise
+
+		if target.resolve() == Path(self.filepath).resolve():
+			self.dirty = False
+			if self.cache: _write_cache(self.filepath, data)
+		return self
+
+	def flush(self):
+		"""
+		saves the stock data to the source .csv file only if it has unsaved changes
 
 		Returns
 		self : StockData
 		"""
-		# function to fill in missing values
-		# by averaging previous data and after (interpolation)
-		self.data = self.data.interpolate()
-		self.data.to_csv(self.filepath, index=overwrite)
+		if self.dirty: self.save()
 		return self
 
+	def _changed(self):
+		"""
+		marks the stock data as changed, saving it right away if write_through is on
+		"""
+		self.dirty = True
+		if self.write_through: self.save()
+
 	def get_data(self, start_date, end_date):
 		"""
-		returns a subset of the stock data from start_date to end_date inclusive
+		returns a subset of the stock data from start_date to end_date inclusive,
+		found by binary search on the dates. dates without data (e.g. weekends)
+		select the next trading day for start_date and the previous one for end_date,
+		an end_date at midnight (e.g. YYYY-MM-DD) includes every row on that day.
+		also updates .selected_date_nums to match the selected rows
 
 		Parameters
-		start_date : str
-			start date of stock data range, must be of format YYYY-MM-DD
-		end_date : str
-			end date of stokc data range, must be of format YYYY-MM-DD
+		start_date : str or datetime
+			start date of stock data range, e.g. of format YYYY-MM-DD
+		end_date : str or datetime
+			end date of stokc data range, e.g. of format YYYY-MM-DD
 
 		Returns:
-		selected_data : DataFrame
-			stock data dataframe indexed from specified start to end date inclusive
+		selected_data : DataFrame or PriceSeries
+			stock data dataframe indexed from specified start to end date inclusive,
+			empty if there is no data within the range or end_date < start_date,
+			a PriceSeries viewing the selected rows with backing='series'
 
 		Raises
-		KeyError :
-			data for this date does not exist
-		AssertionError :
-			selected range is empty
+		ValueError :
+			start_date or end_date is not a valid date
 		"""
-		self.selected_data = self.data[str(start_date):str(end_date)]
+		with PROFILER.stage('get_data') as stage:
+			if self._series is not None:
+				(start, end) = self._series.find(start_date, end_date)
+				self._selection = slice(start, end)
+				self.selected_data = self._series.slice(start, end)
+			else:
+				(start_date, end_date) = (pd.Timestamp(start_date), pd.Timestamp(end_date))
+				start = self.data.index.searchsorted(start_date, side='left')
+				if end_date == end_date.normalize():
+					end = self.data.index.searchsorted(end_date + pd.Timedelta(days=1), side='left')
+				else: end = self.data.index.searchsorted(end_date, side='right')
+				end = max(start, end)
+
+				self._selection = slice(start, end)
+				self.selected_data = self.data.iloc[start:end]
+			self.selected_date_nums = self.get_date_nums()[start:end]
+			stage.rows = end - start
 		return self.selected_data
 
+	def get_column(self, col_head, selected=False):
+		"""
+		returns a column of the stock data by its head title, looking in .data first
+		and then in .sma_matrix, so SMAs from calculate_SMAs can be used by name
+
+		Parameters
+		col_head : str
+			the column head title, e.g. 'Close' or 'SMA15'
+		selected : bool (False)
+			if True, returns only the rows selected by the last get_data
+
+		Returns
+		column : Series
+
+		Raises
+		KeyError :
+			the column does not exist
+		"""
+		if self._series is not None and col_head in self._series:
+			column = pd.Series(self._series[col_head], index=self._series.index(), name=col_head, copy=False)
+		elif self._series is None and col_head in self.data.columns: column = self.data[col_head]
+		elif self.sma_matrix is not None and col_head in self.sma_matrix: column = self.sma_matrix[col_head]
+		else: raise KeyError(col_head)
+		return column.iloc[self._selection] if selected else column
+
+	def has_column(self, col_head):
+		"""
+		returns True if get_column can find col_head
+		"""
+		return col_head in self._columns() or (self.sma_matrix is not None and col_head in self.sma_matrix)
+
+	def resample(self, timeframe='D'):
+		"""
+		returns the OHLCV columns aggregated into bars of a longer timeframe,
+		each bar is calculated once and reused until the dates or the values change
+
+		Parameters
+		timeframe : str ('D')
+			'D' (the rows themselves), 'W' (weekly) or 'M' (monthly)
+
+		Returns
+		bars : DataFrame
+			indexed by the last day of each bar, periods without data are left out
+
+		Raises
+		KeyError :
+			timeframe is not one of 'D', 'W' or 'M'
+		"""
+		columns = [col for col in AGGREGATION if col in self.data.columns]
+		if timeframe == 'D': return self.data[columns]
+
+		# columns replaced in place keep the index, so their content hashes are part of the key
+		key = (len(self.data), tuple(self._fingerprint(col) for col in columns))
+		(index, cached, bars) = self._bars.get(timeframe, (None, None, None))
+		if index is not self.data.index or cached != key:
+			with PROFILER.stage('resample', rows=len(self.data)):
+				aggregation = {col: AGGREGATION[col] for col in columns}
+				bars = self.data[columns].resample(TIMEFRAMES[timeframe]).agg(aggregation)
+				bars = bars.dropna(subset=['Close'])
+			self._bars[timeframe] = (self.data.index, key, bars)
+		return bars
+
+	def get_bars(self, start_date, end_date, timeframe='D'):
+		"""
+		returns the bars of a timeframe from start_date to end_date inclusive
+		and their dates as matplotlib's date numbers, see resample and get_data
+
+		Returns
+		(bars, date_nums) : (DataFrame, ndarray)
+		"""
+		if timeframe == 'D':
+			self.get_data(start_date, end_date)
+			bars = self.data.iloc[self._selection][[col for col in AGGREGATION if col in self.data.columns]]
+			return (bars, self.selected_date_nums)
+
+		bars = self.resample(timeframe)
+		(start_date, end_date) = (pd.Timestamp(start_date), pd.Timestamp(end_date))
+		start = bars.index.searchsorted(start_date, side='left')
+		end = max(start, bars.index.searchsorted(end_date, side='right'))
+		bars = bars.iloc[start:end]
+		return (bars, mdates.date2num(bars.index.to_numpy()))
+
+	def get_date_nums(self):
+		"""
+		returns the dates of every row converted to matplotlib's date numbers,
+		computed once and reused until the dates change
+
+		Returns
+		date_nums : ndarray
+		"""
+		dates = self._series.dates if self._series is not None else self.data.index
+		(index, date_nums) = self._date_nums
+		if index is not dates:
+			date_nums = mdates.date2num(self._index().to_numpy())
+			self._date_nums = (dates, date_nums)
+		return date_nums
+
+	def to_store(self, folder):
+		"""
+		writes the stock data to a memory-mapped store, whose get_data(start, end)
+		returns zero-copy views instead of holding the whole history in memory
+
+		Parameters
+		folder : str
+			folder to build the store in, created if it does not exist
+
+		Returns
+		store : MmapStore
+		"""
+		return MmapStore.from_frame(folder, self.data)
+
 	def get_period(self):
 		"""
 		returns a string tuple of the first and last index
@@ -79,14 +432,15 @@ class StockData():
 
 		Returns
 		period : (str, str)
+			dates of format YYYY-MM-DD
 
 		Raises
 		TypeError :
 			the return tuple is probably (nan, nan) because .csv is empty
 		"""
-		index = list(self.data.index)
+		index = self._index()
 		(first, last) = (index[0], index[-1])
-		return (first, last)
+		return (f'{first:%Y-%m-%d}', f'{last:%Y-%m-%d}')
 
 	def _calculate_SMA(self, n, col='Close'):
 		"""
@@ -103,23 +457,117 @@ class StockData():
 		self : StockData
 		"""
 		col_head = f'SMA{n}'
-		if col_head not in self.data.columns:
-			sma = self.data[col].rolling(n).mean()
-			self.data[f'SMA{n}'] = np.round(sma, 4)
-			self.data.to_csv(self.filepath, index=True)
+		self._smas[col_head] = (_check_window(n), col, 4, n - 1)
+		if self._fill_SMA(col_head): self._changed()
+		return self
+
+	def calculate_indicator(self, name, col='Close'):
+		"""
+		calculates a registered indicator (see indicators.py) by its name and augments
+		the stock data with a column per output of it, e.g. 'EMA20', or 'MACD12-26-9',
+		'MACD12-26-9.signal' and 'MACD12-26-9.hist'. SMAs are calculated as _calculate_SMA does
+
+		Parameters
+		name : str
+			e.g. 'SMA15', 'EMA20', 'WMA10', 'BB20-2', 'RSI14' or 'MACD12-26-9',
+			parameters left out are the indicator's defaults (e.g. 'RSI' is 'RSI14')
+		col : str ('Close')
+			the column head title of the values to calculate the indicator from
+
+		Returns
+		self : StockData
+
+		Raises
+		UnknownIndicator (ValueError) :
+			name is not a registered indicator, see indicators.parse
+		"""
+		(indicator, params, output) = registry.parse(name)
+		if indicator.kind == 'SMA': return self._calculate_SMA(_check_window(params[0]), col)
+
+		name = registry.column_name(indicator, params)
+		self._indicators[name] = col
+		if self._fill_indicator(name): self._changed()
+		return self
+
+	def calculate_indicators(self, names, col='Close'):
+		"""
+		calculates many registered indicators of the same column, see calculate_indicator.
+		the column is hashed once and every SMA that is not memoized yet
+		comes out of a single cumulative sum over the values
+
+		Parameters
+		names : [str, str, ...]
+			e.g. ['SMA15', 'SMA50', 'EMA20', 'MACD']
+		col : str ('Close')
+			the column head title of the values to calculate the indicators from
+
+		Returns
+		self : StockData
+
+		Raises
+		UnknownIndicator (ValueError) :
+			a name is not a registered indicator, nothing is calculated then
+		"""
+		parsed = [registry.parse(name) for name in names]
+		windows = sorted({_check_window(params[0]) for (indicator, params, output) in parsed if indicator.kind == 'SMA'})
+		fingerprint = self._fingerprint(col)
+		missing = [n for n in windows if (fingerprint, 'SMA', n, 4, n - 1) not in self.indicators]
+		if missing:
+			# the same values _calculate_SMA would memoize, see _sma
+			for (n, sma) in zip(missing, _rolling_means(self._values(col), missing)):
+				sma[:n - 1] = np.nan
+				self.indicators.put((fingerprint, 'SMA', n, 4, n - 1), np.round(sma, 4))
+
+		for name in names: self.calculate_indicator(name, col)
+		return self
+
+	def drop_indicators(self, keep=()):
+		"""
+		drops the calculated indicator columns and the Buy/Sell columns that are not in keep,
+		so indicators that are no longer used are not written into the .csv file.
+		the dropped indicators stay memoized in .indicators and come back without recalculating
+
+		Parameters
+		keep : [str, str, ...] (())
+			the column head titles to keep, e.g. ['SMA15', 'EMA50', 'Buy', 'Sell'],
+			keeping one output of an indicator keeps all of them (e.g. 'MACD12-26-9')
+
+		Returns
+		self : StockData
+		"""
+		dropped = [col_head for col_head in self._smas if col_head not in keep]
+		for col_head in dropped: del self._smas[col_head]
+		for name in [name for name in self._indicators if not any(col_head in keep for col_head in registry.outputs(name))]:
+			del self._indicators[name]
+			dropped += registry.outputs(name)
+		if self._crossover is not None:
+			(method, SMA1, SMA2, col) = self._crossover
+			if 'Buy' not in keep or 'Sell' not in keep or any(name in dropped for name in (SMA1, SMA2, col)):
+				dropped += ['Buy', 'Sell']
+				self._crossover = None
+
+		dropped = [col_head for col_head in dropped if col_head in self._columns()]
+		if dropped:
+			if self._series is not None:
+				for col_head in dropped: del self._series[col_head]
+			else: self.data = self.data.drop(columns=dropped)
+			self._changed()
 		return self
 
 	def _calculate_crossover(self, SMA1, SMA2, col='Close'):
 		"""
 		calculates the crossover positions and values,
 		augments the stock dataframe with 2 new columns
-		'Sell' and 'Buy' containing the value at which SMA crossover happens
+		'Sell' and 'Buy' containing the value at which SMA crossover happens.
+		any two series can be crossed, e.g. 'EMA20' and 'SMA50' or 'MACD12-26-9' and
+		'MACD12-26-9.signal': a Buy is where the faster one crosses above the slower one,
+		see _fast_slow. registered indicators that are not calculated yet are calculated first
 
 		Parameters
 		SMA1 : str
-			the first column head title containing the SMA values
+			the first column head title containing the SMA (or other indicator) values
 		SMA2 : str
-			the second column head title containing the SMA values
+			the second column head title containing the SMA (or other indicator) values
 		col : str ('Close')
 			the column head title whose values will copied into 'Buy' and 'Sell'
 			columns to indicate crossovers had happen on that index
@@ -131,26 +579,20 @@ class StockData():
 		Exception :
 			SMA1 and SMA2 provided are the same, they must be different
 		"""
-		if SMA1 < SMA2: signal = self.data[SMA1] - self.data[SMA2]
-		elif SMA1 > SMA2: signal = self.data[SMA2] - self.data[SMA1]
-		else: raise Exception(f"{SMA1} & {SMA2} provided are the same. They must be different SMA.")
-
-		signal[signal > 0] = 1
-		signal[signal <= 0] = 0
-		diff = signal.diff()
+		(fast, slow) = self._fast_slow(SMA1, SMA2)
+		if fast == slow: raise Exception(f"{SMA1} & {SMA2} provided are the same. They must be different SMA.")
+		self._crossover = ('sign', fast, slow, col)
 
-		self.data['Sell'] = np.nan
-		self.data['Buy'] = np.nan
-		self.data.loc[diff.index[diff < 0], 'Sell'] = self.data.loc[diff.index[diff < 0], col]
-		self.data.loc[diff.index[diff > 0], 'Buy'] = self.data.loc[diff.index[diff > 0], col]
-
-		self.data.to_csv(self.filepath, index=True)
+		self._fill_crossover()
+		self._changed()
 		return self
 
 	def plot_graph(self, col_headers, style, ax, show=True):
 		"""
 		plots columns of selected values as line plot and/or columns of values
-		as scatter plot as specified by style to an Axes object
+		as scatter plot as specified by style to an Axes object. lines are
+		decimated to about what the axes can show (see decimate.py) and follow
+		zooming and panning, scatter plots always show every value
 
 		Parameters
 		col_headers : [str, str, ...]
@@ -161,6 +603,8 @@ class StockData():
 			col_headers (hence, must be same length)
 		ax : Axes
 			matplotlib axes object on which the plot will be drawn
+		show : bool (True)
+			if True, shows the plot in a pyplot window once it is drawn
 
 		Raises
 		AttributeError :
@@ -170,17 +614,27 @@ class StockData():
 			self.selected_data is empty, perhaps due to OOB or invalid range
 		"""
 		assert not self.selected_data.empty
-		self.selected_data[col_headers].plot(style=style,
-		                                     ax=ax,
-		                                     grid=True,
-		                                     x_compat=True,
-		                                     linewidth=1)
-		if show: plt.show()
+		x_data = self.selected_date_nums
+		ax.set_xlim(x_data[0], x_data[-1])
+		for (col, fmt) in zip(col_headers, style):
+			series = make_series(x_data, self.get_column(col, selected=True).to_numpy(), fmt)
+			(line,) = ax.plot([], [], fmt, label=col, linewidth=1)
+			follow_xlim(ax, line, series)
+
+		ax.xaxis_date()
+		ax.relim()
+		ax.autoscale_view(scalex=False)
+		ax.grid(True)
+		ax.legend()
+		if show:
+			# pyplot (and its GUI backend) is only loaded by those who show a window
+			import matplotlib.pyplot as plt
+			plt.show()
 
-	def calculate_SMA(self, n):
+	def calculate_SMA(self, n, col='Close'):
 		"""
 		calculates simple moving average (SMA) and augments the stock dataframe
-		with this SMA(n) data as a new column
+		with this SMA(n) data as a new column, the first n rows are left as nan
 
 		Parameters
 		n : int
@@ -190,30 +644,16 @@ class StockData():
 
 		Returns
 		self : StockData
+
+		Raises
+		ValueError :
+			n is not a positive integer
 		"""
 		col_head = 'SMA' + str(n)
-		df = self.data.reset_index()
-
-		if col_head not in df.columns:
-			# Extract full dataframe from the actual data
-			# (to check if there is enough data for sma)
-			dateList = self.data.index.values.tolist()
-			returnList = []
-			for date in dateList: # for date in dateList
-			# find the index of date in the full data
-				dateIndex = df[df["Date"]==date].index.values[0]
-				if dateIndex < n: # if date index is less than n: append None
-					returnList.append(np.nan)
-				else:
-					sum = 0
-					for i in range(n):
-						sum += df.iloc[dateIndex-i]["Close"]
-					# append the SMA for each day to a list
-					returnList.append(sum/n)
-
-			self.data[col_head] = returnList
-			print(self.data)
-			self.data.to_csv(self.filepath, index=True)
+
+		# a row needs n rows before it to have an SMA
+		self._smas[col_head] = (_check_window(n), col, None, n)
+		if self._fill_SMA(col_head): self._changed()
 
 		return self
 
@@ -221,85 +661,872 @@ class StockData():
 		"""
 		calculates the crossover positions and values,
 		augments the stock dataframe with 2 new columns
-		'Sell' and 'Buy' containing the value at which SMA crossover happens
+		'Sell' and 'Buy' containing the value of SMAa at which SMA crossover happens.
+		any two series can be crossed, see _calculate_crossover
 
 		Parameters
-		SMA1 : str
-			the first column head title containing the SMA values
-		SMA2 : str
-			the second column head title containing the SMA values
+		SMAa : str
+			the first column head title containing the SMA (or other indicator) values
+		SMAb : str
+			the second column head title containing the SMA (or other indicator) values
+
+		Returns
+		self : StockData
+
+		Raises
+		ValueError :
+			SMAa and SMAb provided are the same, they must be different
+		"""
+		# extracts the SMA from the specific column in self.data
+		(fast, slow) = self._fast_slow(SMAa, SMAb)
+		if fast == slow: raise ValueError(f"Given {SMAa} & {SMAb} are the same. Must be different SMA.")
+		self._crossover = ('position', fast, slow, registry.canonical(SMAa) if registry.is_indicator(SMAa) else SMAa)
+
+		self._fill_crossover()
+		self._changed()
+		return self
+
+	def calculate_SMAs(self, windows, col='Close', dtype=np.float64):
+		"""
+		calculates simple moving averages (SMA) of many windows from a single
+		cumulative sum into one 2-D array (.sma_matrix) instead of one dataframe
+		column per window. the SMAs can still be used by name (e.g. 'SMA15')
+		through get_column, plot_graph and the crossover calculations
+
+		Parameters
+		windows : [int, int, ...]
+			the amounts of stock data to use to calculate each average, e.g. range(5, 251)
 		col : str ('Close')
-			the column head title whose values will copied into 'Buy' and 'Sell'
-			columns to indicate crossovers had happen on that index
+			the column head title of the values to use to calculate average
+		dtype : dtype (float64)
+			dtype of the SMA array, float32 halves its memory
 
 		Returns
 		self : StockData
 
 		Raises
-		Exception :
-			SMA1 and SMA2 provided are the same, they must be different
+		ValueError :
+			a window is not a positive integer
 		"""
-		col_head1 = 'Position'
-		col_head2 = 'Signal'
-		col_head3 = 'Buy'
-		col_head4 = 'Sell'
-		df = self.data
+		windows = [_check_window(n) for n in windows]
+		key = (self._fingerprint(col), 'SMAs', tuple(windows), np.dtype(dtype).str)
+		values = self.indicators.get(key)
+		if values is None:
+			with PROFILER.stage('calculate SMAs', rows=len(self._values(col)) * len(windows)):
+				values = _rolling_means(self._values(col), windows).astype(dtype, copy=False)
+			values = self.indicators.put(key, values)
+		self.sma_matrix = SMAMatrix(windows, values, self._index(), col)
+		return self
 
-		# to ensure the correct number of elements in the loop
-		SMAlist = self.data.index.values.tolist()
-		# extracts the SMA from the specific column in self.data
-		if SMAa < SMAb:
-			SMA1 = df[SMAa].tolist()
-			SMA2 = df[SMAb].tolist()
-		elif SMAa > SMAb:
-			SMA1 = df[SMAb].tolist()
-			SMA2 = df[SMAa].tolist()
-		else: # SMAa == SMAb
-			raise ValueError(f"Given {SMAa} & {SMAb} are the same. Must be different SMA.")
-
-		stockPosition = []  # which SMA line is on top
-		stockSignal = []  	# the buy/sell signal --> the 1s and -1s
-		buySignal = []  		# filtered out location of buy signals
-		sellSignal = []  		# filtered out location of sell signals
-
-		# goes through every element
-		for i in range(len(SMAlist)):
-			if SMA1[i] > SMA2[i]: stockPosition.append(1)   # SMA1 above SMA2
-			elif SMA1[i] < SMA2[i]: stockPosition.append(0) # SMA2 above SMA1
-			# if the SMAs are equal, repeat the previous entry
-			# because no crossover has occured yet
-			elif SMA1[i] == SMA2[i]: stockPosition.append(stockPosition[i-1])
-			else: stockPosition.append(np.nan) # if no data, leave blank
-
-		# find the places where crossover occurs
-		for j in range(len(stockPosition)):
-			# 'shifts' the data one period to the right
-			# to ensure crossovers are reflected on the correct date
-			if j == 0: stockSignal.append(np.nan)
-			# calculation for the crossover signals
-			else: stockSignal.append(stockPosition[j] - stockPosition[j-1])
-
-
-		for k in range(len(stockSignal)): # finding location of buy signals
-			if stockSignal[k] == 1:
-				value = self.data[SMAa].tolist()[k]
-				buySignal.append(value)
-			else: buySignal.append(np.nan) # if no signal leave blank
-
-		for k in range(len(stockSignal)): # finding location of sell signals
-			if stockSignal[k] == -1:
-				value = self.data[SMAa].tolist()[k]
-				sellSignal.append(value)
-			else: sellSignal.append(np.nan) # if no signal leave blank
-
-		self.data[col_head3] = buySignal
-		self.data[col_head4] = sellSignal
-
-		print(self.data)
-		self.data.to_csv(self.filepath, index=True)
+	def append_bars(self, rows):
+		"""
+		appends new bars to the stock data and brings every calculated SMA column and
+		the Buy/Sell crossover columns up to date. only the new bars, plus any missing
+		values right before them, are interpolated and recalculated, so the cost
+		does not grow with the length of the history. missing values at the end repeat
+		the last value until a newer value is appended, they are then interpolated
+		as loading the whole data again would
+
+		Parameters
+		rows : DataFrame or [dict, dict, ...]
+			the new bars, with a 'Date' column or indexed by date,
+			must be sorted and newer than the last bar of the stock data
+
+		Returns
+		self : StockData
+
+		Raises
+		ValueError :
+			the new bars are not sorted, not newer than the last bar or not numeric,
+			the stock data is then left unchanged
+		"""
+		rows = pd.DataFrame(rows)
+		if 'Date' in rows.columns: rows = rows.set_index('Date')
+		rows.index = pd.DatetimeIndex(rows.index, name='Date')
+		if rows.empty: return self
+		if not rows.index.is_monotonic_increasing or (len(self.data) > 0 and rows.index[0] <= self.data.index[-1]):
+			raise ValueError(f"New bars must be sorted and newer than {self.data.index[-1]}.")
+
+		# every new value must be a number, checked before the stock data is changed
+		try: rows = rows.apply(pd.to_numeric)
+		except (ValueError, TypeError) as e: raise ValueError(f"New bars must be numeric: {e}") from None
+
+		# the stock data is put back as it was if updating it fails, so one bad batch cannot break later appends
+		state = (self.data, self.sma_matrix, dict(self._open_gaps), dict(self._smas))
+		try:
+			# missing values at the end of the data had nothing to be interpolated with and repeat
+			# the last value (see ._open_gaps), so the region to interpolate starts at the value
+			# before them, or else at the last bar so a gap at the start of the new bars is filled
+			end = len(self.data)
+			start = max(end - 1, 0)
+			for col in rows.columns.intersection(list(self._open_gaps)): start = min(start, self._open_gaps[col] - 1)
+
+			self.data = pd.concat([self.data, rows])
+			self._fingerprints.clear()
+			dates = to_ns_array(self.data.index[start:]) if self.fill == 'time' else None
+			for col in rows.columns:
+				values = self.data[col].to_numpy(dtype=np.float64, copy=True)[start:]
+				gap = self._open_gaps.pop(col, None)
+				if gap is not None: values[gap - start:end - start] = np.nan
+				gap = trailing_gap(values)
+				if gap is not None: self._open_gaps[col] = start + gap
+				filled = fill_gaps(values, dates, self.fill)
+				if filled is not None: self.data.iloc[start:, self.data.columns.get_loc(col)] = filled
+
+			# SMA columns that were loaded from the .csv are assumed to be made by _calculate_SMA
+			for col_head in self.data.columns:
+				match = re.fullmatch(r'SMA(\d+)', str(col_head))
+				if match and col_head not in self._smas:
+					n = int(match.group(1))
+					self._smas[col_head] = (n, 'Close', 4, n - 1)
+
+			for col_head in self._smas: self._fill_SMA(col_head, start)
+			# recursive indicators (e.g. EMA) depend on every row before, so they are recalculated whole
+			for name in self._indicators: self._fill_indicator(name)
+			if self.sma_matrix is not None: self._fill_SMAs(start)
+			if self._crossover is not None: self._fill_crossover(start)
+		except BaseException:
+			(self.data, self.sma_matrix, self._open_gaps, self._smas) = state
+			self._fingerprints.clear()
+			raise
+		self._changed()
 		return self
 
+	def _fill_SMA(self, col_head, start=0):
+		"""
+		calculates the SMA column col_head from row start onwards as recorded in ._smas,
+		only the n - 1 rows before start are read to fill the first window.
+		a whole column (start 0) is taken from .indicators if it was calculated before
+
+		Parameters
+		col_head : str
+			the SMA column head title, e.g. 'SMA15'
+		start : int (0)
+			position of the first row to calculate
+
+		Returns
+		changed : bool
+			False if the column already held exactly these values
+		"""
+		(n, col, decimals, warmup) = self._smas[col_head]
+		if start == 0:
+			key = (self._fingerprint(col), 'SMA', n, decimals, warmup)
+			sma = self.indicators.get(key)
+			if sma is None:
+				with PROFILER.stage(f'calculate {col_head}', rows=len(self._values(col))):
+					sma = self.indicators.put(key, _sma(self._values(col), n, decimals, warmup))
+			# a column of an empty .csv file is read as objects, which cannot be compared with nan
+			if col_head in self._columns() and np.array_equal(np.asarray(self._values(col_head), dtype=np.float64), sma, equal_nan=True):
+				return False
+			self._set_column(col_head, sma.copy())
+			return True
+
+		first = max(start - n + 1, 0)
+		sma = _sma(self.data[col].to_numpy()[first:], n, decimals, warmup - first)[start - first:]
+		self.data.iloc[start:, self.data.columns.get_loc(col_head)] = sma
+		return True
+
+	def _fill_indicator(self, name):
+		"""
+		calculates every output column of the indicator name as recorded in ._indicators,
+		taken from .indicators if it was calculated from the same values before
+
+		Parameters
+		name : str
+			the canonical name of the indicator, e.g. 'MACD12-26-9'
+
+		Returns
+		changed : bool
+			False if the columns already held exactly these values
+		"""
+		col = self._indicators[name]
+		key = (self._fingerprint(col), name)
+		values = self.indicators.get(key)
+		if values is None:
+			with PROFILER.stage(f'calculate {name}', rows=len(self._values(col))):
+				values = self.indicators.put(key, np.array(list(registry.compute(name, self._values(col)).values())))
+
+		changed = False
+		for (col_head, output) in zip(registry.outputs(name), values):
+			if col_head in self._columns() and np.array_equal(np.asarray(self._values(col_head), dtype=np.float64), output, equal_nan=True): continue
+			self._set_column(col_head, output.copy())
+			changed = True
+		return changed
+
+	def _fast_slow(self, line1, line2):
+		"""
+		returns the column head titles of line1 and line2 as (fast, slow): the one whose
+		indicator needs the fewer rows to warm up (see indicators.warmup) is the faster,
+		line1 if they need as many. registered indicators are calculated if they are missing
+		"""
+		lines = []
+		for line in (line1, line2):
+			if registry.is_indicator(line):
+				line = registry.canonical(line)
+				if not self.has_column(line): self.calculate_indicator(line)
+			lines.append(line)
+		(line1, line2) = lines
+		return (line2, line1) if registry.warmup(line2) < registry.warmup(line1) else (line1, line2)
+
+	def _fingerprint(self, col):
+		"""
+		returns the content hash of the values of column col, see IndicatorCache.fingerprint,
+		remembered until the data or the column is replaced
+		"""
+		if col not in self._fingerprints: self._fingerprints[col] = IndicatorCache.fingerprint(self._values(col))
+		return self._fingerprints[col]
+
+	def _columns(self):
+		"""
+		returns the column head titles of the backing store, without making .data
+		"""
+		return list(self._series.columns) if self._series is not None else self.data.columns
+
+	def _values(self, col):
+		"""
+		returns the values of a column of the backing store as an array, without making .data
+		"""
+		return self._series[col] if self._series is not None else self.data[col].to_numpy()
+
+	def _set_column(self, col, values):
+		"""
+		adds or replaces a column of the backing store, without making .data
+		"""
+		self._fingerprints.pop(col, None)
+		if self._series is not None: self._series[col] = values
+		else: self.data[col] = values
+
+	def _dates(self):
+		"""
+		returns the dates of the backing store as int64 nanoseconds since epoch, without making .data
+		"""
+		return self._series.dates if self._series is not None else to_ns_array(self.data.index)
+
+	def _insert_sessions(self, sessions):
+		"""
+		inserts a row of missing values into the backing store at every session (int64 timestamps)
+		"""
+		if self._series is not None:
+			self._series = PriceSeries(*insert_sessions(self._series.dates, self._series.columns, sessions))
+		else:
+			empty = pd.DataFrame(index=pd.DatetimeIndex(sessions.view('datetime64[ns]'), name='Date'))
+			self.data = pd.concat([self.data, empty]).sort_index(kind='stable')
+
+	def _index(self):
+		"""
+		returns the dates of the backing store as a DatetimeIndex, without making .data
+		"""
+		return self._series.index() if self._series is not None else self.data.index
+
+	def _fill_SMAs(self, start):
+		"""
+		extends .sma_matrix to the current rows, recalculating from row start onwards,
+		only the rows needed to fill the longest window before start are read
+		"""
+		matrix = self.sma_matrix
+		first = max(start - max(matrix.windows) + 1, 0)
+		tail = _rolling_means(self.data[matrix.col].to_numpy()[first:], matrix.windows)[:, start - first:]
+
+		values = np.empty((len(matrix.windows), len(self.data)), dtype=matrix.values.dtype)
+		values[:, :start] = matrix.values[:, :start]
+		values[:, start:] = tail
+		self.sma_matrix = SMAMatrix(matrix.windows, values, self.data.index, matrix.col)
+
+	def _fill_crossover(self, start=0):
+		"""
+		calculates the 'Buy' and 'Sell' columns from row start onwards as recorded in ._crossover,
+		a 'sign' crossover (_calculate_crossover) only needs the row before start, a 'position'
+		crossover (calculate_crossover) goes further back while the SMAs are equal
+
+		Parameters
+		start : int (0)
+			position of the first row to calculate
+		"""
+		with PROFILER.stage('crossover', rows=len(self._index()) - start):
+			(method, SMA1, SMA2, col) = self._crossover
+			(first, fast, slow) = (max(start - 1, 0), self.get_column(SMA1).to_numpy(), self.get_column(SMA2).to_numpy())
+
+			if method == 'sign':
+				position = _sign_position(fast[first:], slow[first:])
+				order = ('Sell', 'Buy')
+			else:
+				while first > 0 and fast[first] == slow[first]: first -= 1
+				position = _crossover_position(fast[first:], slow[first:])
+				order = ('Buy', 'Sell')
+			signal = _crossover_signal(position)[start - first:]
+
+			values = self.get_column(col).to_numpy(dtype=np.float64)[start:]
+			columns = {'Buy': np.where(signal == 1, values, np.nan),
+			           'Sell': np.where(signal == -1, values, np.nan)}
+			for name in order:
+				if start == 0: self._set_column(name, columns[name])
+				else: self.data.iloc[start:, self.data.columns.get_loc(name)] = columns[name]
+
+class SMAMatrix():
+	"""
+	simple moving averages of many windows stored as one 2-D array,
+	one row per window, whose rows can be looked up by name (e.g. 'SMA15')
+
+	Attributes
+	.windows : [int, int, ...]
+		the window of every row of .values
+	.values : ndarray
+		array of shape (len(windows), len(index))
+	.index : DatetimeIndex
+		the dates of every column of .values
+	.col : str
+		the column head title of the values the SMAs were calculated from
+	"""
+	def __init__(self, windows, values, index, col='Close'):
+		self.windows = list(windows)
+		self.values = values
+		self.index = index
+		self.col = col
+		self._rows = {f'SMA{n}': i for (i, n) in enumerate(self.windows)}
+
+	def __contains__(self, col_head):
+		return col_head in self._rows
+
+	def __getitem__(self, col_head):
+		"""
+		returns the SMA named col_head as a series viewing its row of .values (no copy)
+
+		Raises
+		KeyError :
+			the window of col_head was not calculated
+		"""
+		return pd.Series(self.values[self._rows[col_head]], index=self.index, name=col_head, copy=False)
+
+	@property
+	def columns(self):
+		"""
+		the names of the SMAs, e.g. ['SMA5', 'SMA6', ...]
+		"""
+		return list(self._rows)
+
+class IndicatorCache():
+	"""
+	memoizes calculated indicators (e.g. SMAs) by a content hash of the values they are
+	calculated from plus the indicator name and parameters, so the same indicator of the same
+	prices is never calculated twice, whichever StockData or file the prices came from.
+	the least recently used results are evicted once the cached arrays exceed max_bytes,
+	with a folder they are also kept on disk and read back after being evicted or restarting
+
+	Attributes
+	.max_bytes : int
+		the memory budget of the cached arrays
+	.folder : Path
+		where results are persisted as .npy files, None to keep them in memory only
+	.nbytes : int
+		the memory used by the cached arrays
+	.hits : int
+		the amount of lookups answered from memory or disk
+	.misses : int
+		the amount of lookups that had to be calculated
+	.evictions : int
+		the amount of results dropped from memory to stay within max_bytes
+	"""
+	def __init__(self, max_bytes=128 * 1024 ** 2, folder=None):
+		"""
+		Parameters
+		max_bytes : int (128 MiB)
+			the memory budget of the cached arrays
+		folder : str (None)
+			if given, results are also written to and read from .npy files in this folder
+		"""
+		self.max_bytes = max_bytes
+		self.folder = Path(folder) if folder is not None else None
+		if self.folder is not None: self.folder.mkdir(parents=True, exist_ok=True)
+		self.nbytes = 0
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self._results = OrderedDict()
+		self._lock = threading.Lock()
+
+	def __len__(self):
+		return len(self._results)
+
+	def __contains__(self, key):
+		return key in self._results
+
+	def __getstate__(self):
+		# a lock cannot be pickled, e.g. to send a StockData back from a process pool
+		state = self.__dict__.copy()
+		del state['_lock']
+		return state
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self._lock = threading.Lock()
+
+	@staticmethod
+	def fingerprint(values):
+		"""
+		returns a content hash of an array: its dtype, shape and bytes
+		"""
+		values = np.ascontiguousarray(values)
+		digest = hashlib.blake2b(f'{values.dtype.str}{values.shape}'.encode(), digest_size=16)
+		digest.update(memoryview(values).cast('B'))
+		return digest.hexdigest()
+
+	def get(self, key):
+		"""
+		returns the result stored under key as a read-only array, None if it has to be calculated
+
+		Parameters
+		key : tuple
+			(fingerprint, indicator name, parameters...), e.g. (fingerprint, 'SMA', 15, 4, 14)
+		"""
+		with self._lock:
+			if key in self._results:
+				self._results.move_to_end(key)
+				self.hits += 1
+				return self._results[key]
+
+		values = self._load(key)
+		with self._lock:
+			if values is None:
+				self.misses += 1
+				return None
+			self.hits += 1
+			self._store(key, values)
+			return values
+
+	def put(self, key, values):
+		"""
+		stores the result values under key, persisting it if there is a folder
+
+		Returns
+		values : ndarray
+			read-only copy of values as stored
+		"""
+		values = np.array(values)
+		values.flags.writeable = False
+		with self._lock: self._store(key, values)
+		if self.folder is not None: self._save(key, values)
+		return values
+
+	def clear(self):
+		"""
+		drops every result from memory, persisted results are kept
+		"""
+		with self._lock:
+			self._results.clear()
+			self.nbytes = 0
+
+	def _store(self, key, values):
+		"""
+		keeps values in memory as the most recently used result, evicting the least recently used
+		"""
+		if key in self._results: self.nbytes -= self._results.pop(key).nbytes
+		self._results[key] = values
+		self.nbytes += values.nbytes
+		while self.nbytes > self.max_bytes and len(self._results) > 1:
+			(_, evicted) = self._results.popitem(last=False)
+			self.nbytes -= evicted.nbytes
+			self.evictions += 1
+
+	def _path(self, key):
+		return self.folder / f'{hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()}.npy'
+
+	def _load(self, key):
+		"""
+		reads a persisted result, None if there is none or it is unreadable
+		"""
+		if self.folder is None: return None
+		try: values = np.load(self._path(key), allow_pickle=False)
+		except (OSError, ValueError): return None
+		values.flags.writeable = False
+		return values
+
+	def _save(self, key, values):
+		"""
+		writes a result atomically, failing to write (e.g. disk full) is silently ignored
+		"""
+		target = self._path(key)
+		try:
+			fd, temp = tempfile.mkstemp(dir=self.folder, prefix=f'.{target.name}.', suffix='.tmp')
+			try:
+				with os.fdopen(fd, 'wb') as file: np.save(file, values, allow_pickle=False)
+				os.replace(temp, target)
+			except BaseException:
+				if os.path.exists(temp): os.remove(temp)
+				raise
+		except OSError:
+			pass
+
+# the indicator cache shared by every StockData that is not given its own
+INDICATORS = IndicatorCache()
+
+def _cache_path(filepath):
+	"""
+	returns the filepath of the binary cache that belongs to a .csv file
+	"""
+	return Path(f'{filepath}.npz')
+
+def _read_csv(filepath, cache=True):
+	"""
+	parses a stock data .csv file into a dataframe indexed by the parsed 'Date' column,
+	the binary cache is used instead if it was built from the current version of the file
+
+	Parameters
+	filepath : str
+		filepath to the stock data .csv file
+	cache : bool (True)
+		if True, reads the binary cache when it is fresh and rebuilds it when it is not
+
+	Returns
+	(data, clean) : (DataFrame, bool)
+		clean is True if the binary cache recorded that the rows are sorted
+		without missing values (see _write_cache), False if unknown
+	"""
+	if cache:
+		with PROFILER.stage('read_cache') as stage:
+			cached = _read_cache(filepath)
+			if cached is not None: stage.rows = len(cached[0])
+		if cached is not None: return cached
+
+	with PROFILER.stage('read_csv') as stage:
+		data = pd.read_csv(filepath, index_col='Date', parse_dates=True)
+		stage.rows = len(data)
+	if cache: _write_cache(filepath, data)
+	return (data, False)
+
+def _read_csv_chunked(filepath, chunksize=100_000, dtype=np.float64, windows=(), col='Close'):
+	"""
+	parses a stock data .csv file chunk by chunk into typed arrays, so memory never holds
+	more than one parsed chunk on top of the result. missing values are interpolated
+	as the chunks stream by, also across chunk boundaries, and the SMAs of windows
+	are calculated on the fly from the interpolated col
+
+	the result matches pd.read_csv followed by check_data (and _calculate_SMA for every
+	window): the rows are in date order, a gap is filled linearly between its neighbours,
+	missing values at the start stay nan and missing values at the end repeat the last value.
+	a file whose rows are not sorted by date is read whole and sorted before interpolating
+
+	Parameters
+	filepath : str
+		filepath to the stock data .csv file (assumes 'Date' column exists)
+	chunksize : int (100_000)
+		the amount of rows parsed at once
+	dtype : numpy dtype (np.float64)
+		the dtype of every column, e.g. np.float32 halves the memory of the result.
+		the columns of EXACT_COLUMNS are at least float64, float32 would round their counts
+	windows : [int, int, ...] (())
+		windows of the 'SMA<n>' columns to calculate while reading
+	col : str ('Close')
+		the column head title of the values to average
+
+	Returns
+	(data, open_gaps) : (DataFrame, {str: int})
+		data indexed by the parsed 'Date' column, and the position of the first missing
+		value at the end of every column that had some, see StockData.append_bars
+
+	Raises
+	IOError :
+		failed I/O operation, e.g: invalid filepath, fail to open .csv
+	ValueError :
+		a column is not numeric or a window is not a positive integer
+	"""
+	windows = [_check_window(n) for n in windows]
+	columns = [str(head) for head in pd.read_csv(filepath, nrows=0).columns if head != 'Date']
+	if windows and col not in columns: raise ValueError(f"Column {col} to average does not exist.")
+
+	dtypes = {head: np.promote_types(dtype, np.float64) if head in EXACT_COLUMNS else np.dtype(dtype) for head in columns}
+	reader = pd.read_csv(filepath, index_col='Date', parse_dates=True, chunksize=chunksize, dtype=dtypes)
+	with PROFILER.stage('read_csv_chunked') as stage:
+		parsed = _parse_chunks(reader, dtypes, windows, col)
+		if parsed is None:
+			# files whose rows are out of date order are rare, they are read whole and sorted
+			# as check_data would, then interpolated and averaged in the same chunks
+			data = pd.read_csv(filepath, index_col='Date', parse_dates=True, dtype=dtypes)
+			data = data.sort_index(kind='stable')
+			parsed = _parse_chunks((data.iloc[i:i + chunksize] for i in range(0, len(data), chunksize)), dtypes, windows, col, check_order=False)
+			del data
+		(dates, values, fillers, smas) = parsed
+		stage.rows = sum(len(chunk) for chunk in dates)
+
+	# joins one column at a time, releasing its chunks before the next one
+	index = pd.DatetimeIndex(np.concatenate(dates) if dates else np.array([], dtype='datetime64[ns]'), name='Date')
+	data = pd.DataFrame(index=index)
+	for head in columns:
+		data[head] = np.concatenate(values.pop(head)) if dates else np.array([], dtype=dtypes[head])
+	for (n, sma) in smas.items(): data[f'SMA{n}'] = sma.result()
+	open_gaps = {head: len(index) - filler.trailing for (head, filler) in fillers.items() if filler.trailing}
+	return (data, open_gaps)
+
+def _parse_chunks(chunks, dtypes, windows, col, check_order=True):
+	"""
+	interpolates the columns of chunks of a stock data .csv file, each in its dtype of dtypes,
+	and calculates the SMAs of windows from col, see _read_csv_chunked. with check_order,
+	gives up as soon as a date is older than the one before it
+
+	Returns
+	(dates, values, fillers, smas) : ([ndarray, ...], {str: [ndarray, ...]}, {str: _GapFiller}, {int: _RunningSMA})
+		the dates and values of every chunk, None if check_order gave up
+	"""
+	fillers = {head: _GapFiller() for head in dtypes}
+	smas = {n: _RunningSMA(n) for n in windows}
+	(dates, values) = ([], {head: [] for head in dtypes})
+	for chunk in chunks:
+		if check_order and (not chunk.index.is_monotonic_increasing or (dates and len(chunk) and chunk.index[0] < dates[-1][-1])):
+			return None
+		if len(chunk): dates.append(chunk.index.to_numpy())
+		for (head, dtype) in dtypes.items():
+			chunk_values = chunk[head].to_numpy(dtype=dtype, copy=True)
+			final = fillers[head].fill(chunk_values)
+			values[head].append(chunk_values)
+			if head == col:
+				for sma in smas.values(): sma.feed(final)
+	for head in dtypes:
+		final = fillers[head].finish()
+		if head == col:
+			for sma in smas.values(): sma.feed(final)
+	return (dates, values, fillers, smas)
+
+class _GapFiller():
+	"""
+	interpolates the missing values of one column chunk by chunk in place, a gap at
+	the end of a chunk is kept pending until the next value arrives in a later chunk
+	"""
+	def __init__(self):
+		self.last = np.nan
+		self.pending = []
+		# the amount of missing values at the end that finish repeated the last value over
+		self.trailing = 0
+
+	def fill(self, values):
+		"""
+		fills the gaps of values that can be filled so far
+
+		Returns
+		final : [ndarray, ...]
+			the values that will no longer change, in order
+		"""
+		valid = np.flatnonzero(~np.isnan(values))
+		if len(valid) == 0:
+			if np.isnan(self.last): return [values]
+			self.pending.append(values)
+			return []
+
+		(first, last) = (valid[0], valid[-1])
+		final = []
+		if self.pending or first > 0:
+			segments = self.pending + [values[:first]]
+			if not np.isnan(self.last):
+				gap = sum(len(segment) for segment in segments)
+				steps = np.arange(1, gap + 1) / (gap + 1)
+				filled = self.last + (values[first] - self.last) * steps
+				offset = 0
+				for segment in segments:
+					segment[:] = filled[offset:offset + len(segment)]
+					offset += len(segment)
+			final.extend(self.pending)
+		if last > first:
+			inner = values[first:last + 1]
+			missing = np.isnan(inner)
+			if missing.any():
+				positions = np.arange(len(inner))
+				inner[missing] = np.interp(positions[missing], positions[~missing], inner[~missing])
+		final.append(values[:last + 1])
+
+		self.last = values[last]
+		self.pending = [values[last + 1:]] if last + 1 < len(values) else []
+		return final
+
+	def finish(self):
+		"""
+		repeats the last value over the gap at the end of the column
+
+		Returns
+		final : [ndarray, ...]
+		"""
+		if not np.isnan(self.last): self.trailing = sum(len(segment) for segment in self.pending)
+		for segment in self.pending: segment[:] = self.last
+		(final, self.pending) = (self.pending, [])
+		return final
+
+class _RunningSMA():
+	"""
+	calculates SMA(n) of values fed in pieces, carrying the last n - 1 values over
+	to the next piece, rounded and with n - 1 warm up rows like _calculate_SMA
+	"""
+	def __init__(self, n):
+		self.n = n
+		self.carry = np.empty(0)
+		self.rows = 0
+		self.means = []
+
+	def feed(self, pieces):
+		for values in pieces:
+			if len(values) == 0: continue
+			window = np.concatenate((self.carry, values))
+			mean = _rolling_mean(window, self.n)[len(self.carry):]
+			mean[:max(self.n - 1 - self.rows, 0)] = np.nan
+			self.means.append(np.round(mean, 4))
+			self.carry = window[max(len(window) - self.n + 1, 0):] if self.n > 1 else np.empty(0)
+			self.rows += len(values)
+
+	def result(self):
+		return np.concatenate(self.means) if self.means else np.empty(0)
+
+def _read_series(filepath, cache=True):
+	"""
+	reads a stock data .csv file into a PriceSeries, straight from the arrays
+	of the binary cache if it is fresh, see _read_csv
+
+	Returns
+	(series, clean) : (PriceSeries, bool)
+		see _read_csv
+
+	Raises
+	ValueError :
+		a column is not numeric
+	"""
+	with PROFILER.stage('read_cache') as stage:
+		arrays = _read_cache_arrays(filepath) if cache else None
+		if arrays is not None: stage.rows = len(arrays[0])
+	if arrays is not None: return (PriceSeries(*arrays[:2]), arrays[2])
+	(data, clean) = _read_csv(filepath, cache)
+	return (PriceSeries.from_frame(data), clean)
+
+def _read_cache(filepath):
+	"""
+	reads the binary cache of a .csv file into a dataframe, see _read_cache_arrays
+
+	Returns
+	(data, clean) : (DataFrame, bool)
+		None if there is no cache or it is stale or unreadable
+	"""
+	arrays = _read_cache_arrays(filepath)
+	if arrays is None: return None
+	(index, columns, clean) = arrays
+	return (pd.DataFrame(columns, index=pd.DatetimeIndex(index, name='Date')), clean)
+
+def _read_cache_arrays(filepath):
+	"""
+	reads the binary cache of a .csv file, the cache is only used if the size and
+	modification time of the .csv file still match the ones recorded in it
+
+	Returns
+	(index, columns, clean) : (ndarray, {str: ndarray}, bool)
+		the datetime64 dates, the values of every column and whether the rows are
+		sorted without missing values, None if there is no cache or it is stale or unreadable
+	"""
+	try:
+		stat = os.stat(filepath)
+		with np.load(_cache_path(filepath), allow_pickle=False) as cache:
+			key = (int(cache['version']), int(cache['mtime']), int(cache['size']))
+			if key != (CACHE_VERSION, stat.st_mtime_ns, stat.st_size): return None
+			columns = {str(col): cache[f'column{i}'] for (i, col) in enumerate(cache['columns'])}
+			return (cache['index'], columns, bool(cache['clean']))
+	except (OSError, KeyError, ValueError):
+		return None
+
+def _write_cache(filepath, data):
+	"""
+	writes the binary cache of a .csv file: one typed array per column plus the
+	datetime64 index, keyed on the size and modification time of the .csv file,
+	and whether the rows are sorted without missing values so loading it can skip check_data.
+	data that cannot be stored without pickling (e.g. text columns) is not cached,
+	failing to write the cache (e.g. read-only folder) is silently ignored
+	"""
+	if not isinstance(data.index, pd.DatetimeIndex): return
+	if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in data.dtypes): return
+
+	target = _cache_path(filepath)
+	try:
+		stat = os.stat(filepath)
+		columns = {f'column{i}': data[col].to_numpy() for (i, col) in enumerate(data.columns)}
+		clean = data.index.is_monotonic_increasing and not any(has_gaps(values) for values in columns.values())
+		fd, temp = tempfile.mkstemp(dir=target.parent, prefix=f'.{target.name}.', suffix='.tmp')
+		try:
+			with PROFILER.stage('write_cache', rows=len(data)) as stage, os.fdopen(fd, 'wb') as file:
+				np.savez(file,
+				         version=CACHE_VERSION,
+				         mtime=stat.st_mtime_ns,
+				         size=stat.st_size,
+				         index=data.index.to_numpy(),
+				         columns=np.array(data.columns, dtype=str),
+				         clean=clean,
+				         **columns)
+				stage.nbytes = file.tell()
+			os.replace(temp, target)
+		except BaseException:
+			if os.path.exists(temp): os.remove(temp)
+			raise
+	except OSError:
+		pass
+
+def _sma(values, n, decimals, warmup):
+	"""
+	calculates SMA(n) of values as recorded in StockData._smas: the first warmup
+	values are left as nan and the averages are rounded to decimals (None to not round)
+	"""
+	sma = _rolling_mean(values, n)
+	sma[:max(warmup, 0)] = np.nan
+	return np.round(sma, decimals) if decimals is not None else sma
+
+def _crossover_position(SMA1, SMA2):
+	"""
+	calculates which SMA line is on top for every row: 1 if SMA1 is above SMA2,
+	0 if SMA2 is above SMA1 and nan if either is missing. if the SMAs are equal,
+	the previous position is repeated because no crossover has occured yet
+
+	Parameters
+	SMA1 : array_like
+	SMA2 : array_like
+
+	Returns
+	position : ndarray
+	"""
+	SMA1 = np.asarray(SMA1, dtype=np.float64)
+	SMA2 = np.asarray(SMA2, dtype=np.float64)
+	position = np.where(SMA1 > SMA2, 1.0, np.where(SMA1 < SMA2, 0.0, np.nan))
+
+	equal = SMA1 == SMA2
+	if equal.any():
+		# every equal row points back to the last row that is not equal
+		last = np.where(equal, 0, np.arange(len(position)))
+		np.maximum.accumulate(last, out=last)
+		position = position[last]
+	return position
+
+def _sign_position(SMA1, SMA2):
+	"""
+	calculates the sign of SMA1 - SMA2 for every row: 1 if SMA1 is above SMA2,
+	0 if it is below or equal and nan if either is missing
+
+	Parameters
+	SMA1 : array_like
+	SMA2 : array_like
+
+	Returns
+	position : ndarray
+	"""
+	difference = np.asarray(SMA1, dtype=np.float64) - np.asarray(SMA2, dtype=np.float64)
+	return np.where(difference > 0, 1.0, np.where(difference <= 0, 0.0, np.nan))
+
+def _crossover_signal(position):
+	"""
+	calculates the crossover signal from the positions: 1 where SMA1 crosses above
+	SMA2 (buy), -1 where it crosses below (sell), the first row is always nan
+
+	Parameters
+	position : ndarray
+		positions as returned by _crossover_position
+
+	Returns
+	signal : ndarray
+	"""
+	signal = np.full(len(position), np.nan)
+	signal[1:] = np.diff(position)
+	return signal
+
 if __name__ == "__main__":
+	import matplotlib.pyplot as plt
+
 	# How working data looks like
 	# raw = StockData("../data/GOOG2.csv")
 	# selected = raw.get_data('2018-01-02', '2020-09-22')
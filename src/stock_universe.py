@@ -0,0 +1,84 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from stock_data import StockData
+from utils import find_csv
+
+class StockUniverse():
+	"""
+	loads many stock data .csv files concurrently as StockData objects,
+	a file that fails to load is recorded in .failures without stopping the rest
+
+	Attributes
+	.stocks : {str: StockData}
+		the loaded stock data by ticker (the .csv file name without extension)
+	.failures : {str: str}
+		the error message of every file that failed to load by filepath
+	"""
+	def __init__(self, source, max_workers=None, processes=False, cache=True):
+		"""
+		initializes StockUniverse by loading every .csv file of source
+
+		Parameters
+		source : str or [str, str, ...]
+			a folder (every .csv file in it is loaded), a glob pattern
+			(e.g. ../data/*.csv) or a list of filepaths
+		max_workers : int (None)
+			the amount of threads or processes loading files at once,
+			defaults to what concurrent.futures picks
+		processes : bool (False)
+			if True, loads in a process pool instead of a thread pool, which avoids the GIL
+			but pays for sending every loaded dataframe back to this process
+		cache : bool (True)
+			passed on to StockData, whether to use the binary cache of each .csv file
+		"""
+		self.stocks = {}
+		self.failures = {}
+
+		filepaths = find_csv(source)
+		executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+		with executor(max_workers) as pool:
+			futures = {pool.submit(_load, filepath, cache): filepath for filepath in filepaths}
+			for future in as_completed(futures):
+				try: stock_data = future.result()
+				except Exception as e: self.failures[str(futures[future])] = f"{type(e).__name__}: {e}"
+				else: self.stocks[Path(futures[future]).stem] = stock_data
+
+		# as_completed returns files in the order they finished, sort them back by ticker
+		self.stocks = dict(sorted(self.stocks.items()))
+
+	def __len__(self):
+		return len(self.stocks)
+
+	def __iter__(self):
+		return iter(self.stocks)
+
+	def __getitem__(self, ticker):
+		return self.stocks[ticker]
+
+	def wide(self, col='Close', join='outer'):
+		"""
+		aligns one column of every loaded stock on a common date index
+
+		Parameters
+		col : str ('Close')
+			the column head title to take from each stock
+		join : str ('outer')
+			'outer' keeps every date of any stock (missing values are nan),
+			'inner' keeps only the dates that every stock has
+
+		Returns
+		data : DataFrame
+			indexed by date with one column per ticker
+		"""
+		columns = {ticker: stock_data.data[col] for (ticker, stock_data) in self.stocks.items() if col in stock_data.data}
+		if not columns: return pd.DataFrame(index=pd.DatetimeIndex([], name='Date'))
+		return pd.concat(columns, axis=1, join=join).sort_index()
+
+def _load(filepath, cache):
+	"""
+	loads one stock data .csv file, runs inside the thread or process pool
+	"""
+	return StockData(filepath, cache=cache)
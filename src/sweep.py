@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from stock_data import StockData, _check_window, _rolling_means, _crossover_position, _crossover_signal
+
+# set in every worker process by _attach
+_shared = None
+_prices = None
+
+def window_pairs(shorts, longs):
+	"""
+	returns every (short, long) pair of SMA windows where short < long
+
+	Parameters
+	shorts : [int, int, ...]
+		candidate windows of the fast SMA
+	longs : [int, int, ...]
+		candidate windows of the slow SMA
+
+	Returns
+	pairs : [(int, int), ...]
+	"""
+	return [(short, long) for short in shorts for long in longs if short < long]
+
+def sweep(filepaths, pairs, processes=None, col='Close'):
+	"""
+	backtests the SMA crossover strategy for every (short, long) pair of windows on
+	every stock data .csv file: buy when SMA(short) crosses above SMA(long) and
+	sell when it crosses back below, at the value of col on that day.
+	the prices of every file are loaded once into shared memory that worker
+	processes read without copying, each task backtests a chunk of pairs on one file
+
+	Parameters
+	filepaths : [str, str, ...]
+		filepaths to the stock data .csv files
+	pairs : [(int, int), ...]
+		(short, long) windows to backtest, see window_pairs
+	processes : int (None)
+		the amount of worker processes, defaults to the amount of CPUs,
+		1 runs everything in this process
+	col : str ('Close')
+		the column head title of the prices to trade on
+
+	Returns
+	results : DataFrame
+		one row per ticker and pair with columns 'ticker', 'short', 'long',
+		'trades' (completed round trips), 'pnl' (sum of sell - buy prices)
+		and 'hit_rate' (fraction of trades with a profit, nan without trades)
+
+	Raises
+	IOError :
+		failed I/O operation, e.g: invalid filepath, fail to open .csv
+	ValueError :
+		a window is not a positive integer
+	"""
+	pairs = [(_check_window(short), _check_window(long)) for (short, long) in pairs]
+	tickers = [Path(filepath).stem for filepath in filepaths]
+	prices = [StockData(filepath).data[col].to_numpy(dtype=np.float64) for filepath in filepaths]
+	processes = processes or os.cpu_count() or 1
+
+	# enough tasks to keep every process busy until the end, without splitting too finely
+	chunks = max(1, -(-4 * processes // max(len(prices), 1)))
+	size = -(-len(pairs) // chunks)
+	tasks = [(i, pairs[j:j + size]) for i in range(len(prices)) for j in range(0, len(pairs), size)]
+
+	offsets = np.cumsum([0] + [len(values) for values in prices])
+	layout = [(offsets[i], offsets[i + 1]) for i in range(len(prices))]
+	shared = shared_memory.SharedMemory(create=True, size=max(int(offsets[-1]) * 8, 1))
+	try:
+		np.ndarray(int(offsets[-1]), dtype=np.float64, buffer=shared.buf)[:] = np.concatenate(prices or [[]])
+		if processes == 1:
+			_attach(shared.name, layout)
+			results = [_backtest_task(task) for task in tasks]
+		else:
+			with ProcessPoolExecutor(processes, initializer=_attach, initargs=(shared.name, layout)) as pool:
+				results = list(pool.map(_backtest_task, tasks))
+	finally:
+		_detach()
+		shared.close()
+		shared.unlink()
+
+	rows = [(tickers[i],) + row for (i, task_rows) in results for row in task_rows]
+	return pd.DataFrame(rows, columns=['ticker', 'short', 'long', 'trades', 'pnl', 'hit_rate'])
+
+def backtest(prices, sma_short, sma_long):
+	"""
+	backtests one SMA crossover pair, buying on the crossover signal 1 and selling
+	on the signal -1 of calculate_crossover, a position still open at the end is ignored
+
+	Parameters
+	prices : ndarray
+		the prices to trade on
+	sma_short : ndarray
+		the fast SMA
+	sma_long : ndarray
+		the slow SMA
+
+	Returns
+	(trades, pnl, hit_rate) : (int, float, float)
+	"""
+	signal = _crossover_signal(_crossover_position(sma_short, sma_long))
+	buys = np.flatnonzero(signal == 1)
+	sells = np.flatnonzero(signal == -1)
+	if len(buys) > 0: sells = sells[sells > buys[0]]
+
+	trades = min(len(buys), len(sells))
+	profits = prices[sells[:trades]] - prices[buys[:trades]]
+	hit_rate = np.count_nonzero(profits > 0) / trades if trades else np.nan
+	return (trades, float(profits.sum()), hit_rate)
+
+def _attach(name, layout):
+	"""
+	attaches a (worker) process to the shared prices, one view per file
+	"""
+	global _shared, _prices
+	_shared = shared_memory.SharedMemory(name=name)
+	values = np.ndarray(_shared.size // 8, dtype=np.float64, buffer=_shared.buf)
+	_prices = [values[start:end] for (start, end) in layout]
+
+def _detach():
+	"""
+	releases the views of the shared prices so the shared memory can be closed
+	"""
+	global _shared, _prices
+	_prices = None
+	if _shared is not None: _shared.close()
+	_shared = None
+
+def _backtest_task(task):
+	"""
+	backtests a chunk of pairs on one file, calculating every window it needs only once.
+	the first n rows of every SMA(n) are nan, as calculate_SMA leaves them
+	"""
+	(i, pairs) = task
+	prices = _prices[i]
+	windows = sorted({n for pair in pairs for n in pair})
+	smas = dict(zip(windows, _rolling_means(prices, windows)))
+	for (n, sma) in smas.items(): sma[:n] = np.nan
+	return (i, [(short, long) + backtest(prices, smas[short], smas[long]) for (short, long) in pairs])
+
+if __name__ == "__main__":
+	# usage: python sweep.py ../data/GOOG.csv ../data/GOOG2.csv ...
+	filepaths = sys.argv[1:] or ["../data/GOOG2.csv"]
+	pairs = window_pairs(range(5, 51), range(20, 251, 5))
+
+	start = time.perf_counter()
+	results = sweep(filepaths, pairs)
+	elapsed = time.perf_counter() - start
+
+	print(results.sort_values('pnl', ascending=False).head(20).to_string(index=False))
+	print(f"{len(results):,} backtests in {elapsed:.2f}s")
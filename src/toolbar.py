@@ -0,0 +1,13 @@
+from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+
+class Toolbar(NavigationToolbar):
+	"""
+	matplotlib NavigationToolbar that also saves the animated artists, which Main
+	draws itself by blitting and savefig would otherwise leave out
+	"""
+	def save_figure(self, *args):
+		animated = [artist for ax in self.canvas.figure.axes for artist in ax.get_children() if artist.get_animated()]
+		for artist in animated: artist.set_animated(False)
+		try: return super().save_figure(*args)
+		finally:
+			for artist in animated: artist.set_animated(True)
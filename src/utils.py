@@ -0,0 +1,38 @@
+import glob
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# a day in nanoseconds, the unit of the int64 dates of MmapStore, PriceSeries and gaps.py
+DAY = 24 * 60 * 60 * 10**9
+
+def to_ns(value):
+	"""
+	converts a date string or date(time) object to nanoseconds since epoch
+	"""
+	return int(pd.Timestamp(value).to_datetime64().astype('datetime64[ns]').astype(np.int64))
+
+def to_ns_array(index):
+	"""
+	converts a datetime index to an int64 array of nanoseconds since epoch
+	"""
+	return pd.DatetimeIndex(index).to_numpy().astype('datetime64[ns]').astype(np.int64)
+
+def find_csv(source):
+	"""
+	returns the filepaths of the .csv files named by source
+
+	Parameters
+	source : str or [str, str, ...]
+		a folder (every .csv file in it), a glob pattern (e.g. ../data/*.csv) or a list of filepaths
+
+	Returns
+	filepaths : [str or Path, ...]
+		sorted, unless source is a list
+	"""
+	if isinstance(source, (str, os.PathLike)):
+		if os.path.isdir(source): return sorted(Path(source).glob('*.csv'))
+		return sorted(glob.glob(str(source)))
+	return list(source)
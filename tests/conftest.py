@@ -0,0 +1,33 @@
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA = ROOT / 'data'
+
+# the application modules are imported flatly, as the scripts in src/ do
+sys.path.insert(0, str(ROOT / 'src'))
+sys.path.insert(0, str(ROOT / 'bench'))
+
+@pytest.fixture
+def data_file(tmp_path):
+	"""
+	returns a function copying a file of data/ into a temporary folder, so loading,
+	caching and saving it in a test never touches data/
+	"""
+	def copy(name):
+		return str(shutil.copy(DATA / name, tmp_path / name))
+	return copy
+
+@pytest.fixture
+def csv_file(tmp_path):
+	"""
+	returns a function writing a dataframe indexed by 'Date' to a temporary .csv file
+	"""
+	def write(data, name='TEST.csv'):
+		filepath = tmp_path / name
+		data.to_csv(filepath)
+		return str(filepath)
+	return write
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_data import StockData
+
+def loop_SMA(data, n):
+	"""
+	the loop calculate_SMA replaced: the SMA of every row from the n rows up to it,
+	the first n rows are left as nan
+	"""
+	df = data.reset_index()
+	close = df['Close'].tolist()
+	returnList = []
+	for dateIndex in range(len(df)):
+		if dateIndex < n: returnList.append(np.nan)
+		else:
+			sum = 0
+			for i in range(n): sum += close[dateIndex-i]
+			returnList.append(sum/n)
+	return returnList
+
+def loop_crossover(data, SMAa, SMAb, by_window=False):
+	"""
+	the loop calculate_crossover replaced, returns the 'Buy' and 'Sell' columns.
+	with by_window, the SMA of the shorter window is the fast line as calculate_crossover now takes it
+	"""
+	# the names are compared as text, so windows of different digit counts (e.g. SMA5 and SMA20)
+	# were taken the wrong way round
+	if by_window: (fast, slow) = sorted((SMAa, SMAb), key=lambda name: int(name[3:]))
+	elif SMAa < SMAb: (fast, slow) = (SMAa, SMAb)
+	else: (fast, slow) = (SMAb, SMAa)
+	(SMA1, SMA2) = (data[fast].tolist(), data[slow].tolist())
+
+	stockPosition = []
+	for i in range(len(SMA1)):
+		if SMA1[i] > SMA2[i]: stockPosition.append(1)
+		elif SMA1[i] < SMA2[i]: stockPosition.append(0)
+		# if the SMAs are equal, repeat the previous entry because no crossover has occured yet
+		elif SMA1[i] == SMA2[i]: stockPosition.append(stockPosition[i-1])
+		else: stockPosition.append(np.nan)
+
+	stockSignal = [np.nan] + [stockPosition[j] - stockPosition[j-1] for j in range(1, len(stockPosition))]
+	values = data[SMAa].tolist()
+	buy = [values[k] if stockSignal[k] == 1 else np.nan for k in range(len(stockSignal))]
+	sell = [values[k] if stockSignal[k] == -1 else np.nan for k in range(len(stockSignal))]
+	return (buy, sell)
+
+def assert_matches_loop(stock_data, a, b, by_window=False):
+	reference = stock_data.data.copy()
+	for n in (a, b): reference[f'SMA{n}'] = loop_SMA(reference, n)
+	(buy, sell) = loop_crossover(reference, f'SMA{a}', f'SMA{b}', by_window)
+
+	stock_data.calculate_SMA(a).calculate_SMA(b).calculate_crossover(f'SMA{a}', f'SMA{b}')
+	for n in (a, b):
+		np.testing.assert_allclose(stock_data.data[f'SMA{n}'].to_numpy(), reference[f'SMA{n}'].to_numpy(), rtol=1e-12)
+	# the signals are on the same rows, their values only differ by the order the SMAs were summed in
+	for (col, expected) in (('Buy', buy), ('Sell', sell)):
+		np.testing.assert_array_equal(np.isnan(stock_data.data[col].to_numpy()), np.isnan(expected))
+		np.testing.assert_allclose(stock_data.data[col].to_numpy(), expected, rtol=1e-12)
+
+@pytest.mark.parametrize('name', ['GOOG2.csv', 'SHORT.csv', 'C31.SI.csv'])
+def test_matches_loop_on_data(data_file, name):
+	assert_matches_loop(StockData(data_file(name), cache=False), 15, 50)
+
+@pytest.mark.parametrize(('a', 'b'), [(5, 20), (20, 5), (9, 100)])
+def test_windows_of_different_digit_counts(data_file, a, b):
+	# the shorter window is the fast line, the loop compared the names as text and took SMA20 as the fast one
+	stock_data = StockData(data_file('GOOG2.csv'), cache=False)
+	assert_matches_loop(stock_data, a, b, by_window=True)
+	assert stock_data.data['Buy'].notna().any() and stock_data.data['Sell'].notna().any()
+
+def test_matches_loop_with_equal_SMAs_and_gaps(csv_file):
+	# whole prices keep the sums exact, so both SMAs are equal along the flat stretch
+	rng = np.random.default_rng(1)
+	close = np.concatenate((100 + rng.integers(-5, 6, 120).cumsum(), np.full(40, 120), 120 + rng.integers(-5, 6, 120).cumsum()))
+	close = close.astype(np.float64)
+	# missing values at the start stay nan, the one in the middle is interpolated
+	close[:3] = np.nan
+	close[200] = np.nan
+	index = pd.date_range('2020-01-01', periods=len(close), freq='D', name='Date')
+	data = pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Adj Close': close, 'Volume': 1000}, index=index)
+
+	stock_data = StockData(csv_file(data), cache=False)
+	assert np.isnan(stock_data.data['Close'].to_numpy()[:3]).all()
+	assert_matches_loop(stock_data, 10, 30)
+	# the flat stretch does have a run of equal SMAs
+	assert (stock_data.data['SMA10'] == stock_data.data['SMA30']).sum() > 10
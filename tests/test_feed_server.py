@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+import feed_server
+from feed_server import FeedServer
+from stock_data import StockData
+from synthetic import make_ohlcv
+
+def bar_rows(data):
+	"""
+	returns the bars of a dataframe as the JSON rows of a publish request
+	"""
+	return [dict(Date=f'{date:%Y-%m-%d}', **{col: float(value) for (col, value) in row.items()})
+	        for (date, row) in data.iterrows()]
+
+async def talk(feed, requests, done):
+	"""
+	sends each request as one line to a served FeedServer and reads the messages back until done(messages)
+	"""
+	server = await feed.start('127.0.0.1', 0)
+	(reader, writer) = await asyncio.open_connection('127.0.0.1', server.sockets[0].getsockname()[1], limit=1 << 24)
+	messages = []
+	try:
+		for request in requests:
+			writer.write(request if isinstance(request, bytes) else (json.dumps(request) + '\n').encode())
+		await writer.drain()
+		while not done(messages):
+			line = await asyncio.wait_for(reader.readline(), 10)
+			if not line: break
+			messages.append(json.loads(line))
+	finally:
+		writer.close()
+		feed.close()
+	return messages
+
+@pytest.fixture
+def goog(csv_file):
+	"""
+	returns a StockData of 300 synthetic bars and the 1,000 bars that follow them
+	"""
+	data = make_ohlcv(1300, seed=7)
+	return (StockData(csv_file(data.iloc[:300])), data.iloc[300:], data)
+
+def test_publish_many_bars_in_one_line(goog, csv_file):
+	(stock_data, new, data) = goog
+	publish = {'op': 'publish', 'ticker': 'TEST', 'bars': bar_rows(new)}
+	# longer than the 64 KiB asyncio reads by default
+	assert len(json.dumps(publish)) > 1 << 16
+	feed = FeedServer({'TEST': stock_data}, 15, 50)
+	messages = asyncio.run(talk(feed, [{'op': 'subscribe', 'tickers': ['TEST']}, publish],
+	                         lambda messages: sum(message['type'] == 'bar' for message in messages) == len(new)))
+
+	assert messages[0]['type'] == 'subscribed'
+	bars = [message for message in messages if message['type'] == 'bar']
+	assert len(bars) == len(new)
+	full = StockData(csv_file(data, 'FULL.csv'))
+	full._calculate_SMA(15)._calculate_SMA(50)
+	for col in ('Close', 'SMA15', 'SMA50'):
+		expected = full.data[col].to_numpy()[300:]
+		got = np.array([np.nan if bar[col] is None else bar[col] for bar in bars])
+		np.testing.assert_allclose(got, expected, rtol=1e-12)
+
+def test_request_longer_than_the_limit(goog, monkeypatch):
+	(stock_data, new, data) = goog
+	monkeypatch.setattr(feed_server, 'MAX_LINE', 1 << 12)
+	long = (json.dumps({'op': 'publish', 'ticker': 'TEST', 'bars': bar_rows(new.iloc[:100])}) + '\n').encode()
+	feed = FeedServer({'TEST': stock_data}, 15, 50)
+	messages = asyncio.run(talk(feed, [long, {'op': 'subscribe', 'tickers': ['TEST']}], lambda messages: len(messages) == 2))
+
+	# the long line is answered with one error and the connection keeps serving the next lines
+	assert messages[0]['type'] == 'error' and 'longer than' in messages[0]['error']
+	assert messages[1] == {'type': 'subscribed', 'ticker': 'TEST', 'last': f'{data.index[299]:%Y-%m-%d}'}
+	assert len(stock_data.data) == 300
+
+def test_publish_non_numeric_bar(goog):
+	(stock_data, new, data) = goog
+	rows = bar_rows(new.iloc[:2])
+	rows[1]['Close'] = 'abc'
+	feed = FeedServer({'TEST': stock_data}, 15, 50)
+	messages = asyncio.run(talk(feed, [{'op': 'publish', 'ticker': 'TEST', 'bars': rows}], lambda messages: len(messages) == 1))
+
+	assert messages[0]['type'] == 'error' and 'numeric' in messages[0]['error']
+	assert len(stock_data.data) == 300
+
+@pytest.mark.parametrize('request_', [{'op': 'subscribe', 'tickers': 5}, {'op': 'subscribe', 'tickers': [['x']]},
+                                      {'op': 'unsubscribe', 'tickers': 'TEST'}, {'op': 'publish', 'ticker': ['x'], 'bars': []},
+                                      {'op': 'publish', 'ticker': 'TEST', 'bars': 5}, {'op': 'publish', 'ticker': 'TEST', 'bars': [1, 2]},
+                                      {'op': 'publish', 'ticker': 'TEST', 'bars': [{'Close': 1.0}]}, ['subscribe'], {'op': 'x'}])
+def test_request_of_the_wrong_types(goog, request_):
+	(stock_data, new, data) = goog
+	feed = FeedServer({'TEST': stock_data}, 15, 50)
+	messages = asyncio.run(talk(feed, [request_, {'op': 'subscribe', 'tickers': ['TEST']}], lambda messages: len(messages) == 2))
+
+	# the request is answered with an error and the connection keeps serving the next lines
+	assert messages[0]['type'] == 'error'
+	assert messages[1]['type'] == 'subscribed'
+	assert len(stock_data.data) == 300
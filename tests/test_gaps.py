@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from gaps import fill_gaps, trailing_gap
+from utils import to_ns_array
+
+def gappy(seed, rows=500):
+	"""
+	returns random values with runs of missing values, also at the start and the end,
+	and unevenly spaced dates
+	"""
+	rng = np.random.default_rng(seed)
+	values = 100 + np.cumsum(rng.normal(0, 1, rows))
+	for start in rng.integers(0, rows, 40):
+		values[start:start + rng.integers(1, 6)] = np.nan
+	values[:rng.integers(0, 4)] = np.nan
+	values[rows - rng.integers(0, 4):] = np.nan
+	dates = pd.DatetimeIndex(np.datetime64('2000-01-03') + np.cumsum(rng.integers(1, 5, rows)).astype('timedelta64[D]'))
+	return (values, dates)
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('method', ['linear', 'time', 'ffill'])
+def test_fill_gaps_matches_pandas(seed, method):
+	(values, dates) = gappy(seed)
+	series = pd.Series(values, index=dates)
+	if method == 'ffill': expected = series.ffill()
+	else: expected = series.interpolate(method)
+	# the missing values at the start have nothing before them
+	expected[:np.argmax(~np.isnan(values))] = np.nan
+
+	filled = fill_gaps(values.copy(), to_ns_array(dates), method)
+	np.testing.assert_allclose(filled, expected.to_numpy(), rtol=1e-12)
+
+def test_fill_gaps_leaves_values_unchanged():
+	(values, dates) = gappy(0)
+	copy = values.copy()
+	fill_gaps(values, to_ns_array(dates), 'time')
+	np.testing.assert_array_equal(values, copy)
+	assert fill_gaps(np.arange(5.0)) is None
+	assert fill_gaps(np.array([np.nan, np.nan, 1.0])) is None
+
+@pytest.mark.parametrize(('values', 'gap'), [([1.0, np.nan, 2.0], None), ([1.0, 2.0, np.nan, np.nan], 2),
+                                             ([np.nan, np.nan], None), ([np.nan, 1.0, np.nan], 2), ([], None)])
+def test_trailing_gap(values, gap):
+	assert trailing_gap(np.array(values, dtype=np.float64)) == gap
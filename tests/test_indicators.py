@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators
+from indicators import UnknownIndicator, compute
+
+def prices(rows=400, seed=0):
+	"""
+	returns a random walk of prices with its first values missing, as check_data leaves them
+	"""
+	rng = np.random.default_rng(seed)
+	values = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+	values[:3] = np.nan
+	return values
+
+def warmed_up(expected, warmup):
+	"""
+	returns the pandas reference with the rows of the warm-up (from the first value) as nan
+	"""
+	expected = np.array(expected, dtype=np.float64)
+	expected[:3 + warmup] = np.nan
+	return expected
+
+@pytest.mark.parametrize('n', [1, 5, 20])
+def test_sma_ema_wma_match_pandas(n):
+	values = prices()
+	series = pd.Series(values)
+	np.testing.assert_allclose(compute(f'SMA{n}', values)[f'SMA{n}'], series.rolling(n).mean(), rtol=1e-12)
+	np.testing.assert_allclose(compute(f'EMA{n}', values)[f'EMA{n}'],
+	                           warmed_up(series.ewm(span=n, adjust=False).mean(), n - 1), rtol=1e-12)
+	weights = np.arange(1, n + 1)
+	np.testing.assert_allclose(compute(f'WMA{n}', values)[f'WMA{n}'],
+	                           series.rolling(n).apply(lambda window: np.dot(window, weights) / weights.sum(), raw=True), rtol=1e-12)
+
+def test_bollinger_matches_pandas():
+	values = prices()
+	series = pd.Series(values)
+	columns = compute('BB20-2.5', values)
+	(middle, deviation) = (series.rolling(20).mean(), series.rolling(20).std(ddof=0))
+	np.testing.assert_allclose(columns['BB20-2.5'], middle, rtol=1e-12)
+	np.testing.assert_allclose(columns['BB20-2.5.upper'], middle + 2.5 * deviation, rtol=1e-12)
+	np.testing.assert_allclose(columns['BB20-2.5.lower'], middle - 2.5 * deviation, rtol=1e-12)
+
+def test_rsi_matches_pandas():
+	values = prices()
+	change = pd.Series(values).diff()
+	# Wilder's smoothing is an exponential mean with a smoothing of 1 / n
+	gain = change.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+	loss = (-change).clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+	expected = warmed_up(100 - 100 / (1 + gain / loss), 14)
+	np.testing.assert_allclose(compute('RSI', values)['RSI14'], expected, rtol=1e-10)
+
+def test_rsi_without_losses():
+	rsi = compute('RSI3', np.array([1.0, 2.0, 3.0, 4.0, 5.0, 5.0, 5.0]))['RSI3']
+	np.testing.assert_array_equal(rsi, [np.nan, np.nan, np.nan, 100.0, 100.0, 100.0, 100.0])
+	np.testing.assert_array_equal(compute('RSI2', np.full(5, 7.0))['RSI2'][2:], 50.0)
+
+def test_macd_matches_pandas():
+	values = prices()
+	series = pd.Series(values)
+	line = series.ewm(span=12, adjust=False).mean() - series.ewm(span=26, adjust=False).mean()
+	line = pd.Series(warmed_up(line, 25))
+	signal = warmed_up(np.concatenate((np.full(28, np.nan), line[28:].ewm(span=9, adjust=False).mean())), 33)
+	columns = compute('MACD', values)
+	np.testing.assert_allclose(columns['MACD12-26-9'], line, rtol=1e-10)
+	np.testing.assert_allclose(columns['MACD12-26-9.signal'], signal, rtol=1e-10)
+	np.testing.assert_allclose(columns['MACD12-26-9.hist'], line - signal, rtol=1e-10)
+
+@pytest.mark.parametrize('name', ['SMA15', 'EMA20', 'WMA10', 'BB20', 'BB20.upper', 'RSI', 'MACD', 'MACD.signal', 'MACD5-10-4.hist'])
+def test_warmup_matches_the_kernels(name):
+	values = prices(200)
+	# the missing values at the start come before the warm-up
+	column = compute(name, values)[indicators.canonical(name)]
+	assert np.flatnonzero(~np.isnan(column))[0] == 3 + indicators.warmup(name)
+
+@pytest.mark.parametrize(('name', 'canonical'), [('SMA15', 'SMA15'), ('ema20', 'EMA20'), (' wma10 ', 'WMA10'), ('RSI', 'RSI14'),
+                                                 ('BB20', 'BB20-2'), ('BB20-2.5.lower', 'BB20-2.5.lower'), ('SMA15.0', 'SMA15'),
+                                                 ('MACD', 'MACD12-26-9'), ('macd12-26-9.signal', 'MACD12-26-9.signal')])
+def test_canonical(name, canonical):
+	assert indicators.canonical(name) == canonical
+
+def test_parse_and_outputs():
+	(indicator, params, output) = indicators.parse('MACD5-10-4.hist')
+	assert (indicator.kind, params, output) == ('MACD', (5, 10, 4), 'hist')
+	assert indicators.outputs('BB20') == ['BB20-2', 'BB20-2.upper', 'BB20-2.lower']
+	assert indicators.is_overlay('EMA20') and not indicators.is_overlay('RSI14') and not indicators.is_overlay('Close')
+	assert indicators.is_indicator('WMA10') and not indicators.is_indicator('Close')
+	assert indicators.warmup('Close') == 0
+
+@pytest.mark.parametrize('name', ['SMA15.5', 'MACD12-26.5-9', 'XYZ10', 'SMA', 'SMA15-3', 'SMA0', 'EMA20.upper', '15', 'SMA-15'])
+def test_parse_errors(name):
+	with pytest.raises(UnknownIndicator):
+		indicators.parse(name)
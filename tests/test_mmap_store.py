@@ -0,0 +1,51 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mmap_store import MmapStore
+
+@pytest.mark.parametrize('chunksize', [3, 64, 1_000_000])
+def test_from_csv_matches_read_csv(data_file, tmp_path, chunksize):
+	filepath = data_file('GOOG2.csv')
+	store = MmapStore.from_csv(tmp_path / 'store', filepath, chunksize=chunksize)
+	data = pd.read_csv(filepath, index_col='Date', parse_dates=True)
+	assert len(store) == len(data) and store.columns == list(data.columns)
+	assert store['Volume'].dtype == np.int64
+	pd.testing.assert_frame_equal(store.to_frame(*store.get_period()), data, check_index_type=False)
+
+def test_missing_value_after_the_first_chunk(csv_file, tmp_path):
+	index = pd.date_range('2020-01-01', periods=8, freq='D', name='Date')
+	volume = [100, 200, 300, 400, 500, None, 700, 800]
+	filepath = csv_file(pd.DataFrame({'Close': np.arange(8.0), 'Volume': pd.array(volume, dtype='Int64')}, index=index))
+	# the first chunk of Volume is read as integers, the second one has the missing value
+	store = MmapStore.from_csv(tmp_path / 'store', filepath, chunksize=3)
+	assert store['Volume'].dtype == np.float64
+	expected = np.array(volume, dtype=np.float64)
+	np.testing.assert_array_equal(store['Volume'], expected)
+	# the store is reopened with the dtype the column was rewritten in
+	np.testing.assert_array_equal(MmapStore(tmp_path / 'store')['Volume'], expected)
+
+def test_get_data_includes_the_whole_end_day(tmp_path):
+	index = pd.date_range('2020-01-01 09:30', periods=10, freq='12h', name='Date')
+	store = MmapStore.from_frame(tmp_path / 'store', pd.DataFrame({'Close': np.arange(10.0)}, index=index))
+	np.testing.assert_array_equal(store.get_data('2020-01-02', '2020-01-03')['Close'], [2.0, 3.0, 4.0, 5.0])
+	np.testing.assert_array_equal(store.get_data('2020-01-02', '2020-01-03 09:30')['Close'], [2.0, 3.0, 4.0])
+	assert len(store.get_data('2021-01-01', '2021-02-01')['Close']) == 0
+
+def test_unsorted_and_non_numeric_data(csv_file, tmp_path):
+	index = pd.DatetimeIndex(['2020-01-02', '2020-01-01'], name='Date')
+	with pytest.raises(ValueError):
+		MmapStore.from_csv(tmp_path / 'a', csv_file(pd.DataFrame({'Close': [1.0, 2.0]}, index=index), 'A.csv'))
+	index = pd.DatetimeIndex(['2020-01-01', '2020-01-02'], name='Date')
+	with pytest.raises(ValueError):
+		MmapStore.from_csv(tmp_path / 'b', csv_file(pd.DataFrame({'Close': ['1', 'x']}, index=index), 'B.csv'))
+
+def test_other_store_version(tmp_path):
+	MmapStore.from_frame(tmp_path / 'store', pd.DataFrame({'Close': [1.0]}, index=pd.DatetimeIndex(['2020-01-01'], name='Date')))
+	meta = json.loads((tmp_path / 'store' / 'meta.json').read_text())
+	meta['version'] += 1
+	(tmp_path / 'store' / 'meta.json').write_text(json.dumps(meta))
+	with pytest.raises(ValueError):
+		MmapStore(tmp_path / 'store')
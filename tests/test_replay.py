@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from replay import Replay
+from stock_data import StockData
+from synthetic import make_ohlcv
+
+def expected_signals(stock_data, SMA1, SMA2):
+	"""
+	returns {position: 'Buy' or 'Sell'} of _calculate_crossover, and the SMA columns it crossed
+	"""
+	stock_data._calculate_SMA(SMA1)._calculate_SMA(SMA2)._calculate_crossover(f'SMA{SMA1}', f'SMA{SMA2}')
+	signals = {}
+	for side in ('Buy', 'Sell'):
+		for position in np.flatnonzero(stock_data.data[side].notna().to_numpy()).tolist(): signals[position] = side
+	(fast, slow) = (f'SMA{min(SMA1, SMA2)}', f'SMA{max(SMA1, SMA2)}')
+	return (signals, stock_data.data[fast].to_numpy(), stock_data.data[slow].to_numpy())
+
+@pytest.fixture(params=['GOOG2', 'synthetic'])
+def stock_data(request, data_file, csv_file):
+	if request.param == 'GOOG2': return StockData(data_file('GOOG2.csv'), cache=False)
+	data = make_ohlcv(3000, seed=3)
+	# whole numbers make the SMAs equal now and then, missing values at the start stay missing
+	data['Close'] = np.round(data['Close'])
+	data.iloc[:5, data.columns.get_loc('Close')] = np.nan
+	return StockData(csv_file(data), cache=False)
+
+@pytest.mark.parametrize(('SMA1', 'SMA2'), [(15, 50), (50, 15), (5, 20)])
+def test_bars_match_calculate_crossover(stock_data, SMA1, SMA2):
+	(signals, fast, slow) = expected_signals(stock_data, SMA1, SMA2)
+	bars = list(Replay(stock_data, SMA1, SMA2).bars())
+	assert {bar.position: bar.signal for bar in bars if bar.signal} == signals
+	# the running sum can land on the other side of a half and round to the next 0.0001
+	np.testing.assert_allclose([bar.fast for bar in bars], fast, rtol=0, atol=1.01e-4)
+	np.testing.assert_allclose([bar.slow for bar in bars], slow, rtol=0, atol=1.01e-4)
+
+@pytest.mark.parametrize('batch', [1, 7, 64, 65_536])
+@pytest.mark.parametrize(('SMA1', 'SMA2'), [(15, 50), (50, 15)])
+def test_events_match_calculate_crossover(stock_data, SMA1, SMA2, batch):
+	(signals, fast, slow) = expected_signals(stock_data, SMA1, SMA2)
+	events = list(Replay(stock_data, SMA1, SMA2).events(batch=batch))
+	assert {event.position: event.side for event in events} == signals
+	for event in events: assert (event.fast, event.slow) == pytest.approx((fast[event.position], slow[event.position]), rel=0, abs=1.01e-4)
+
+def test_walk_forward_matches_calculate_crossover(stock_data):
+	(signals, fast, slow) = expected_signals(stock_data, 15, 50)
+	replay = Replay(stock_data, 15, 50)
+	found = {}
+	# a walk forward mixing bar by bar and batched segments
+	rng = np.random.default_rng(0)
+	while replay.position < len(stock_data.data):
+		end = replay.position + int(rng.integers(1, 200))
+		if rng.random() < 0.5: found.update((bar.position, bar.signal) for bar in replay.bars(end) if bar.signal)
+		else: found.update((event.position, event.side) for event in replay.events(end, batch=int(rng.integers(1, 100))))
+	assert found == signals
+
+	replay.reset()
+	assert {event.position: event.side for event in replay.events()} == signals
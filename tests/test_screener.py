@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from screener import Screener, read_tail
+from stock_data import StockData
+from synthetic import make_ohlcv
+
+def gappy_files(csv_file, files, rows=400, window=55):
+	"""
+	writes synthetic stock data files with runs of missing values, some of them
+	right where the rows the screener reads start
+	"""
+	rng = np.random.default_rng(1)
+	filepaths = []
+	for seed in range(files):
+		data = make_ohlcv(rows, seed=seed)
+		close = data.columns.get_loc('Close')
+		for start in rng.integers(0, rows, 5): data.iloc[start:start + rng.integers(1, 4), close] = np.nan
+		# the first row read and the rows before it
+		first = rows - window
+		data.iloc[first - rng.integers(0, 3):first + rng.integers(1, 3), close] = np.nan
+		filepaths.append(csv_file(data, f'T{seed:03}.csv'))
+	return filepaths
+
+def pipeline_crossovers(filepaths, SMA1, SMA2, days):
+	"""
+	returns {ticker: (side, bars_ago)} of the last crossover of _calculate_crossover in the last days bars
+	"""
+	found = {}
+	for filepath in filepaths:
+		stock_data = StockData(filepath, cache=False)
+		stock_data._calculate_SMA(SMA1)._calculate_SMA(SMA2)._calculate_crossover(f'SMA{SMA1}', f'SMA{SMA2}')
+		tail = stock_data.data.iloc[-days:]
+		signals = [(i, side) for side in ('Buy', 'Sell') for i in np.flatnonzero(tail[side].notna().to_numpy()).tolist()]
+		if signals:
+			(i, side) = max(signals)
+			found[Path(filepath).stem] = (side, days - 1 - i)
+	return found
+
+def test_crossovers_match_calculate_crossover(csv_file):
+	filepaths = gappy_files(csv_file, 120)
+	screener = Screener(filepaths, 15, 50, days=5)
+	assert not screener.failures
+	found = {result.ticker: (result.side, result.bars_ago) for result in screener.crossovers()}
+	expected = pipeline_crossovers(filepaths, 15, 50, 5)
+	assert len(expected) > 10
+	assert found == expected
+
+@pytest.mark.parametrize('block', [16, 1 << 13])
+def test_read_tail_fills_missing_values_at_the_start(csv_file, block):
+	data = make_ohlcv(200, seed=0)
+	data.iloc[140:165, data.columns.get_loc('Close')] = np.nan
+	filepath = csv_file(data)
+	(dates, values) = read_tail(filepath, 50, block=block)
+	expected = StockData(filepath, cache=False).data
+	assert dates == [f'{date:%Y-%m-%d}' for date in expected.index[-50:]]
+	np.testing.assert_allclose(values, expected['Close'].to_numpy()[-50:], rtol=1e-12)
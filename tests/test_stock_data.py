@@ -0,0 +1,322 @@
+import os
+import pickle
+import shutil
+from pathlib import Path
+
+import matplotlib.dates as mdates
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_data import StockData, IndicatorCache, INDICATORS, CACHE_VERSION, _read_cache, _write_cache
+from stock_universe import StockUniverse
+
+def test_pickle_round_trip(data_file):
+	stock_data = StockData(data_file('GOOG2.csv'))
+	stock_data._calculate_SMA(15)._calculate_SMA(50)._calculate_crossover('SMA15', 'SMA50')
+	copy = pickle.loads(pickle.dumps(stock_data))
+	pd.testing.assert_frame_equal(copy.data, stock_data.data)
+	# the shared cache is not copied along, the copy uses the shared cache of its process
+	assert copy.indicators is INDICATORS
+	copy._calculate_SMA(20)
+	assert 'SMA20' in copy.data
+
+def test_pickle_own_indicator_cache(data_file):
+	cache = IndicatorCache()
+	stock_data = StockData(data_file('SHORT.csv'), indicators=cache)._calculate_SMA(15)
+	copy = pickle.loads(pickle.dumps(stock_data))
+	assert copy.indicators is not cache and len(copy.indicators) == len(cache)
+	# the copy's lock works
+	copy._calculate_SMA(5)
+
+def test_universe_in_processes(data_file):
+	filepaths = [data_file(name) for name in ('GOOG2.csv', 'SHORT.csv', 'C31.SI.csv')]
+	universe = StockUniverse(filepaths, max_workers=2, processes=True, cache=False)
+	assert not universe.failures
+	assert list(universe) == ['C31.SI', 'GOOG2', 'SHORT']
+	np.testing.assert_array_equal(universe['GOOG2'].data['Close'].to_numpy(), StockData(filepaths[0], cache=False).data['Close'].to_numpy())
+
+def test_indicator_cache_hits_across_files(data_file, tmp_path):
+	cache = IndicatorCache()
+	first = StockData(data_file('GOOG2.csv'), cache=False, indicators=cache)._calculate_SMA(15)
+	assert (cache.hits, cache.misses) == (0, 1)
+	# the same prices in another file are found by their content
+	second = StockData(str(shutil.copy(first.filepath, tmp_path / 'OTHER.csv')), cache=False, indicators=cache)
+	second._calculate_SMA(15)
+	assert (cache.hits, cache.misses) == (1, 1)
+	np.testing.assert_array_equal(second.data['SMA15'], first.data['SMA15'])
+
+def test_indicator_cache_evicts_the_least_recently_used():
+	row = np.zeros(100)
+	cache = IndicatorCache(max_bytes=3 * row.nbytes)
+	for key in 'abc': cache.put((key,), row)
+	assert cache.get(('a',)) is not None
+	cache.put(('d',), row)
+	# b was used least recently
+	assert ('b',) not in cache and all((key,) in cache for key in 'acd')
+	assert (cache.evictions, cache.nbytes) == (1, 3 * row.nbytes)
+	assert cache.get(('b',)) is None and cache.misses == 1
+
+def test_indicator_cache_persists_npy_files(tmp_path):
+	cache = IndicatorCache(max_bytes=800, folder=tmp_path / 'cache')
+	cache.put(('a', 15), np.arange(100.0))
+	cache.put(('b', 15), np.arange(100.0) * 2)
+	# evicted from memory, read back from its .npy file
+	assert ('a', 15) not in cache and len(list((tmp_path / 'cache').glob('*.npy'))) == 2
+	np.testing.assert_array_equal(cache.get(('a', 15)), np.arange(100.0))
+	# and by a new cache, e.g. after restarting
+	restarted = IndicatorCache(folder=tmp_path / 'cache')
+	values = restarted.get(('b', 15))
+	np.testing.assert_array_equal(values, np.arange(100.0) * 2)
+	assert not values.flags.writeable and restarted.hits == 1
+
+def test_indicator_cache_after_new_data(data_file):
+	stock_data = StockData(data_file('GOOG2.csv'), cache=False, indicators=IndicatorCache())._calculate_SMA(15)
+	data = stock_data.data.drop(columns=['SMA15'])
+	data['Close'] = data['Close'] * 2
+	stock_data.data = data
+	stock_data._calculate_SMA(15)
+	expected = np.round(data['Close'].rolling(15).mean().to_numpy(), 4)
+	np.testing.assert_allclose(stock_data.data['SMA15'].to_numpy(), expected, rtol=1e-12)
+
+def test_indicators_of_an_empty_file(data_file):
+	# every column of EMPTY.csv, including its saved SMAs, is read as objects
+	stock_data = StockData(data_file('EMPTY.csv'))
+	stock_data._calculate_SMA(15)._calculate_SMA(20)._calculate_crossover('SMA15', 'SMA20')
+	stock_data.calculate_indicator('EMA15')
+	stock_data.calculate_indicator('EMA15')
+	assert len(stock_data.data) == 0 and {'SMA15', 'SMA20', 'EMA15'} <= set(stock_data.data.columns)
+
+def read_back(filepath):
+	return pd.read_csv(filepath, index_col='Date', parse_dates=True)
+
+def stale_cache(filepath):
+	"""
+	writes a binary cache of the .csv file with every Close doubled, so a load
+	that uses it is told apart from one that parses the .csv
+	"""
+	data = read_back(filepath)
+	data['Close'] *= 2
+	_write_cache(filepath, data)
+	return data
+
+@pytest.mark.parametrize('backing', ['frame', 'series'])
+@pytest.mark.parametrize('change', ['mtime', 'size', 'version'])
+def test_cache_of_a_changed_file_is_ignored(data_file, monkeypatch, backing, change):
+	filepath = data_file('GOOG2.csv')
+	cached = stale_cache(filepath)
+	np.testing.assert_array_equal(StockData(filepath, backing=backing)._values('Close'), cached['Close'])
+
+	stale_cache(filepath)
+	stat = os.stat(filepath)
+	if change == 'mtime':
+		os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+	elif change == 'size':
+		# a file rewritten within the same modification time
+		with open(filepath, 'a') as file: file.write('2020-09-23,1,2,0.5,1.5,1.5,10\n')
+		os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+	else:
+		monkeypatch.setattr('stock_data.CACHE_VERSION', CACHE_VERSION + 1)
+	expected = read_back(filepath)['Close'].to_numpy()
+	np.testing.assert_array_equal(StockData(filepath, backing=backing)._values('Close'), expected)
+	# the cache was rebuilt for the file as it is now
+	np.testing.assert_array_equal(_read_cache(filepath)[0]['Close'], expected)
+
+def gappy_goog(data_file):
+	"""
+	GOOG2 with missing values in the middle of the data and at the ends of the append batches below
+	"""
+	data = pd.read_csv(data_file('GOOG2.csv'), index_col='Date', parse_dates=True)
+	for (first, last, col) in ((40, 42, 'Close'), (295, 297, 'Close'), (333, 334, 'Open'), (517, 520, 'High'), (591, 594, 'Low')):
+		data.iloc[first:last, data.columns.get_loc(col)] = np.nan
+	return data
+
+@pytest.mark.parametrize('chunksize', [None, 64])
+def test_append_bars_matches_full_load(data_file, csv_file, chunksize):
+	data = gappy_goog(data_file)
+	full = StockData(csv_file(data, 'FULL.csv'), cache=False)
+	full._calculate_SMA(15)._calculate_SMA(50)._calculate_crossover('SMA15', 'SMA50')
+
+	# the batches of 37 bars end in the gaps at 295, 333, 517 and 591
+	head = 260
+	live = StockData(csv_file(data.iloc[:head], 'HEAD.csv'), cache=False, chunksize=chunksize)
+	live._calculate_SMA(15)._calculate_SMA(50)._calculate_crossover('SMA15', 'SMA50')
+	for start in range(head, len(data), 37): live.append_bars(data.iloc[start:start + 37])
+	pd.testing.assert_frame_equal(live.data[full.data.columns], full.data, check_dtype=False, check_freq=False)
+
+@pytest.mark.parametrize('order', ['sorted', 'swapped', 'reversed'])
+@pytest.mark.parametrize('chunksize', [1, 64, 10_000])
+def test_chunked_read_matches_read_csv(data_file, csv_file, order, chunksize):
+	data = gappy_goog(data_file)
+	data.iloc[:3, data.columns.get_loc('Close')] = np.nan
+	data.iloc[-4:, data.columns.get_loc('Open')] = np.nan
+	# the rows as they are in the file, check_data sorts them
+	if order == 'swapped': data = pd.concat((data.iloc[300:], data.iloc[:300]))
+	elif order == 'reversed': data = data.iloc[::-1]
+	filepath = csv_file(data)
+
+	full = StockData(filepath, cache=False)
+	full._calculate_SMA(15)._calculate_SMA(50)
+	chunked = StockData(filepath, chunksize=chunksize, windows=(15, 50))
+	pd.testing.assert_frame_equal(chunked.data, full.data, check_dtype=False, check_freq=False)
+	assert chunked._open_gaps == full._open_gaps == {'Open': len(data) - 4}
+
+def test_chunked_float32_read_keeps_volumes_exact(csv_file):
+	index = pd.date_range('2020-01-01', periods=6, freq='D', name='Date')
+	volume = [123_456_789, 16_777_217, np.nan, 98_765_431, 2**40 + 1, 5]
+	filepath = csv_file(pd.DataFrame({'Close': np.linspace(100.1, 105.1, 6), 'Volume': volume}, index=index))
+	data = StockData(filepath, chunksize=4, dtype=np.float32).data
+	assert (data['Close'].dtype, data['Volume'].dtype) == (np.float32, np.float64)
+	np.testing.assert_array_equal(data['Volume'], [123_456_789, 16_777_217, (16_777_217 + 98_765_431) / 2, 98_765_431, 2**40 + 1, 5])
+
+def test_series_backing_matches_frame_backing(data_file, csv_file):
+	data = gappy_goog(data_file)
+	# rows out of order for check_data to sort
+	filepath = csv_file(pd.concat((data.iloc[400:500], data.iloc[:400], data.iloc[500:600])), 'BACKING.csv')
+	(frame, series) = (StockData(filepath, cache=False), StockData(filepath, cache=False, backing='series'))
+	for stock_data in (frame, series):
+		stock_data._calculate_SMA(15)._calculate_SMA(50)._calculate_crossover('SMA15', 'SMA50')
+	# the series backing has not made a dataframe along the way
+	assert series._series is not None
+	for col in frame.data.columns:
+		np.testing.assert_array_equal(series._values(col), frame._values(col), err_msg=col)
+	np.testing.assert_array_equal(series._dates(), frame._dates())
+
+	for (start, end) in (('2018-01-01', '2019-06-30'), ('2019-03-02', '2019-03-02'), ('2010-01-01', '2030-01-01'), ('2019-06-01', '2019-01-01')):
+		expected = frame.get_data(start, end)
+		selected = series.get_data(start, end)
+		pd.testing.assert_frame_equal(selected.to_frame(), expected, check_freq=False, check_index_type=False)
+		np.testing.assert_array_equal(series.selected_date_nums, frame.selected_date_nums)
+
+	for stock_data in (frame, series): stock_data.append_bars(data.iloc[600:650])
+	pd.testing.assert_frame_equal(series.data, frame.data, check_index_type=False)
+
+def test_resampled_bars_follow_the_data(data_file):
+	stock_data = StockData(data_file('GOOG2.csv'), cache=False)
+	weekly = stock_data.resample('W')
+	assert stock_data.resample('W') is weekly
+	# a column replaced in place keeps the index
+	stock_data._set_column('Close', stock_data._values('Close') * 2)
+	np.testing.assert_array_equal(stock_data.resample('W')['Close'], weekly['Close'] * 2)
+	stock_data.append_bars([{'Date': '2020-09-23', 'Open': 1.0, 'High': 2.0, 'Low': 0.5, 'Close': 1.5, 'Adj Close': 1.5, 'Volume': 10}])
+	last = stock_data.resample('W').iloc[-1]
+	assert (last['Close'], last['Low'], last['Volume']) == (1.5, 0.5, weekly['Volume'].iloc[-1] + 10)
+
+def mask_selection(data, start_date, end_date):
+	"""
+	selects the rows from start_date to end_date inclusive with a boolean mask over
+	the whole index, an end_date at midnight including every row on that day
+	"""
+	(start_date, end_date) = (pd.Timestamp(start_date), pd.Timestamp(end_date))
+	if end_date == end_date.normalize(): mask = (data.index >= start_date) & (data.index < end_date + pd.Timedelta(days=1))
+	else: mask = (data.index >= start_date) & (data.index <= end_date)
+	return data[mask]
+
+@pytest.mark.parametrize('backing', ['frame', 'series'])
+def test_get_data_matches_a_boolean_mask(csv_file, backing):
+	# bars at 09:30 and 16:00 of every weekday
+	days = pd.bdate_range('2020-01-01', '2020-03-31')
+	index = pd.DatetimeIndex(np.sort(np.concatenate((days + pd.Timedelta('9h30min'), days + pd.Timedelta('16h')))), name='Date')
+	data = pd.DataFrame({'Close': np.arange(len(index), dtype=np.float64)}, index=index)
+	stock_data = StockData(csv_file(data), cache=False, backing=backing)
+	ranges = [
+		# outside the data
+		('2019-01-01', '2019-12-31'), ('2020-04-01', '2020-05-01'), ('2019-12-01', '2020-01-02'), ('2020-03-30', '2020-06-01'),
+		('2010-01-01', '2030-01-01'),
+		# exactly on a bar
+		('2020-01-02 09:30', '2020-01-03 16:00'), ('2020-01-02 16:00', '2020-01-02 16:00'), ('2020-01-01 09:30', '2020-03-31 16:00'),
+		('2020-02-03', '2020-02-03'), ('2020-01-01', '2020-03-31'),
+		# between bars, on a weekend and reversed
+		('2020-01-02 12:00', '2020-01-06 10:00'), ('2020-01-02 16:00:01', '2020-01-03 09:29:59'), ('2020-01-04', '2020-01-05'),
+		('2020-01-04', '2020-01-07 09:30'), ('2020-02-10', '2020-02-03'), ('2020-01-03 16:00', '2020-01-03 09:30'),
+		(pd.Timestamp('2020-01-02 09:30'), pd.Timestamp('2020-01-02')),
+	]
+	for (start, end) in ranges:
+		expected = mask_selection(data, start, end)
+		selected = stock_data.get_data(start, end)
+		if backing == 'series': selected = selected.to_frame()
+		pd.testing.assert_frame_equal(selected, expected, check_freq=False, check_index_type=False, obj=f'{start} to {end}')
+		np.testing.assert_allclose(stock_data.selected_date_nums, mdates.date2num(expected.index))
+
+def test_append_bars_open_gap_at_the_end(csv_file):
+	index = pd.date_range('2020-01-01', periods=6, freq='D', name='Date')
+	stock_data = StockData(csv_file(pd.DataFrame({'Close': [1.0, 2.0, 3.0, np.nan, np.nan, np.nan]}, index=index)), cache=False)
+	# nothing to interpolate with yet, the last value is repeated
+	np.testing.assert_array_equal(stock_data.data['Close'].to_numpy(), [1, 2, 3, 3, 3, 3])
+	stock_data.append_bars([{'Date': '2020-01-07', 'Close': 7.0}])
+	np.testing.assert_array_equal(stock_data.data['Close'].to_numpy(), [1, 2, 3, 4, 5, 6, 7])
+
+def test_append_bars_rejects_non_numeric_bars(data_file):
+	stock_data = StockData(data_file('GOOG2.csv'), cache=False)
+	stock_data._calculate_SMA(15)._calculate_SMA(50)._calculate_crossover('SMA15', 'SMA50')
+	before = stock_data.data.copy()
+	with pytest.raises(ValueError, match='numeric'): stock_data.append_bars([{'Date': '2020-09-23', 'Close': 'abc'}])
+	pd.testing.assert_frame_equal(stock_data.data, before)
+	# later bars are still appended
+	stock_data.append_bars([{'Date': '2020-09-23', 'Open': 1.0, 'High': 2.0, 'Low': 0.5, 'Close': 1.5, 'Adj Close': 1.5, 'Volume': 10}])
+	assert stock_data.data['Close'].dtype == np.float64 and stock_data.data['Close'].iloc[-1] == 1.5
+
+def test_append_bars_leaves_the_data_unchanged_on_failure(data_file, monkeypatch):
+	stock_data = StockData(data_file('GOOG2.csv'), cache=False)
+	stock_data._calculate_SMA(15)._calculate_SMA(50)._calculate_crossover('SMA15', 'SMA50')
+	before = stock_data.data.copy()
+	def fail(start=0): raise RuntimeError('failed')
+	monkeypatch.setattr(stock_data, '_fill_crossover', fail)
+	with pytest.raises(RuntimeError): stock_data.append_bars([{'Date': '2020-09-23', 'Close': 1.5}])
+	pd.testing.assert_frame_equal(stock_data.data, before)
+
+def test_changes_are_saved_on_flush(data_file, csv_file):
+	data = gappy_goog(data_file)
+	filepath = csv_file(data.iloc[:600], 'GAPPY.csv')
+	with open(filepath, 'rb') as file: before = file.read()
+	stock_data = StockData(filepath, cache=False)
+	stock_data.append_bars(data.iloc[600:])
+	# the filled gaps and the new bars are only in memory until flush
+	assert stock_data.dirty
+	with open(filepath, 'rb') as file: assert file.read() == before
+	stock_data.flush()
+	assert not stock_data.dirty
+	pd.testing.assert_frame_equal(read_back(filepath), stock_data.data, check_dtype=False, check_freq=False, check_index_type=False)
+	# nothing is written without changes
+	mtime = os.stat(filepath).st_mtime_ns
+	stock_data.flush()
+	assert os.stat(filepath).st_mtime_ns == mtime
+
+def test_save_replaces_the_file_in_one_step(data_file, monkeypatch):
+	filepath = data_file('GOOG2.csv')
+	with open(filepath, 'rb') as file: before = file.read()
+	stock_data = StockData(filepath, cache=False)._calculate_SMA(15)
+	replaced = []
+	def replace(source, target):
+		# the whole file is written next to the target, which is untouched until it is replaced
+		assert os.path.dirname(source) == os.path.dirname(target) and os.path.basename(source).endswith('.tmp')
+		with open(target, 'rb') as file: assert file.read() == before
+		assert 'SMA15' in read_back(source)
+		replaced.append(target)
+		real_replace(source, target)
+	real_replace = os.replace
+	monkeypatch.setattr(os, 'replace', replace)
+	stock_data.save()
+	assert replaced == [Path(filepath)]
+	assert 'SMA15' in read_back(filepath)
+
+	# a failed save leaves the file as it was and no temporary file behind
+	def fail(source, target): raise OSError('failed')
+	monkeypatch.setattr(os, 'replace', fail)
+	with open(filepath, 'rb') as file: saved = file.read()
+	stock_data._calculate_SMA(50)
+	with pytest.raises(OSError): stock_data.save()
+	with open(filepath, 'rb') as file: assert file.read() == saved
+	assert os.listdir(os.path.dirname(filepath)) == ['GOOG2.csv']
+
+def test_write_through_saves_every_change(data_file, csv_file):
+	data = gappy_goog(data_file)
+	filepath = csv_file(data.iloc[:600], 'GAPPY.csv')
+	# the gaps filled when loading are saved right away
+	stock_data = StockData(filepath, write_through=True, cache=False)
+	assert not stock_data.dirty and not read_back(filepath).isna().any().any()
+	stock_data._calculate_SMA(15)
+	assert not stock_data.dirty and 'SMA15' in read_back(filepath)
+	stock_data.append_bars(data.iloc[600:])
+	assert not stock_data.dirty
+	pd.testing.assert_frame_equal(read_back(filepath), stock_data.data, check_dtype=False, check_freq=False, check_index_type=False)